@@ -1,20 +1,47 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from flask import Flask, request, jsonify, render_template, send_from_directory, send_file
+from flask import Flask, Response, request, jsonify, render_template, send_file, stream_with_context
 from flask_cors import CORS
-import chardet
-import base64
-import unicodedata
+from werkzeug.exceptions import NotFound
+import codecs
+import hashlib
+import argparse
 import json
 import os
+import sys
 from pathlib import Path
 import threading
 import time
 
+try:
+    import msgpack
+except ImportError:  # msgpack 为可选依赖，缺失时不支持 MessagePack 响应
+    msgpack = None
+
 # 获取当前脚本的绝对路径
 current_dir = Path(__file__).parent.absolute()
 project_root = current_dir.parent
+
+# 将项目根目录加入模块搜索路径，以便导入共享的转换引擎
+sys.path.insert(0, str(project_root))
+from encoding_converter import (
+    SUPPORTED_ENCODINGS, ResultCache, char_cache, convert_columnar, detect_scored, perform_conversion,
+    read_text
+)
+from encoding_converter.engine import normalize_limits
+from encoding_converter.repair import DEFAULT_DEPTH, repair_text
+from encoding_converter.batch import BatchJobManager
+from encoding_converter.detect import (
+    DEFAULT_CONFIDENCE_THRESHOLD, DEFAULT_DETECT_MAX_BYTES, DEFAULT_TOP_N, DEFAULT_WINDOW_BYTES,
+    detect_candidates, detect_candidates_stream, detect_file
+)
+from encoding_converter.static_assets import send_static
+from encoding_converter.stream import (
+    DEFAULT_CHUNK_CHARS, DEFAULT_READ_BYTES, iter_text_chunks, iter_decoded_chunks,
+    iter_stream_records, iter_transcoded_chunks, spool_stream, transcode_errors
+)
+
 frontend_dir = project_root / 'frontend'
 vue_dist_dir = project_root / 'frontend-vue' / 'dist'
 
@@ -23,39 +50,60 @@ print(f"📁 前端目录: {frontend_dir}")
 print(f"📁 Vue构建目录: {vue_dist_dir}")
 
 # 创建三个Flask应用
+# 静态文件统一由 send_static 提供（预压缩、缓存头、条件请求），不使用 Flask 内置静态路由
 # API服务器 (端口15000)
 api_app = Flask(__name__, 
                 template_folder=str(frontend_dir),
-                static_folder=str(frontend_dir),
-                static_url_path='')
+                static_folder=None)
 
 # Vue应用服务器 (端口15001)
 vue_app = Flask(__name__,
                 template_folder=str(vue_dist_dir),
-                static_folder=str(vue_dist_dir),
-                static_url_path='')
+                static_folder=None)
 
 # 原版HTML应用服务器 (端口15002)
 html_app = Flask(__name__,
                  template_folder=str(frontend_dir),
-                 static_folder=str(frontend_dir),
-                 static_url_path='')
+                 static_folder=None)
 
 # 配置CORS
-CORS(api_app)
+# 跨域页面需要读取 ETag 才能发送条件请求，以及 /api/transcode 实际使用的源编码
+CORS(api_app, expose_headers=['ETag', 'X-Source-Encoding'])
 CORS(vue_app)
 CORS(html_app)
 
-# 支持的编码格式
-SUPPORTED_ENCODINGS = [
-    'utf-8', 'utf-16', 'utf-16le', 'utf-16be', 'utf-32', 'utf-32le', 'utf-32be',
-    'ascii', 'latin-1', 'cp1252', 'iso-8859-1', 'iso-8859-15',
-    'gbk', 'gb2312', 'gb18030', 'big5', 'big5hkscs',
-    'shift_jis', 'cp932', 'euc-jp', 'iso-2022-jp',
-    'euc-kr', 'cp949', 'iso-2022-kr',
-    'koi8-r', 'cp1251', 'iso-8859-5',
-    'cp437', 'cp850', 'cp866'
-]
+# 各服务端口
+API_PORT = 15000
+VUE_PORT = 15001
+HTML_PORT = 15002
+
+# 逐字符明细的数量上限（避免性能问题）
+CHAR_DETAIL_LIMIT = 100
+# 整体结果中 bytes 列表的长度上限
+BYTES_LIST_LIMIT = 1000
+# 整体结果各字节表示最多渲染的字节数（None 表示不限制），请求中的 limits 只能调低
+OVERALL_FIELD_LIMITS = {
+    'hex': None,
+    'base64': None,
+    'bytes': BYTES_LIST_LIMIT
+}
+# 列式结果中逐字符数据的数量上限
+COLUMNAR_CHAR_LIMIT = 100000
+
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+# /api/convert 响应体缓存的总字节上限
+RESULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+result_cache = ResultCache(max_bytes=RESULT_CACHE_MAX_BYTES)
+
+# /api/convert/stream 的 JSON 请求体需要整体读入内存，超过该大小返回 413，大文本应改用原始请求体
+STREAM_JSON_MAX_BYTES = 1024 * 1024
+
+# /api/transcode 请求体不超过该大小时整体转换，响应带 Content-Length；更大的边读边转
+TRANSCODE_BUFFER_BYTES = 8 * 1024 * 1024
+
+# 批量转换任务管理（进程池按需创建）
+batch_manager = BatchJobManager()
 
 # 路由：主页
 @api_app.route('/')
@@ -66,10 +114,11 @@ def index():
 # 路由：静态文件
 @api_app.route('/<path:filename>')
 def static_files(filename):
-    """提供静态文件"""
-    if filename.endswith(('.css', '.js', '.png', '.jpg', '.ico', '.svg')):
-        return send_from_directory(str(frontend_dir), filename)
-    return render_template('index.html')
+    """提供静态文件，文件不存在时返回主页"""
+    try:
+        return send_static(frontend_dir, filename)
+    except NotFound:
+        return render_template('index.html')
 
 # API路由：获取支持的编码列表
 @api_app.route('/api/encodings', methods=['GET'])
@@ -120,129 +169,371 @@ def get_encoding_description(encoding):
 # API路由：文本编码转换
 @api_app.route('/api/convert', methods=['POST'])
 def convert_text():
-    """转换文本编码"""
+    """转换文本编码
+
+    请求体可选字段:
+      fields: 需要的字节表示，hex/base64/bytes 的子集（默认全部）
+      format: detailed（默认，逐字符明细）或 columnar（每种编码一个字节块加偏移数组）
+      single_pass: 为 true 时每种编码只整体编码一次，逐字符字节取自整体结果
+                   （utf-16 等不再逐字符带 BOM，iso-2022-* 的转义序列与整体一致）
+      limits: 整体结果各字段最多渲染的字节数，如 {"hex": 4096}，被截断的字段列在 truncated 中
+    Accept: application/msgpack 时以 MessagePack 返回，字节块为原始二进制。
+    相同请求返回相同的强 ETag；If-None-Match 匹配时返回 304，否则优先使用缓存的响应体。
+    """
     try:
         data = request.get_json()
         text = data.get('text', '')
         target_encodings = data.get('encodings', ['utf-8'])
+        fields = data.get('fields')
+        result_format = data.get('format', 'detailed')
+        single_pass = bool(data.get('single_pass', False))
+        limits = field_limits(data.get('limits'))
         
         if not text:
             return jsonify({
                 'success': False,
                 'error': '文本不能为空'
             }), 400
+        if result_format not in ('detailed', 'columnar'):
+            raise ValueError(f'不支持的格式: {result_format}')
+
+        use_msgpack = wants_msgpack()
+        if use_msgpack and msgpack is None:
+            return jsonify({
+                'success': False,
+                'error': '服务器未安装 msgpack'
+            }), 406
+
+        cache_key = conversion_cache_key(text, target_encodings, fields, result_format,
+                                         single_pass, limits, use_msgpack)
+        headers = {'ETag': f'"{cache_key}"', 'Cache-Control': 'no-cache', 'Vary': 'Accept'}
+        if request.if_none_match.contains(cache_key):
+            return Response(status=304, headers=headers)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            body, mimetype = cached
+            return Response(body, mimetype=mimetype, headers=headers)
+
+        if result_format == 'columnar':
+            results = convert_columnar(
+                text,
+                target_encodings,
+                char_limit=COLUMNAR_CHAR_LIMIT,
+                binary=use_msgpack
+            )
+            payload = {
+                'success': True,
+                'results': results
+            }
+        else:
+            results = perform_encoding_conversion(text, target_encodings, fields, single_pass, limits)
+            payload = {
+                'success': True,
+                'results': results,
+                'original_text': text
+            }
+
+        if use_msgpack:
+            body, mimetype = msgpack.packb(payload, use_bin_type=True), MSGPACK_MIMETYPE
+        else:
+            body, mimetype = jsonify(payload).get_data(), 'application/json'
+        result_cache.put(cache_key, body, mimetype)
+        return Response(body, mimetype=mimetype, headers=headers)
         
-        results = perform_encoding_conversion(text, target_encodings)
-        
+    except ValueError as e:
         return jsonify({
-            'success': True,
-            'results': results,
-            'original_text': text
-        })
-        
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-def perform_encoding_conversion(text, target_encodings):
-    """执行编码转换"""
-    results = {
-        'characters': [],
-        'overall': {},
-        'stats': {
-            'length': len(text),
-            'byte_count_utf8': len(text.encode('utf-8')),
-            'unique_chars': len(set(text)),
-            'line_count': text.count('\n') + 1 if text else 0
-        }
+def conversion_cache_key(text, target_encodings, fields, result_format, single_pass, limits,
+                         use_msgpack):
+    """由请求内容计算缓存键（同时作为 ETag），字段顺序不影响结果"""
+    if isinstance(fields, list):
+        fields = sorted(set(map(str, fields)))
+    options = {
+        'text': text,
+        'encodings': target_encodings,
+        'fields': fields,
+        'format': result_format,
+        'single_pass': single_pass,
+        'limits': limits,
+        'msgpack': use_msgpack
     }
-    
-    # 字符级转换（只对前100个字符，避免性能问题）
-    char_limit = min(100, len(text))
-    for i, char in enumerate(text[:char_limit]):
-        char_info = {
-            'char': char,
-            'unicode': f'U+{ord(char):04X}',
-            'unicode_name': '',
-            'position': i,
-            'encodings': {}
-        }
-        
-        # 获取Unicode名称
+    canonical = json.dumps(options, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('ascii')).hexdigest()
+
+def wants_msgpack():
+    """根据 Accept 头判断客户端是否要求 MessagePack"""
+    best = request.accept_mimetypes.best_match(['application/json', MSGPACK_MIMETYPE, 'application/x-msgpack'])
+    return best in (MSGPACK_MIMETYPE, 'application/x-msgpack')
+
+def field_limits(requested=None):
+    """合并服务端与请求中的字段长度上限，取两者中较小的值"""
+    if requested is None:
+        requested = {}
+    if not isinstance(requested, dict):
+        raise ValueError('limits 必须是对象')
+    limits = dict(OVERALL_FIELD_LIMITS)
+    for field, limit in normalize_limits(requested).items():
+        if limit is not None:
+            limits[field] = limit if limits.get(field) is None else min(limit, limits[field])
+    return limits
+
+def perform_encoding_conversion(text, target_encodings, fields=None, single_pass=False, limits=None):
+    """执行编码转换"""
+    return perform_conversion(
+        text,
+        target_encodings,
+        char_limit=CHAR_DETAIL_LIMIT,
+        fields=fields,
+        single_pass=single_pass,
+        limits=field_limits() if limits is None else limits
+    )
+
+def parse_encodings_arg():
+    """从查询参数读取编码列表，支持重复参数或逗号分隔"""
+    encodings = []
+    for value in request.args.getlist('encodings'):
+        encodings.extend(enc.strip() for enc in value.split(',') if enc.strip())
+    return encodings or ['utf-8']
+
+def ndjson_response(records):
+    """把记录生成器包装为 NDJSON 流式响应"""
+    def generate():
         try:
-            char_info['unicode_name'] = unicodedata.name(char, 'UNKNOWN')
-        except ValueError:
-            char_info['unicode_name'] = 'PRIVATE USE' if ord(char) >= 0xE000 else 'UNKNOWN'
-        
-        # 各种编码转换
-        for encoding in target_encodings:
-            if encoding in SUPPORTED_ENCODINGS:
-                try:
-                    encoded = char.encode(encoding)
-                    char_info['encodings'][encoding] = {
-                        'success': True,
-                        'hex': encoded.hex().upper(),
-                        'bytes': list(encoded),
-                        'base64': base64.b64encode(encoded).decode('ascii'),
-                        'length': len(encoded)
-                    }
-                except (UnicodeEncodeError, LookupError):
-                    char_info['encodings'][encoding] = {
-                        'success': False,
-                        'error': 'Cannot encode'
-                    }
-        
-        results['characters'].append(char_info)
-    
-    # 整体编码
-    for encoding in target_encodings:
-        if encoding in SUPPORTED_ENCODINGS:
-            try:
-                encoded = text.encode(encoding)
-                results['overall'][encoding] = {
-                    'success': True,
-                    'hex': encoded.hex().upper(),
-                    'bytes': list(encoded) if len(encoded) <= 1000 else list(encoded[:1000]) + ['...'],
-                    'base64': base64.b64encode(encoded).decode('ascii'),
-                    'length': len(encoded),
-                    'size_mb': round(len(encoded) / 1024 / 1024, 4)
-                }
-            except (UnicodeEncodeError, LookupError):
-                results['overall'][encoding] = {
+            for record in records:
+                yield json.dumps(record, ensure_ascii=False) + '\n'
+        except Exception as e:
+            # 响应头已发出，只能在流中报告错误
+            yield json.dumps({'type': 'error', 'error': str(e)}, ensure_ascii=False) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+# API路由：流式文本编码转换
+@api_app.route('/api/convert/stream', methods=['POST'])
+def convert_text_stream():
+    """流式转换文本编码，按块输出 NDJSON
+
+    JSON 请求体: {"text": ..., "encodings": [...], "chunk_size": 65536}
+      整体读入内存后再分块，不是流式的，超过 STREAM_JSON_MAX_BYTES 返回 413
+    其他请求体: 原始文本按 charset（默认 UTF-8）增量解码，编码列表由 ?encodings= 指定，
+      边读边转，大文本应使用这种方式
+    """
+    try:
+        if request.is_json:
+            if request.content_length is None or request.content_length > STREAM_JSON_MAX_BYTES:
+                return jsonify({
                     'success': False,
-                    'error': 'Cannot encode entire text'
-                }
-    
-    return results
+                    'error': f'JSON 请求体需要带 Content-Length 且不超过 {STREAM_JSON_MAX_BYTES} 字节，'
+                             '大文本请以原始请求体发送（如 Content-Type: text/plain; charset=utf-8，'
+                             '编码列表用 ?encodings= 指定）'
+                }), 413
+            data = request.get_json()
+            text = data.get('text', '')
+            target_encodings = data.get('encodings', ['utf-8'])
+            chunk_chars = int(data.get('chunk_size', DEFAULT_CHUNK_CHARS))
+
+            if not text:
+                return jsonify({
+                    'success': False,
+                    'error': '文本不能为空'
+                }), 400
+            if chunk_chars <= 0:
+                raise ValueError('chunk_size 必须为正数')
+
+            chunks = iter_text_chunks(text, chunk_chars)
+        else:
+            target_encodings = parse_encodings_arg()
+            charset = request.mimetype_params.get('charset', 'utf-8')
+            codecs.lookup(charset)
+            chunks = iter_decoded_chunks(request.stream, charset)
+
+        return ndjson_response(iter_stream_records(chunks, target_encodings))
+
+    except (ValueError, LookupError) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
 
 # API路由：编码检测
 @api_app.route('/api/detect', methods=['POST'])
 def detect_encoding():
-    """检测文本编码"""
+    """检测编码
+
+    JSON 请求体: {"text": ...}，文本已是 Unicode，按其 UTF-8 字节检测
+    multipart 的 file 字段或其他请求体（如 application/octet-stream）: 原始字节，
+      只采样开头、中间、末尾三个窗口，
+      ?top= 返回的候选数量（默认 5），?window= 每个窗口的字节数
+    """
+    try:
+        top_n = int(request.args.get('top', DEFAULT_TOP_N))
+        window = int(request.args.get('window', DEFAULT_WINDOW_BYTES))
+        if top_n <= 0 or window <= 0:
+            raise ValueError('top 与 window 必须为正数')
+
+        if request.is_json:
+            data = request.get_json()
+            text = data.get('text', '')
+            
+            if not text:
+                return jsonify({
+                    'success': False,
+                    'error': '文本不能为空'
+                }), 400
+            detected = detect_candidates(text.encode('utf-8'), top_n, window)
+        elif 'file' in request.files:
+            # Werkzeug 已把较大的上传文件暂存到磁盘，可直接 seek 到各窗口
+            spool = request.files['file'].stream
+            spool.seek(0, os.SEEK_END)
+            size = spool.tell()
+            spool.seek(0)
+            if not size:
+                return jsonify({
+                    'success': False,
+                    'error': '没有文件被上传'
+                }), 400
+            detected = detect_candidates_stream(spool, size, top_n, window)
+        else:
+            size = request.content_length
+            body = request.get_data() if size is None else None
+            if not (size if body is None else body):
+                return jsonify({
+                    'success': False,
+                    'error': '请求体不能为空'
+                }), 400
+            if body is not None:
+                detected = detect_candidates(body, top_n, window)
+            else:
+                detected = detect_candidates_stream(request.stream, size, top_n, window)
+        
+        response = {
+            'success': True,
+            'detected_encoding': detected['encoding'],
+            'confidence': detected['confidence'],
+            'language': detected['language'],
+            'detection_tier': detected['tier'],
+            'candidates': detected['candidates'],
+            'size': detected['size'],
+            'bytes_examined': detected['bytes_examined'],
+            'sampled': detected['sampled']
+        }
+        if request.is_json:
+            response['original_text'] = text
+        return jsonify(response)
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# API路由：字节到字节的转码
+@api_app.route('/api/transcode', methods=['POST'])
+def transcode_bytes():
+    """把请求体从源编码转换为目标编码，直接返回二进制
+
+    ?target_encoding= 目标编码（默认 utf-8），?source_encoding= 源编码（缺省时按开头的字节检测），
+    ?errors= strict / replace / ignore / backslashreplace / xmlcharrefreplace（默认 strict）。
+    请求体不超过 TRANSCODE_BUFFER_BYTES 时整体转换，响应带 Content-Length，转换失败返回 400；
+    更大或长度未知的请求体边读边转，以分块传输返回，开头之后的转换错误只能中断连接。
+    实际使用的源编码放在 X-Source-Encoding 响应头中。
+    """
+    try:
+        target_encoding = request.args.get('target_encoding', 'utf-8')
+        source_encoding = request.args.get('source_encoding') or None
+        errors = request.args.get('errors', 'strict')
+        decode_errors, encode_errors = transcode_errors(errors)
+        codecs.lookup(target_encoding)
+        if source_encoding:
+            codecs.lookup(source_encoding)
+
+        size = request.content_length
+        if size is not None and size <= TRANSCODE_BUFFER_BYTES:
+            data = request.get_data()
+            if not source_encoding:
+                source_encoding = detect_scored(data).get('encoding') or 'utf-8'
+            output = codecs.decode(data, source_encoding, decode_errors).encode(target_encoding, encode_errors)
+            response = Response(output, mimetype='application/octet-stream')
+        else:
+            first = request.stream.read(DEFAULT_READ_BYTES)
+            if not source_encoding:
+                source_encoding = detect_scored(first).get('encoding') or 'utf-8'
+            chunks = iter_transcoded_chunks(request.stream, source_encoding, target_encoding, errors, first=first)
+            # 先转换第一块，开头的错误仍能以 400 返回
+            head = next(chunks, b'')
+
+            def generate():
+                yield head
+                yield from chunks
+
+            response = Response(stream_with_context(generate()), mimetype='application/octet-stream')
+        response.headers['X-Source-Encoding'] = source_encoding
+        return response
+
+    except (ValueError, LookupError) as e:
+        # UnicodeError 也是 ValueError 的子类
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# API路由：乱码修复
+@api_app.route('/api/repair', methods=['POST'])
+def repair_mojibake():
+    """修复被错误解码的文本
+
+    JSON 请求体: {"text": ..., "max_depth": 2}，max_depth 为修复链的最大长度（1~3）
+    """
     try:
         data = request.get_json()
         text = data.get('text', '')
-        
+        max_depth = int(data.get('max_depth', DEFAULT_DEPTH))
+
         if not text:
             return jsonify({
                 'success': False,
                 'error': '文本不能为空'
             }), 400
-        
-        # 将文本编码为字节再检测
-        text_bytes = text.encode('utf-8')
-        detected = chardet.detect(text_bytes)
-        
+
+        repaired = repair_text(text, max_depth)
         return jsonify({
             'success': True,
-            'detected_encoding': detected.get('encoding'),
-            'confidence': detected.get('confidence', 0),
-            'language': detected.get('language'),
-            'original_text': text
+            'original_text': text,
+            'repaired_text': repaired['text'],
+            'changed': repaired['changed'],
+            'chain': repaired['chain'],
+            'score': repaired['score'],
+            'original_score': repaired['original_score'],
+            'candidates': repaired['candidates']
         })
-        
+
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -267,28 +558,33 @@ def upload_file():
                 'error': '没有选择文件'
             }), 400
         
-        # 读取文件内容
-        file_content = file.read()
-        
-        # 检测编码
-        detected = chardet.detect(file_content)
-        encoding = detected.get('encoding', 'utf-8')
+        # 以 mmap 读取 Werkzeug 暂存的上传文件并检测编码
+        # （BOM / ASCII / UTF-8 快速判定，必要时调用chardet，拿不准时再试解码），原始字节不读入内存
+        text, detected, size = read_text(file.stream)
+        encoding = detected['encoding']
         confidence = detected.get('confidence', 0)
-        
-        # 解码文本
-        try:
-            text = file_content.decode(encoding, errors='ignore')
-        except (UnicodeDecodeError, LookupError):
-            text = file_content.decode('utf-8', errors='ignore')
-            encoding = 'utf-8'
+
+        # 文本本身可能已是乱码（如 GBK 内容曾被按 latin-1 读出后另存为 UTF-8），给出修复建议
+        repaired = repair_text(text)
+        repair = None
+        if repaired['changed']:
+            repair = {
+                'text': repaired['text'],
+                'chain': repaired['chain'],
+                'score': repaired['score'],
+                'original_score': repaired['original_score']
+            }
         
         return jsonify({
             'success': True,
             'text': text,
             'filename': file.filename,
-            'size': len(file_content),
+            'size': size,
             'detected_encoding': encoding,
             'confidence': confidence,
+            'detection_tier': detected['tier'],
+            'detection_scores': detected.get('scores', []),
+            'repair': repair,
             'stats': {
                 'length': len(text),
                 'lines': text.count('\n') + 1,
@@ -302,6 +598,186 @@ def upload_file():
             'error': str(e)
         }), 500
 
+# API路由：流式文件上传
+@api_app.route('/api/upload/stream', methods=['POST'])
+def upload_file_stream():
+    """流式处理文件上传，按块输出 NDJSON
+
+    支持 multipart 的 file 字段，或直接以请求体上传（文件名由 ?filename= 指定）。
+    ?threshold= 控制增量检测的置信度阈值，达到即停止检测；
+    ?max_detect_bytes= 限制检测最多读取的字节数。
+    """
+    try:
+        threshold = float(request.args.get('threshold', DEFAULT_CONFIDENCE_THRESHOLD))
+        if not 0 < threshold <= 1:
+            raise ValueError('threshold 必须在 (0, 1] 之间')
+        max_detect_bytes = int(request.args.get('max_detect_bytes', DEFAULT_DETECT_MAX_BYTES))
+        if max_detect_bytes <= 0:
+            raise ValueError('max_detect_bytes 必须为正数')
+
+        if 'file' in request.files:
+            file = request.files['file']
+            if file.filename == '':
+                return jsonify({
+                    'success': False,
+                    'error': '没有选择文件'
+                }), 400
+            filename = file.filename
+            # Werkzeug 已把较大的上传文件暂存到磁盘
+            spool = file.stream
+            spool.seek(0, os.SEEK_END)
+            size = spool.tell()
+            spool.seek(0)
+        else:
+            filename = request.args.get('filename', 'upload.txt')
+            spool, size = spool_stream(request.stream)
+
+        if size == 0:
+            spool.close()
+            return jsonify({
+                'success': False,
+                'error': '没有文件被上传'
+            }), 400
+
+        detected = detect_file(spool, threshold=threshold, max_bytes=max_detect_bytes)
+        spool.seek(0)
+        encoding = detected.get('encoding') or 'utf-8'
+        try:
+            codecs.lookup(encoding)
+        except LookupError:
+            encoding = 'utf-8'
+
+        def records():
+            try:
+                yield {
+                    'type': 'start',
+                    'filename': filename,
+                    'size': size,
+                    'detected_encoding': encoding,
+                    'confidence': detected.get('confidence', 0),
+                    'detection_tier': detected['tier'],
+                    'bytes_examined': detected['bytes_examined']
+                }
+                length = 0
+                lines = 0
+                unique_chars = set()
+                for index, text in enumerate(iter_decoded_chunks(spool, encoding, errors='ignore')):
+                    length += len(text)
+                    lines += text.count('\n')
+                    unique_chars.update(text)
+                    yield {
+                        'type': 'text',
+                        'index': index,
+                        'text': text
+                    }
+                yield {
+                    'type': 'end',
+                    'stats': {
+                        'length': length,
+                        'lines': lines + 1,
+                        'unique_chars': len(unique_chars)
+                    }
+                }
+            finally:
+                spool.close()
+
+        return ndjson_response(records())
+
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# API路由：批量文件转换
+@api_app.route('/api/batch', methods=['POST'])
+def create_batch_job():
+    """创建批量转换任务
+
+    multipart 字段: files（可多个）、archive（zip 压缩包）、
+    target_encoding（默认 utf-8）、source_encoding（可选，缺省时自动检测）、errors（默认 strict）
+    """
+    try:
+        uploads = request.files.getlist('files') + request.files.getlist('archive')
+        uploads = [f for f in uploads if f.filename]
+        if not uploads:
+            return jsonify({
+                'success': False,
+                'error': '没有文件被上传'
+            }), 400
+
+        target_encoding = request.form.get('target_encoding', 'utf-8')
+        source_encoding = request.form.get('source_encoding') or None
+        errors = request.form.get('errors', 'strict')
+
+        job_id = batch_manager.create_job(
+            ((f.filename, f.stream) for f in uploads),
+            target_encoding,
+            source_encoding,
+            errors
+        )
+
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status_url': f'/api/batch/{job_id}',
+            'download_url': f'/api/batch/{job_id}/download'
+        }), 202
+
+    except (ValueError, LookupError) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@api_app.route('/api/batch/<job_id>', methods=['GET'])
+def get_batch_job(job_id):
+    """查询批量转换任务状态与每个文件的吞吐量"""
+    status = batch_manager.get_status(job_id)
+    if status is None:
+        return jsonify({
+            'success': False,
+            'error': '任务不存在'
+        }), 404
+
+    return jsonify({
+        'success': True,
+        'job': status
+    })
+
+@api_app.route('/api/batch/<job_id>/download', methods=['GET'])
+def download_batch_job(job_id):
+    """下载批量转换结果（zip）"""
+    status = batch_manager.get_status(job_id)
+    if status is None:
+        return jsonify({
+            'success': False,
+            'error': '任务不存在'
+        }), 404
+    if status['status'] != 'done':
+        return jsonify({
+            'success': False,
+            'error': '任务失败，没有可下载的文件' if status['status'] == 'failed' else '任务尚未完成'
+        }), 409
+
+    archive_path = batch_manager.build_archive(job_id)
+    return send_file(
+        str(archive_path),
+        mimetype='application/zip',
+        as_attachment=True,
+        download_name=f'converted_{job_id}.zip'
+    )
+
 # API路由：健康检查
 @api_app.route('/api/health', methods=['GET'])
 def health_check():
@@ -310,7 +786,9 @@ def health_check():
         'success': True,
         'status': 'healthy',
         'version': '2.0',
-        'supported_encodings_count': len(SUPPORTED_ENCODINGS)
+        'supported_encodings_count': len(SUPPORTED_ENCODINGS),
+        'char_cache': char_cache.stats(),
+        'result_cache': result_cache.stats()
     })
 
 # 错误处理
@@ -334,17 +812,17 @@ def internal_error(error):
 @vue_app.route('/')
 def vue_index():
     """Vue应用主页"""
-    return send_file(str(vue_dist_dir / 'index.html'))
+    return send_static(vue_dist_dir, 'index.html')
 
 @vue_app.route('/<path:filename>')
 def vue_static_files(filename):
-    """Vue应用静态文件"""
-    return send_from_directory(str(vue_dist_dir), filename)
+    """Vue应用静态文件（带哈希的构建产物长期缓存）"""
+    return send_static(vue_dist_dir, filename)
 
 @vue_app.errorhandler(404)
 def vue_not_found(error):
     """Vue应用404错误处理 - SPA路由"""
-    return send_file(str(vue_dist_dir / 'index.html'))
+    return send_static(vue_dist_dir, 'index.html')
 
 # ========================================
 # 原版HTML应用路由 (端口15002)
@@ -357,10 +835,11 @@ def html_index():
 
 @html_app.route('/<path:filename>')
 def html_static_files(filename):
-    """原版HTML应用静态文件"""
-    if filename.endswith(('.css', '.js', '.png', '.jpg', '.ico', '.svg')):
-        return send_from_directory(str(frontend_dir), filename)
-    return render_template('index.html')
+    """原版HTML应用静态文件，文件不存在时返回主页"""
+    try:
+        return send_static(frontend_dir, filename)
+    except NotFound:
+        return render_template('index.html')
 
 @html_app.errorhandler(404)
 def html_not_found(error):
@@ -369,36 +848,143 @@ def html_not_found(error):
 
 def run_api_server():
     """启动API服务器"""
-    print("🔧 API服务器启动中... (端口15000)")
+    print(f"🔧 API服务器启动中... (端口{API_PORT})")
     api_app.run(
         host='0.0.0.0',
-        port=15000,
+        port=API_PORT,
         debug=False,
         threaded=True
     )
 
 def run_vue_server():
     """启动Vue应用服务器"""
-    print("⚡ Vue应用服务器启动中... (端口15001)")
+    print(f"⚡ Vue应用服务器启动中... (端口{VUE_PORT})")
     vue_app.run(
         host='0.0.0.0',
-        port=15001,
+        port=VUE_PORT,
         debug=False,
         threaded=True
     )
 
 def run_html_server():
     """启动原版HTML应用服务器"""
-    print("🌐 原版HTML应用服务器启动中... (端口15002)")
+    print(f"🌐 原版HTML应用服务器启动中... (端口{HTML_PORT})")
     html_app.run(
         host='0.0.0.0',
-        port=15002,
+        port=HTML_PORT,
         debug=False,
         threaded=True
     )
 
+# ========================================
+# 生产模式 (gunicorn 多进程)
+# ========================================
+
+class PortDispatcher:
+    """按监听端口把请求分发给对应的 Flask 应用，使一个 gunicorn 同时服务三个端口"""
+
+    def __init__(self, apps, default):
+        self.apps = {str(port): app for port, app in apps.items()}
+        self.default = default
+
+    def __call__(self, environ, start_response):
+        app = self.apps.get(environ.get('SERVER_PORT'), self.default)
+        return app(environ, start_response)
+
+# 三端口布局下的 WSGI 入口，也可直接交给其他 WSGI 服务器使用
+application = PortDispatcher({
+    API_PORT: api_app,
+    VUE_PORT: vue_app,
+    HTML_PORT: html_app
+}, default=api_app)
+
+def env_int(name, default):
+    """读取整数环境变量"""
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+def run_production_server(workers, threads, keepalive, timeout, graceful_timeout,
+                          max_requests, single_port=False):
+    """使用 gunicorn 多进程 + 多线程运行服务
+
+    向主进程发送 SIGHUP 可平滑重载：旧 worker 处理完当前请求后才退出。
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("❌ 生产模式需要 gunicorn：pip install gunicorn（Windows 请使用开发模式）")
+        sys.exit(1)
+
+    ports = [API_PORT] if single_port else [API_PORT, VUE_PORT, HTML_PORT]
+    options = {
+        'bind': [f'0.0.0.0:{port}' for port in ports],
+        'workers': workers,
+        'threads': threads,
+        'worker_class': 'gthread',
+        'keepalive': keepalive,
+        'timeout': timeout,
+        'graceful_timeout': graceful_timeout,
+        # 定期回收 worker，抖动避免所有 worker 同时重启
+        'max_requests': max_requests,
+        'max_requests_jitter': max(1, max_requests // 10) if max_requests else 0,
+        'accesslog': '-',
+        'errorlog': '-'
+    }
+
+    class StandaloneApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return api_app if single_port else application
+
+    print(f"🏭 生产模式: {workers} 个进程 × {threads} 个线程, keep-alive {keepalive}s")
+    print(f"📡 监听端口: {', '.join(str(port) for port in ports)}")
+    print("💡 平滑重载: kill -HUP <主进程PID>")
+    StandaloneApplication().run()
+
+def parse_args(argv=None):
+    """解析命令行参数，未指定的参数从环境变量读取"""
+    parser = argparse.ArgumentParser(description='字符编码转换器服务')
+    parser.add_argument('--prod', action='store_true',
+                        default=os.environ.get('SERVER_MODE') == 'production',
+                        help='使用 gunicorn 生产模式（也可设置 SERVER_MODE=production）')
+    parser.add_argument('--single-port', action='store_true',
+                        default=os.environ.get('SINGLE_PORT') == '1',
+                        help=f'生产模式下只监听 API 端口 {API_PORT}')
+    parser.add_argument('--workers', type=int,
+                        default=env_int('GUNICORN_WORKERS', (os.cpu_count() or 1) * 2 + 1),
+                        help='worker 进程数')
+    parser.add_argument('--threads', type=int, default=env_int('GUNICORN_THREADS', 4),
+                        help='每个 worker 的线程数')
+    parser.add_argument('--keepalive', type=int, default=env_int('GUNICORN_KEEPALIVE', 5),
+                        help='keep-alive 连接保持秒数')
+    parser.add_argument('--timeout', type=int, default=env_int('GUNICORN_TIMEOUT', 120),
+                        help='worker 无响应超时秒数')
+    parser.add_argument('--graceful-timeout', type=int,
+                        default=env_int('GUNICORN_GRACEFUL_TIMEOUT', 30),
+                        help='平滑重载/停止时等待请求完成的秒数')
+    parser.add_argument('--max-requests', type=int,
+                        default=env_int('GUNICORN_MAX_REQUESTS', 1000),
+                        help='worker 处理多少请求后自动回收（0 表示不回收）')
+    return parser.parse_args(argv)
+
 def main():
     """主函数"""
+    args = parse_args()
+    if args.prod:
+        run_production_server(
+            args.workers,
+            args.threads,
+            args.keepalive,
+            args.timeout,
+            args.graceful_timeout,
+            args.max_requests,
+            single_port=args.single_port
+        )
+        return
+
     print("🚀 启动字符编码转换器 Pro - 多服务模式")
     print("=" * 60)
     print("📡 正在启动多个服务器...")
@@ -84,6 +84,7 @@ RUN pip install --upgrade pip && \
     pip install --no-index --find-links ./wheels -r requirements.txt
 
 # 复制应用代码
+COPY encoding_converter/ ./encoding_converter/
 COPY backend/ ./backend/
 COPY frontend/ ./frontend/
 
@@ -93,6 +94,12 @@ COPY frontend-vue/dist/ ./frontend-vue/dist/
 # 复制全局配置
 COPY config.js ./
 
+# 为静态资源生成预压缩文件（.gz，安装了 brotli 时还会生成 .br）
+RUN python -m encoding_converter.static_assets frontend frontend-vue/dist
+
+# 预编译编码查找表（缺少 numpy 或生成失败时构建失败）
+RUN python -m encoding_converter.build_tables
+
 # 清理wheels目录以减小镜像大小
 RUN rm -rf ./wheels
 
@@ -100,6 +107,8 @@ RUN rm -rf ./wheels
 ENV PYTHONPATH=/app
 ENV FLASK_APP=backend/app.py
 ENV FLASK_ENV=production
+# 使用 gunicorn 多进程生产模式（设为 development 恢复三个开发服务器线程）
+ENV SERVER_MODE=production
 
 # 暴露端口
 EXPOSE 15000 15001 15002
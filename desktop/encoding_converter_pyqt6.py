@@ -1,9 +1,7 @@
 import sys
 import os
 import json
-import chardet
-import base64
-import unicodedata
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
 
@@ -11,6 +9,19 @@ from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
 
+# 将项目根目录加入模块搜索路径，以便导入共享的转换引擎
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from encoding_converter import (
+    ConversionCancelled, IncrementalConversion, char_cache, char_name, read_text, text_change
+)
+from encoding_converter.hexdump import (
+    ASCII_COLUMN, BYTES_PER_ROW, byte_column, find_bytes, format_row, parse_hex_bytes,
+    parse_offset, row_count
+)
+
+# 改动字符数不超过该值时在界面线程中增量更新，否则交给后台线程整体重算
+INCREMENTAL_LIMIT = 5000
+
 class ModernButton(QPushButton):
     """现代化按钮组件"""
     def __init__(self, text="", icon=None, primary=False):
@@ -81,92 +92,322 @@ class ModernCard(QFrame):
             }
         """)
 
-class CharacterCard(ModernCard):
-    """字符卡片组件"""
-    def __init__(self, char_data):
-        super().__init__()
-        self.char_data = char_data
-        self.setup_ui()
+def apply_text_change(model, position, removed, added, text):
+    """对以 model.text 为行的模型执行一次编辑：先删除 removed 行，再插入 added 行"""
+    if removed:
+        model.beginRemoveRows(QModelIndex(), position, position + removed - 1)
+        model.text = text[:position] + text[position + added:]
+        model.endRemoveRows()
+    if added:
+        model.beginInsertRows(QModelIndex(), position, position + added - 1)
+        model.text = text
+        model.endInsertRows()
+    model.text = text
+
+class CharacterListModel(QAbstractListModel):
+    """字符网格的惰性模型：只保存文本，视图请求某个格子时才查询编码明细"""
+    CharDataRole = Qt.ItemDataRole.UserRole + 1
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.text = ""
+        self.encodings = []
+        
+    def set_text(self, text, encodings):
+        self.beginResetModel()
+        self.text = text
+        self.encodings = list(encodings)
+        self.endResetModel()
+        
+    def clear(self):
+        self.set_text("", [])
+        
+    def apply_change(self, position, removed, added, text):
+        """按编辑增删行，text 为编辑后的完整文本"""
+        apply_text_change(self, position, removed, added, text)
+        
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.text)
+        
+    def char_data(self, row):
+        """组装单个字符的明细，编码结果来自共享缓存"""
+        char = self.text[row]
+        return {
+            'char': char,
+            'unicode': f'U+{ord(char):04X}',
+            'unicode_name': char_name(char),
+            'position': row,
+            'encodings': {enc: char_cache.lookup(char, enc)[1] for enc in self.encodings}
+        }
         
-    def setup_ui(self):
-        layout = QVBoxLayout(self)
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.text):
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.text[index.row()]
+        if role == self.CharDataRole:
+            return self.char_data(index.row())
+        return None
+
+class CharacterTableModel(QAbstractTableModel):
+    """表格视图的惰性模型：Qt 请求 data() 时才计算该行，结果放入有界行缓存"""
+    ROW_CACHE_SIZE = 4096
+    FIXED_HEADERS = ['字符', 'Unicode', '名称']
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.text = ""
+        self.encodings = []
+        self.rows = OrderedDict()
+        self.char_font = QFont('Arial', 16, QFont.Weight.Bold)
+        self.hex_font = QFont('Courier New', 10)
+        
+    def set_text(self, text, encodings):
+        self.beginResetModel()
+        self.text = text
+        self.encodings = list(encodings)
+        self.rows.clear()
+        self.endResetModel()
+        
+    def clear(self):
+        self.set_text("", [])
+        
+    def apply_change(self, position, removed, added, text):
+        """按编辑增删行，编辑位置之后的缓存行失效"""
+        self.rows = OrderedDict((row, values) for row, values in self.rows.items() if row < position)
+        apply_text_change(self, position, removed, added, text)
+        
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.text)
+        
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.FIXED_HEADERS) + len(self.encodings)
+        
+    def row_values(self, row):
+        """返回一行的显示文本，最近使用的行保存在缓存中"""
+        values = self.rows.get(row)
+        if values is not None:
+            self.rows.move_to_end(row)
+            return values
+            
+        char = self.text[row]
+        values = [char, f'U+{ord(char):04X}', char_name(char)]
+        for encoding in self.encodings:
+            result = char_cache.lookup(char, encoding)[1]
+            values.append(result['hex'] if result.get('success') else 'N/A')
+        self.rows[row] = values
+        if len(self.rows) > self.ROW_CACHE_SIZE:
+            self.rows.popitem(last=False)
+        return values
+        
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.text):
+            return None
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.row_values(index.row())[column]
+        if role == Qt.ItemDataRole.FontRole:
+            if column == 0:
+                return self.char_font
+            if column >= len(self.FIXED_HEADERS):
+                return self.hex_font
+        if role == Qt.ItemDataRole.TextAlignmentRole and column == 0:
+            return Qt.AlignmentFlag.AlignCenter
+        return None
         
-        # 字符显示
-        char_label = QLabel(self.char_data['char'])
-        char_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        char_label.setStyleSheet("""
-            QLabel {
-                font-size: 36px;
-                font-weight: bold;
-                color: #667eea;
-                margin: 8px;
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Vertical:
+            return section + 1
+        headers = self.FIXED_HEADERS + [enc.upper() for enc in self.encodings]
+        return headers[section] if section < len(headers) else None
+        
+    def sample_rows(self, count):
+        """在整段文本中均匀抽取若干行，用于估算列宽"""
+        total = len(self.text)
+        step = max(1, total // count)
+        return range(0, total, step)
+
+class CharacterDelegate(QStyledItemDelegate):
+    """绘制字符卡片，代替每个字符一个 QFrame 的做法"""
+    CARD_SIZE = QSize(180, 200)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.char_font = QFont('Arial', 26, QFont.Weight.Bold)
+        self.unicode_font = QFont('Arial', 9)
+        self.name_font = QFont('Arial', 7)
+        self.label_font = QFont('Arial', 7, QFont.Weight.Medium)
+        self.hex_font = QFont('Courier New', 8)
+        
+    def sizeHint(self, option, index):
+        return self.CARD_SIZE
+        
+    def paint(self, painter, option, index):
+        char_data = index.data(CharacterListModel.CharDataRole)
+        if char_data is None:
+            return
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        
+        # 卡片背景
+        rect = QRectF(option.rect.adjusted(4, 4, -4, -4))
+        highlighted = option.state & (QStyle.StateFlag.State_MouseOver | QStyle.StateFlag.State_Selected)
+        painter.setPen(QPen(QColor('#667eea' if highlighted else '#e2e8f0'), 1))
+        painter.setBrush(QColor('white'))
+        painter.drawRoundedRect(rect, 12, 12)
+        
+        inner = rect.adjusted(10, 6, -10, -6)
+        y = inner.top()
+        
+        # 字符
+        painter.setFont(self.char_font)
+        painter.setPen(QColor('#667eea'))
+        painter.drawText(QRectF(inner.left(), y, inner.width(), 48), Qt.AlignmentFlag.AlignCenter, char_data['char'])
+        y += 48
+        
+        # Unicode 信息与名称
+        painter.setFont(self.unicode_font)
+        painter.setPen(QColor('#718096'))
+        painter.drawText(QRectF(inner.left(), y, inner.width(), 18), Qt.AlignmentFlag.AlignCenter,
+                         f"Unicode: {char_data['unicode']}")
+        y += 18
+        painter.setFont(self.name_font)
+        painter.setPen(QColor('#a0aec0'))
+        name = QFontMetrics(self.name_font).elidedText(char_data['unicode_name'], Qt.TextElideMode.ElideRight, int(inner.width()))
+        painter.drawText(QRectF(inner.left(), y, inner.width(), 16), Qt.AlignmentFlag.AlignCenter, name)
+        y += 20
+        
+        # 编码结果：放不下的行省略
+        row_height = 18
+        for encoding, result in char_data['encodings'].items():
+            if not result.get('success'):
+                continue
+            if y + row_height > inner.bottom():
+                break
+            row = QRectF(inner.left(), y, inner.width(), row_height - 2)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor('#f7fafc'))
+            painter.drawRoundedRect(row, 4, 4)
+            text_rect = row.adjusted(6, 0, -6, 0)
+            painter.setFont(self.label_font)
+            painter.setPen(QColor('#4a5568'))
+            painter.drawText(text_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, encoding.upper())
+            painter.setFont(self.hex_font)
+            painter.setPen(QColor('#2d3748'))
+            painter.drawText(text_rect, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, result['hex'])
+            y += row_height
+            
+        painter.restore()
+
+class HexView(QAbstractScrollArea):
+    """十六进制查看器：滚动条按行计，只绘制可见的行"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.data = b''
+        self.highlight = None  # (起始偏移, 长度)
+        # 列位置按字符宽度计算，必须使用等宽字体
+        self.hex_font = QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont)
+        self.hex_font.setPointSize(10)
+        self.metrics = QFontMetricsF(self.hex_font)
+        self.setStyleSheet("""
+            QAbstractScrollArea {
+                border: 1px solid #e2e8f0;
+                border-radius: 8px;
+                background: #f8fafc;
             }
         """)
-        layout.addWidget(char_label)
-        
-        # Unicode 信息
-        unicode_label = QLabel(f"Unicode: {self.char_data['unicode']}")
-        unicode_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        unicode_label.setStyleSheet("color: #718096; font-size: 12px;")
-        layout.addWidget(unicode_label)
-        
-        # Unicode 名称
-        if self.char_data.get('unicode_name'):
-            name_label = QLabel(self.char_data['unicode_name'])
-            name_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            name_label.setWordWrap(True)
-            name_label.setStyleSheet("color: #a0aec0; font-size: 10px;")
-            layout.addWidget(name_label)
-        
-        # 编码结果
-        encodings_widget = QWidget()
-        encodings_layout = QVBoxLayout(encodings_widget)
-        encodings_layout.setContentsMargins(0, 8, 0, 0)
-        
-        for encoding, result in self.char_data.get('encodings', {}).items():
-            if result.get('success'):
-                encoding_frame = QFrame()
-                encoding_frame.setStyleSheet("""
-                    QFrame {
-                        background: #f7fafc;
-                        border-radius: 4px;
-                        padding: 4px;
-                        margin: 1px;
-                    }
-                """)
-                encoding_layout_h = QHBoxLayout(encoding_frame)
-                encoding_layout_h.setContentsMargins(8, 4, 8, 4)
-                
-                name_label = QLabel(encoding.upper())
-                name_label.setStyleSheet("color: #4a5568; font-weight: 500; font-size: 10px;")
-                
-                value_label = QLabel(result['hex'])
-                value_label.setStyleSheet("color: #2d3748; font-family: 'Courier New'; font-size: 10px;")
-                
-                encoding_layout_h.addWidget(name_label)
-                encoding_layout_h.addStretch()
-                encoding_layout_h.addWidget(value_label)
-                
-                encodings_layout.addWidget(encoding_frame)
-        
-        layout.addWidget(encodings_widget)
         
-        # 点击复制功能
-        self.setCursor(Qt.CursorShape.PointingHandCursor)
-        self.mousePressEvent = self.copy_data
-    
-    def copy_data(self, event):
-        copy_text = f"字符: {self.char_data['char']}\n"
-        copy_text += f"Unicode: {self.char_data['unicode']}\n"
-        if self.char_data.get('unicode_name'):
-            copy_text += f"名称: {self.char_data['unicode_name']}\n"
-        
-        for encoding, result in self.char_data.get('encodings', {}).items():
-            if result.get('success'):
-                copy_text += f"{encoding.upper()}: {result['hex']}\n"
-        
-        QApplication.clipboard().setText(copy_text)
-        QToolTip.showText(self.mapToGlobal(event.pos()), "已复制到剪贴板!", self)
+    def set_data(self, data):
+        self.data = data
+        self.highlight = None
+        self.update_scrollbar()
+        self.viewport().update()
+        
+    def visible_rows(self):
+        return max(1, int(self.viewport().height() // self.metrics.lineSpacing()))
+        
+    def update_scrollbar(self):
+        bar = self.verticalScrollBar()
+        bar.setRange(0, max(0, row_count(len(self.data)) - self.visible_rows()))
+        bar.setPageStep(self.visible_rows())
+        
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scrollbar()
+        
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+        
+    def show_range(self, offset, length=1):
+        """滚动到 offset 所在的行（居中）并高亮 length 个字节"""
+        self.highlight = (offset, length)
+        row = offset // BYTES_PER_ROW
+        self.verticalScrollBar().setValue(row - self.visible_rows() // 2)
+        self.viewport().update()
+        
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.setFont(self.hex_font)
+        painter.setPen(QColor('#2d3748'))
+        line_height = self.metrics.lineSpacing()
+        char_width = self.metrics.horizontalAdvance('0')
+        first = self.verticalScrollBar().value()
+        last = min(first + self.visible_rows() + 1, row_count(len(self.data)))
+        
+        for i, row in enumerate(range(first, last)):
+            y = i * line_height
+            if self.highlight is not None:
+                self.paint_highlight(painter, row, y, char_width, line_height)
+            painter.drawText(QPointF(8, y + self.metrics.ascent()), format_row(self.data, row))
+            
+    def paint_highlight(self, painter, row, y, char_width, line_height):
+        """为当前行中被高亮的字节绘制背景"""
+        start, length = self.highlight
+        row_start = row * BYTES_PER_ROW
+        for index in range(max(start, row_start) - row_start, min(start + length, row_start + BYTES_PER_ROW) - row_start):
+            for column, width in ((byte_column(index), 2), (ASCII_COLUMN + index, 1)):
+                painter.fillRect(QRectF(8 + column * char_width, y, width * char_width, line_height), QColor('#c3dafe'))
+
+class ConversionSignals(QObject):
+    """转换任务的信号（QRunnable 不是 QObject，信号需单独定义）"""
+    progress = pyqtSignal(int, int)      # 任务编号, 百分比
+    finished = pyqtSignal(int, object)   # 任务编号, IncrementalConversion
+    failed = pyqtSignal(int, str)        # 任务编号, 错误信息
+
+class ConversionWorker(QRunnable):
+    """在线程池中执行编码转换，可被更新的编辑取消"""
+    def __init__(self, job_id, text, encodings):
+        super().__init__()
+        self.job_id = job_id
+        self.text = text
+        self.encodings = encodings
+        self.signals = ConversionSignals()
+        self._cancelled = False
+        self._last_percent = -1
+        
+    def cancel(self):
+        self._cancelled = True
+        
+    def report_progress(self, done, total):
+        if self._cancelled:
+            raise ConversionCancelled()
+        percent = done * 100 // total if total else 100
+        if percent != self._last_percent:
+            self._last_percent = percent
+            self.signals.progress.emit(self.job_id, percent)
+            
+    def run(self):
+        try:
+            conversion = IncrementalConversion(self.text, self.encodings, progress=self.report_progress)
+        except ConversionCancelled:
+            return
+        except Exception as e:
+            self.signals.failed.emit(self.job_id, str(e))
+            return
+        if not self._cancelled:
+            self.signals.finished.emit(self.job_id, conversion)
 
 class EncodingConverter(QMainWindow):
     """主应用窗口"""
@@ -176,6 +417,22 @@ class EncodingConverter(QMainWindow):
         self.current_text = ""
         self.selected_encodings = {'utf-8', 'utf-16', 'gbk', 'ascii'}
         self.conversion_results = None
+        # 当前结果对应的增量转换状态，小范围编辑直接在其上打补丁
+        self.conversion = IncrementalConversion()
+        self.raw_view_dirty = False
+        
+        # 后台转换：每次只保留最新的任务，旧任务会被取消
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(2)
+        self.current_job = None
+        self.job_counter = 0
+        
+        # 防抖定时器：连续输入时不断重启，停止输入 500ms 后才转换
+        self.convert_timer = QTimer(self)
+        self.convert_timer.setSingleShot(True)
+        self.convert_timer.setInterval(500)
+        self.convert_timer.timeout.connect(self.convert_text)
+        
         self.setup_ui()
         self.setup_style()
         
@@ -511,26 +768,38 @@ class EncodingConverter(QMainWindow):
         # 结果显示区域
         self.results_stack = QStackedWidget()
         
-        # 字符视图
-        self.char_scroll = QScrollArea()
-        self.char_scroll.setWidgetResizable(True)
-        self.char_scroll.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
-        self.char_scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
-        
-        self.char_container = QWidget()
-        self.char_layout = FlowLayout(self.char_container)
-        self.char_scroll.setWidget(self.char_container)
+        # 字符视图：只绘制可见的格子，百万字符也能流畅滚动
+        self.char_model = CharacterListModel(self)
+        self.char_view = QListView()
+        self.char_view.setViewMode(QListView.ViewMode.IconMode)
+        self.char_view.setMovement(QListView.Movement.Static)
+        self.char_view.setResizeMode(QListView.ResizeMode.Adjust)
+        self.char_view.setUniformItemSizes(True)
+        self.char_view.setGridSize(CharacterDelegate.CARD_SIZE + QSize(8, 8))
+        self.char_view.setLayoutMode(QListView.LayoutMode.Batched)
+        self.char_view.setBatchSize(1000)
+        self.char_view.setMouseTracking(True)
+        self.char_view.setItemDelegate(CharacterDelegate(self.char_view))
+        self.char_view.setModel(self.char_model)
+        self.char_view.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.char_view.clicked.connect(self.copy_character)
+        self.char_view.setStyleSheet("QListView { border: none; background: transparent; }")
         
         # 表格视图
-        self.table_view = QTableWidget()
+        self.table_model = CharacterTableModel(self)
+        self.table_view = QTableView()
+        self.table_view.setModel(self.table_model)
+        # 固定行高，避免逐行测量
+        self.table_view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.table_view.verticalHeader().setDefaultSectionSize(36)
         self.table_view.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 border: 1px solid #e2e8f0;
                 border-radius: 8px;
                 background: white;
                 gridline-color: #f1f5f9;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
                 border-bottom: 1px solid #f1f5f9;
             }
@@ -543,23 +812,44 @@ class EncodingConverter(QMainWindow):
             }
         """)
         
-        # 原始数据视图
-        self.raw_view = QTextEdit()
-        self.raw_view.setReadOnly(True)
-        self.raw_view.setStyleSheet("""
-            QTextEdit {
-                border: 1px solid #e2e8f0;
-                border-radius: 8px;
-                padding: 12px;
-                font-family: 'Courier New', monospace;
-                font-size: 12px;
-                background: #f8fafc;
-            }
-        """)
-        
-        self.results_stack.addWidget(self.char_scroll)
+        # 原始数据视图：整体编码字节的分页十六进制查看器
+        raw_page = QWidget()
+        raw_layout = QVBoxLayout(raw_page)
+        raw_layout.setContentsMargins(0, 0, 0, 0)
+        
+        self.raw_summary = QLabel()
+        self.raw_summary.setWordWrap(True)
+        self.raw_summary.setStyleSheet("color: #4a5568; font-size: 12px;")
+        raw_layout.addWidget(self.raw_summary)
+        
+        hex_toolbar = QHBoxLayout()
+        self.hex_encoding = QComboBox()
+        self.hex_encoding.currentTextChanged.connect(self.show_hex)
+        self.offset_input = QLineEdit()
+        self.offset_input.setPlaceholderText("偏移，如 0x1F0 或 496")
+        self.offset_input.returnPressed.connect(self.jump_to_offset)
+        jump_btn = ModernButton("跳转")
+        jump_btn.clicked.connect(self.jump_to_offset)
+        self.find_input = QLineEdit()
+        self.find_input.setPlaceholderText("查找字节，如 E4 BD A0")
+        self.find_input.returnPressed.connect(self.find_next_bytes)
+        find_btn = ModernButton("查找下一个")
+        find_btn.clicked.connect(self.find_next_bytes)
+        
+        hex_toolbar.addWidget(QLabel("编码:"))
+        hex_toolbar.addWidget(self.hex_encoding)
+        hex_toolbar.addWidget(self.offset_input)
+        hex_toolbar.addWidget(jump_btn)
+        hex_toolbar.addWidget(self.find_input)
+        hex_toolbar.addWidget(find_btn)
+        raw_layout.addLayout(hex_toolbar)
+        
+        self.hex_view = HexView()
+        raw_layout.addWidget(self.hex_view)
+        
+        self.results_stack.addWidget(self.char_view)
         self.results_stack.addWidget(self.table_view)
-        self.results_stack.addWidget(self.raw_view)
+        self.results_stack.addWidget(raw_page)
         
         layout.addWidget(self.results_stack)
         
@@ -611,6 +901,11 @@ class EncodingConverter(QMainWindow):
         
     def setup_statusbar(self):
         """设置状态栏"""
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setMaximumWidth(200)
+        self.progress_bar.setVisible(False)
+        self.statusBar().addPermanentWidget(self.progress_bar)
         self.statusBar().showMessage("就绪")
         
     def setup_style(self):
@@ -651,96 +946,75 @@ class EncodingConverter(QMainWindow):
         self.char_counter.setText(f"{len(self.current_text)} 字符")
         
         if self.current_text.strip():
-            QTimer.singleShot(500, self.convert_text)  # 防抖
+            self.cancel_conversion()
+            self.convert_timer.start()  # 防抖
         else:
             self.clear_results()
             
     def convert_text(self):
-        """转换文本"""
+        """转换文本：小范围编辑增量更新，其余情况在后台线程中整体转换"""
+        self.convert_timer.stop()
+        self.cancel_conversion()
         if not self.current_text.strip() or not self.selected_encodings:
             return
             
-        self.statusBar().showMessage("正在转换...")
+        if set(self.conversion.encodings) == self.selected_encodings:
+            position, removed, added = text_change(self.conversion.text, self.current_text)
+            if removed + len(added) <= INCREMENTAL_LIMIT:
+                self.conversion.apply_change(position, removed, added)
+                self.update_ui(change=(position, removed, len(added)))
+                self.statusBar().showMessage("转换完成")
+                return
+                
+        self.job_counter += 1
+        worker = ConversionWorker(self.job_counter, self.current_text, list(self.selected_encodings))
+        worker.signals.progress.connect(self.on_conversion_progress)
+        worker.signals.finished.connect(self.on_conversion_finished)
+        worker.signals.failed.connect(self.on_conversion_failed)
+        self.current_job = worker
         
-        try:
-            # 模拟编码转换逻辑
-            results = self.perform_conversion(self.current_text)
-            self.conversion_results = results
-            self.update_ui()
-            self.statusBar().showMessage("转换完成")
-            
-        except Exception as e:
-            self.statusBar().showMessage(f"转换失败: {str(e)}")
+        self.statusBar().showMessage("正在转换...")
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.thread_pool.start(worker)
+        
+    def cancel_conversion(self):
+        """取消正在进行的转换"""
+        if self.current_job is not None:
+            self.current_job.cancel()
+            self.current_job = None
+            self.progress_bar.setVisible(False)
             
-    def perform_conversion(self, text):
-        """执行编码转换"""
-        results = {
-            'characters': [],
-            'overall': {},
-            'stats': {
-                'length': len(text),
-                'unique_chars': len(set(text))
-            }
-        }
+    def is_current_job(self, job_id):
+        return self.current_job is not None and self.current_job.job_id == job_id
         
-        # 为每个字符生成编码信息
-        for i, char in enumerate(text):
-            char_info = {
-                'char': char,
-                'unicode': f'U+{ord(char):04X}',
-                'unicode_name': '',
-                'position': i,
-                'encodings': {}
-            }
+    def on_conversion_progress(self, job_id, percent):
+        """转换进度"""
+        if self.is_current_job(job_id):
+            self.progress_bar.setValue(percent)
             
-            # 获取Unicode名称
-            try:
-                char_info['unicode_name'] = unicodedata.name(char, 'UNKNOWN')
-            except:
-                pass
-                
-            # 为每种编码生成信息
-            for encoding in self.selected_encodings:
-                try:
-                    encoded = char.encode(encoding)
-                    char_info['encodings'][encoding] = {
-                        'success': True,
-                        'hex': encoded.hex().upper(),
-                        'bytes': list(encoded),
-                        'base64': base64.b64encode(encoded).decode('ascii'),
-                        'length': len(encoded)
-                    }
-                except:
-                    char_info['encodings'][encoding] = {
-                        'success': False,
-                        'error': 'Encoding failed'
-                    }
-                    
-            results['characters'].append(char_info)
-            
-        # 整体文本编码
-        for encoding in self.selected_encodings:
-            try:
-                encoded = text.encode(encoding)
-                results['overall'][encoding] = {
-                    'success': True,
-                    'hex': encoded.hex().upper(),
-                    'bytes': list(encoded),
-                    'base64': base64.b64encode(encoded).decode('ascii'),
-                    'length': len(encoded)
-                }
-            except:
-                results['overall'][encoding] = {
-                    'success': False,
-                    'error': 'Encoding failed'
-                }
-                
-        return results
+    def on_conversion_finished(self, job_id, conversion):
+        """转换完成（过期任务的结果直接丢弃）"""
+        if not self.is_current_job(job_id):
+            return
+        self.current_job = None
+        self.progress_bar.setVisible(False)
         
-    def update_ui(self):
-        """更新UI显示"""
-        if not self.conversion_results:
+        self.conversion = conversion
+        self.update_ui()
+        self.statusBar().showMessage("转换完成")
+        
+    def on_conversion_failed(self, job_id, error):
+        """转换失败"""
+        if not self.is_current_job(job_id):
             return
+        self.current_job = None
+        self.progress_bar.setVisible(False)
+        self.statusBar().showMessage(f"转换失败: {error}")
+        
+    def update_ui(self, change=None):
+        """更新UI显示；change 为 (position, removed, added) 时只增删改动的行"""
+        self.conversion_results = self.conversion.summary()
             
         # 更新统计信息
         stats = self.conversion_results['stats']
@@ -753,104 +1027,157 @@ class EncodingConverter(QMainWindow):
             self.stats_labels['byte_count'].setText(str(utf8_result['length']))
             
         # 更新不同视图
-        self.update_character_view()
-        self.update_table_view()
-        self.update_raw_view()
+        if change is None:
+            self.update_character_view()
+            self.update_table_view()
+        else:
+            self.char_model.apply_change(*change, self.conversion.text)
+            self.table_model.apply_change(*change, self.conversion.text)
+            
+        # 原始数据需要完整结果，只在可见时重新生成
+        self.raw_view_dirty = True
+        if self.results_stack.currentIndex() == 2:
+            self.update_raw_view()
         
     def update_character_view(self):
         """更新字符视图"""
-        # 清空现有内容
-        while self.char_layout.count():
-            child = self.char_layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
-                
-        # 添加新的字符卡片
-        for char_data in self.conversion_results['characters']:
-            card = CharacterCard(char_data)
-            card.setFixedSize(180, 200)
-            self.char_layout.addWidget(card)
-            
+        self.char_model.set_text(self.conversion.text, self.conversion.encodings)
+        
+    def copy_character(self, index):
+        """点击字符卡片时复制该字符的编码信息"""
+        char_data = index.data(CharacterListModel.CharDataRole)
+        copy_text = f"字符: {char_data['char']}\n"
+        copy_text += f"Unicode: {char_data['unicode']}\n"
+        if char_data.get('unicode_name'):
+            copy_text += f"名称: {char_data['unicode_name']}\n"
+        
+        for encoding, result in char_data['encodings'].items():
+            if result.get('success'):
+                copy_text += f"{encoding.upper()}: {result['hex']}\n"
+        
+        QApplication.clipboard().setText(copy_text)
+        rect = self.char_view.visualRect(index)
+        QToolTip.showText(self.char_view.viewport().mapToGlobal(rect.center()), "已复制到剪贴板!", self.char_view)
+        
     def update_table_view(self):
         """更新表格视图"""
         if not self.conversion_results:
             return
             
-        characters = self.conversion_results['characters']
-        if not characters:
-            return
-            
-        # 设置表格结构
-        encodings = list(self.selected_encodings)
-        self.table_view.setRowCount(len(characters))
-        self.table_view.setColumnCount(3 + len(encodings))
-        
-        headers = ['字符', 'Unicode', '名称'] + [enc.upper() for enc in encodings]
-        self.table_view.setHorizontalHeaderLabels(headers)
-        
-        # 填充数据
-        for row, char_data in enumerate(characters):
-            # 字符
-            char_item = QTableWidgetItem(char_data['char'])
-            char_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            char_item.setFont(QFont('Arial', 16, QFont.Weight.Bold))
-            self.table_view.setItem(row, 0, char_item)
-            
-            # Unicode
-            unicode_item = QTableWidgetItem(char_data['unicode'])
-            self.table_view.setItem(row, 1, unicode_item)
-            
-            # 名称
-            name_item = QTableWidgetItem(char_data.get('unicode_name', ''))
-            self.table_view.setItem(row, 2, name_item)
-            
-            # 编码结果
-            for col, encoding in enumerate(encodings):
-                result = char_data['encodings'].get(encoding, {})
-                if result.get('success'):
-                    value = result['hex']
-                else:
-                    value = 'N/A'
-                
-                encoding_item = QTableWidgetItem(value)
-                encoding_item.setFont(QFont('Courier New', 10))
-                self.table_view.setItem(row, 3 + col, encoding_item)
-                
-        # 调整列宽
-        self.table_view.resizeColumnsToContents()
+        self.table_model.set_text(self.conversion.text, self.conversion.encodings)
+        self.resize_table_columns()
+        
+    def resize_table_columns(self, sample_size=200, max_width=360):
+        """按抽样行估算列宽，代替测量所有单元格的 resizeColumnsToContents"""
+        model = self.table_model
+        header = self.table_view.horizontalHeader()
+        header_metrics = QFontMetrics(header.font())
+        default_metrics = QFontMetrics(self.table_view.font())
+        char_metrics = QFontMetrics(model.char_font)
+        hex_metrics = QFontMetrics(model.hex_font)
+        
+        rows = [model.row_values(row) for row in model.sample_rows(sample_size)]
+        for column in range(model.columnCount()):
+            if column == 0:
+                metrics = char_metrics
+            elif column >= len(model.FIXED_HEADERS):
+                metrics = hex_metrics
+            else:
+                metrics = default_metrics
+            width = header_metrics.horizontalAdvance(str(model.headerData(column, Qt.Orientation.Horizontal)))
+            for values in rows:
+                width = max(width, metrics.horizontalAdvance(values[column]))
+            self.table_view.setColumnWidth(column, min(width + 24, max_width))
         
     def update_raw_view(self):
-        """更新原始数据视图"""
+        """更新原始数据视图：摘要信息 + 当前编码的十六进制查看器"""
         if not self.conversion_results:
             return
             
-        content = f"文本: \"{self.current_text}\"\n"
-        content += f"字符数: {self.conversion_results['stats']['length']}\n"
-        content += f"唯一字符: {self.conversion_results['stats']['unique_chars']}\n\n"
-        
-        content += "=== 整体编码结果 ===\n"
+        self.raw_view_dirty = False
+        stats = self.conversion_results['stats']
+        parts = [f"字符数: {stats['length']}", f"唯一字符: {stats['unique_chars']}"]
         for encoding, result in self.conversion_results['overall'].items():
+            size = f"{result['length']} 字节" if result.get('success') else "编码失败"
+            parts.append(f"{encoding.upper()}: {size}")
+        self.raw_summary.setText("    ".join(parts))
+        
+        # 刷新编码列表，尽量保持当前选择
+        current = self.hex_encoding.currentText()
+        self.hex_encoding.blockSignals(True)
+        self.hex_encoding.clear()
+        self.hex_encoding.addItems(self.conversion.encodings)
+        if current in self.conversion.encodings:
+            self.hex_encoding.setCurrentText(current)
+        self.hex_encoding.blockSignals(False)
+        self.show_hex(self.hex_encoding.currentText())
+        
+    def show_hex(self, encoding):
+        """在十六进制查看器中显示某种编码的整体字节"""
+        if encoding not in self.conversion.encodings:
+            self.hex_view.set_data(b'')
+            return
+        self.hex_view.set_data(self.conversion.encoded(encoding))
+        if not self.conversion.overall(encoding)['success']:
+            self.statusBar().showMessage(f"{encoding.upper()} 无法编码全部字符，已用替换字符显示", 3000)
+            
+    def jump_to_offset(self):
+        """跳转到指定字节偏移"""
+        try:
+            offset = parse_offset(self.offset_input.text())
+        except ValueError:
+            self.statusBar().showMessage("无效的偏移", 2000)
+            return
+        if offset >= len(self.hex_view.data):
+            self.statusBar().showMessage(f"偏移超出范围（共 {len(self.hex_view.data)} 字节）", 2000)
+            return
+        self.hex_view.show_range(offset)
+        
+    def find_next_bytes(self):
+        """从当前高亮位置之后查找字节序列"""
+        try:
+            pattern = parse_hex_bytes(self.find_input.text())
+        except ValueError:
+            self.statusBar().showMessage("请输入十六进制字节，如 E4 BD A0", 2000)
+            return
+        start = self.hex_view.highlight[0] + 1 if self.hex_view.highlight else 0
+        position = find_bytes(self.hex_view.data, pattern, start)
+        if position < 0:
+            self.statusBar().showMessage("未找到", 2000)
+            return
+        self.hex_view.show_range(position, len(pattern))
+        self.statusBar().showMessage(f"找到于偏移 0x{position:X} ({position})", 3000)
+        
+    def iter_report_lines(self):
+        """逐行生成完整的文本报告，用于复制与导出"""
+        results = self.conversion.results()
+        yield f"文本: \"{self.conversion.text}\"\n"
+        yield f"字符数: {results['stats']['length']}\n"
+        yield f"唯一字符: {results['stats']['unique_chars']}\n\n"
+        
+        yield "=== 整体编码结果 ===\n"
+        for encoding, result in results['overall'].items():
             if result.get('success'):
-                content += f"{encoding.upper()}: {result['hex']}\n"
+                yield f"{encoding.upper()}: {result['hex']}\n"
             else:
-                content += f"{encoding.upper()}: 编码失败\n"
+                yield f"{encoding.upper()}: 编码失败\n"
                 
-        content += "\n=== 字符详情 ===\n"
-        for char_data in self.conversion_results['characters']:
-            content += f"\n字符: {char_data['char']}\n"
-            content += f"Unicode: {char_data['unicode']}\n"
+        yield "\n=== 字符详情 ===\n"
+        for char_data in results['characters']:
+            yield f"\n字符: {char_data['char']}\n"
+            yield f"Unicode: {char_data['unicode']}\n"
             if char_data.get('unicode_name'):
-                content += f"名称: {char_data['unicode_name']}\n"
+                yield f"名称: {char_data['unicode_name']}\n"
                 
             for encoding, result in char_data['encodings'].items():
                 if result.get('success'):
-                    content += f"  {encoding.upper()}: {result['hex']}\n"
-                    
-        self.raw_view.setPlainText(content)
+                    yield f"  {encoding.upper()}: {result['hex']}\n"
         
     def switch_view(self, index):
         """切换视图"""
         self.results_stack.setCurrentIndex(index)
+        if index == 2 and self.raw_view_dirty:
+            self.update_raw_view()
         
         # 更新按钮样式
         for i, button in enumerate(self.view_btn_group.buttons()):
@@ -866,19 +1193,22 @@ class EncodingConverter(QMainWindow):
         
     def clear_results(self):
         """清空结果"""
+        self.convert_timer.stop()
+        self.cancel_conversion()
         self.conversion_results = None
+        self.conversion = IncrementalConversion()
+        self.raw_view_dirty = False
         
         # 清空字符视图
-        while self.char_layout.count():
-            child = self.char_layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
+        self.char_model.clear()
                 
         # 清空表格
-        self.table_view.setRowCount(0)
+        self.table_model.clear()
         
         # 清空原始数据
-        self.raw_view.clear()
+        self.raw_summary.clear()
+        self.hex_encoding.clear()
+        self.hex_view.set_data(b'')
         
         # 重置统计
         for label in self.stats_labels.values():
@@ -896,7 +1226,7 @@ class EncodingConverter(QMainWindow):
         if not self.conversion_results:
             return
             
-        content = self.raw_view.toPlainText()
+        content = ''.join(self.iter_report_lines())
         QApplication.clipboard().setText(content)
         self.statusBar().showMessage("结果已复制到剪贴板", 2000)
         
@@ -915,22 +1245,17 @@ class EncodingConverter(QMainWindow):
     def load_file(self, file_path):
         """加载文件"""
         try:
-            with open(file_path, 'rb') as f:
-                raw_data = f.read()
-                
-            # 检测编码
-            detected = chardet.detect(raw_data)
-            encoding = detected['encoding'] or 'utf-8'
-            
-            # 解码文本
-            text = raw_data.decode(encoding, errors='ignore')
+            # 以 mmap 读取并检测编码（BOM / ASCII / UTF-8 快速判定，必要时调用chardet，拿不准时再试解码），
+            # 原始字节不读入内存
+            text, detected, _ = read_text(file_path)
+            encoding = detected['encoding']
             
             # 显示在输入框
             self.text_input.setPlainText(text)
             
             # 更新编码信息
             confidence = detected.get('confidence', 0) * 100
-            self.encoding_info.setText(f"📋 {encoding} ({confidence:.0f}%)")
+            self.encoding_info.setText(f"📋 {encoding} ({confidence:.0f}%, {detected['tier']})")
             
             self.statusBar().showMessage(f"文件已加载: {Path(file_path).name}", 3000)
             
@@ -964,18 +1289,23 @@ class EncodingConverter(QMainWindow):
                 if file_path.endswith('.json'):
                     # 保存为JSON格式
                     with open(file_path, 'w', encoding='utf-8') as f:
-                        json.dump(self.conversion_results, f, ensure_ascii=False, indent=2)
+                        json.dump(self.conversion.results(), f, ensure_ascii=False, indent=2)
                 else:
                     # 保存为文本格式
-                    content = self.raw_view.toPlainText()
                     with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write(content)
+                        f.writelines(self.iter_report_lines())
                         
                 self.statusBar().showMessage(f"结果已保存: {Path(file_path).name}", 3000)
                 
             except Exception as e:
                 QMessageBox.warning(self, "错误", f"保存失败: {str(e)}")
                 
+    def closeEvent(self, event):
+        """关闭窗口时取消后台转换并等待线程结束"""
+        self.cancel_conversion()
+        self.thread_pool.waitForDone()
+        super().closeEvent(event)
+        
     def show_about(self):
         """显示关于对话框"""
         QMessageBox.about(self, "关于", 
@@ -994,90 +1324,6 @@ class EncodingConverter(QMainWindow):
             </ul>
             """)
 
-class FlowLayout(QLayout):
-    """流式布局"""
-    def __init__(self, parent=None, margin=0, spacing=-1):
-        super().__init__(parent)
-        if parent is not None:
-            self.setContentsMargins(margin, margin, margin, margin)
-        self.setSpacing(spacing)
-        self.item_list = []
-
-    def __del__(self):
-        item = self.takeAt(0)
-        while item:
-            item = self.takeAt(0)
-
-    def addItem(self, item):
-        self.item_list.append(item)
-
-    def count(self):
-        return len(self.item_list)
-
-    def itemAt(self, index):
-        if 0 <= index < len(self.item_list):
-            return self.item_list[index]
-        return None
-
-    def takeAt(self, index):
-        if 0 <= index < len(self.item_list):
-            return self.item_list.pop(index)
-        return None
-
-    def expandingDirections(self):
-        return Qt.Orientation(0)
-
-    def hasHeightForWidth(self):
-        return True
-
-    def heightForWidth(self, width):
-        height = self._do_layout(QRect(0, 0, width, 0), True)
-        return height
-
-    def setGeometry(self, rect):
-        super().setGeometry(rect)
-        self._do_layout(rect, False)
-
-    def sizeHint(self):
-        return self.minimumSize()
-
-    def minimumSize(self):
-        size = QSize()
-        for item in self.item_list:
-            size = size.expandedTo(item.minimumSize())
-        margin, _, _, _ = self.getContentsMargins()
-        size += QSize(2 * margin, 2 * margin)
-        return size
-
-    def _do_layout(self, rect, test_only):
-        x = rect.x()
-        y = rect.y()
-        line_height = 0
-
-        for item in self.item_list:
-            wid = item.widget()
-            space_x = self.spacing() + wid.style().layoutSpacing(
-                QSizePolicy.ControlType.PushButton, QSizePolicy.ControlType.PushButton, 
-                Qt.Orientation.Horizontal)
-            space_y = self.spacing() + wid.style().layoutSpacing(
-                QSizePolicy.ControlType.PushButton, QSizePolicy.ControlType.PushButton, 
-                Qt.Orientation.Vertical)
-            
-            next_x = x + item.sizeHint().width() + space_x
-            if next_x - space_x > rect.right() and line_height > 0:
-                x = rect.x()
-                y = y + line_height + space_y
-                next_x = x + item.sizeHint().width() + space_x
-                line_height = 0
-
-            if not test_only:
-                item.setGeometry(QRect(QPoint(x, y), item.sizeHint()))
-
-            x = next_x
-            line_height = max(line_height, item.sizeHint().height())
-
-        return y + line_height - rect.y()
-
 def main():
     app = QApplication(sys.argv)
     app.setApplicationName("字符编码转换器 Pro")
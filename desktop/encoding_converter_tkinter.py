@@ -4,12 +4,67 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, filedialog, messagebox
 import chardet
-import base64
-import unicodedata
 import json
 from datetime import datetime
 import sys
 import os
+import queue
+import threading
+from pathlib import Path
+
+# 将项目根目录加入模块搜索路径，以便导入共享的转换引擎
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from encoding_converter import (
+    ConversionCancelled, IncrementalConversion, read_text, text_change
+)
+from encoding_converter.hexdump import (
+    ASCII_COLUMN, BYTES_PER_ROW, byte_column, find_bytes, format_rows, parse_hex_bytes,
+    parse_offset, row_count
+)
+
+# 改动字符数不超过该值时增量更新，否则交给后台线程整体重新转换
+INCREMENTAL_LIMIT = 5000
+# 停止输入多久后开始转换（毫秒）
+DEBOUNCE_MS = 500
+# 轮询后台转换结果的间隔（毫秒）
+POLL_MS = 50
+# 表格行高（像素），用于计算可见行数
+TABLE_ROW_HEIGHT = 22
+
+class ConversionJob(threading.Thread):
+    """后台转换线程：结果放入队列，由主线程通过 root.after 轮询取出
+
+    Tk 不是线程安全的，线程中不能直接操作任何控件。
+    """
+    def __init__(self, job_id, text, encodings, results):
+        super().__init__(daemon=True)
+        self.job_id = job_id
+        self.text = text
+        self.encodings = encodings
+        self.results = results
+        self.cancelled = threading.Event()
+        self._last_percent = -1
+        
+    def cancel(self):
+        self.cancelled.set()
+        
+    def report_progress(self, done, total):
+        if self.cancelled.is_set():
+            raise ConversionCancelled()
+        percent = done * 100 // total if total else 100
+        if percent != self._last_percent:
+            self._last_percent = percent
+            self.results.put((self.job_id, 'progress', percent))
+            
+    def run(self):
+        try:
+            conversion = IncrementalConversion(self.text, self.encodings, progress=self.report_progress)
+        except ConversionCancelled:
+            return
+        except Exception as e:
+            self.results.put((self.job_id, 'error', str(e)))
+            return
+        self.results.put((self.job_id, 'done', conversion))
 
 class EncodingConverterTkinter:
     """基于Tkinter的字符编码转换器"""
@@ -27,6 +82,26 @@ class EncodingConverterTkinter:
         self.current_text = ""
         self.selected_encodings = {'utf-8', 'utf-16', 'gbk', 'ascii', 'latin-1'}
         self.conversion_results = None
+        # 当前结果对应的增量转换状态，小范围编辑直接在其上打补丁
+        self.conversion = IncrementalConversion()
+        self.raw_view_dirty = False
+        
+        # 后台转换：只保留最新的任务，文本变化时取消旧任务
+        self.result_queue = queue.Queue()
+        self.current_job = None
+        self.job_counter = 0
+        self.convert_after_id = None
+        self.poll_after_id = None
+        
+        # 表格只创建可见的行，滚动时替换行内容
+        self.table_first = 0
+        self.table_visible = 15
+        
+        # 十六进制查看器同样只渲染可见的行
+        self.hex_data = b''
+        self.hex_first = 0
+        self.hex_visible = 20
+        self.hex_highlight = None  # (起始偏移, 长度)
         
         # 创建界面
         self.create_widgets()
@@ -51,6 +126,7 @@ class EncodingConverterTkinter:
         # 按钮样式
         style.configure('Primary.TButton', font=('Arial', 10, 'bold'))
         style.configure('Secondary.TButton', font=('Arial', 9))
+        style.configure('Treeview', rowheight=TABLE_ROW_HEIGHT)
         
         # 设置背景色
         self.root.configure(bg='#f8fafc')
@@ -183,6 +259,7 @@ class EncodingConverterTkinter:
         # 结果显示区域
         self.result_notebook = ttk.Notebook(results_frame)
         self.result_notebook.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.result_notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
         
         # 表格视图
         self.create_table_view()
@@ -214,29 +291,62 @@ class EncodingConverterTkinter:
             else:
                 self.tree.column(col, width=120, anchor=tk.CENTER)
         
-        # 滚动条
-        table_scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=table_scrollbar.set)
+        # 滚动条按字符总数计算位置，表格本身只包含可见的行
+        self.table_scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.on_table_scroll)
+        self.tree.bind('<Configure>', self.on_table_resize)
+        self.tree.bind('<MouseWheel>', self.on_table_wheel)
+        self.tree.bind('<Button-4>', self.on_table_wheel)
+        self.tree.bind('<Button-5>', self.on_table_wheel)
+        self.tree.bind('<Prior>', lambda e: self.scroll_table(-self.table_visible))
+        self.tree.bind('<Next>', lambda e: self.scroll_table(self.table_visible))
         
         # 布局
         self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        table_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.table_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
         
         table_frame.columnconfigure(0, weight=1)
         table_frame.rowconfigure(0, weight=1)
     
     def create_raw_view(self):
-        """创建原始数据视图"""
+        """创建原始数据视图：整体编码字节的分页十六进制查看器"""
         raw_frame = ttk.Frame(self.result_notebook)
         self.result_notebook.add(raw_frame, text="💻 原始数据")
-        
-        self.raw_text = scrolledtext.ScrolledText(
-            raw_frame, 
-            wrap=tk.WORD,
-            font=('Consolas', 10),
-            state=tk.DISABLED
-        )
-        self.raw_text.pack(fill=tk.BOTH, expand=True)
+        raw_frame.columnconfigure(0, weight=1)
+        raw_frame.rowconfigure(2, weight=1)
+        
+        self.raw_summary = ttk.Label(raw_frame, text="", style='Info.TLabel')
+        self.raw_summary.grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=(0, 5))
+        
+        # 工具栏：编码选择、跳转偏移、查找字节
+        toolbar = ttk.Frame(raw_frame)
+        toolbar.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 5))
+        ttk.Label(toolbar, text="编码:").pack(side=tk.LEFT)
+        self.hex_encoding = ttk.Combobox(toolbar, state='readonly', width=12)
+        self.hex_encoding.pack(side=tk.LEFT, padx=(0, 10))
+        self.hex_encoding.bind('<<ComboboxSelected>>', lambda e: self.show_hex())
+        
+        self.offset_var = tk.StringVar()
+        offset_entry = ttk.Entry(toolbar, textvariable=self.offset_var, width=14)
+        offset_entry.pack(side=tk.LEFT)
+        offset_entry.bind('<Return>', lambda e: self.jump_to_offset())
+        ttk.Button(toolbar, text="跳转", command=self.jump_to_offset, style='Secondary.TButton').pack(side=tk.LEFT, padx=(5, 10))
+        
+        self.find_var = tk.StringVar()
+        find_entry = ttk.Entry(toolbar, textvariable=self.find_var, width=24)
+        find_entry.pack(side=tk.LEFT)
+        find_entry.bind('<Return>', lambda e: self.find_next_bytes())
+        ttk.Button(toolbar, text="查找下一个", command=self.find_next_bytes, style='Secondary.TButton').pack(side=tk.LEFT, padx=(5, 0))
+        
+        self.hex_text = tk.Text(raw_frame, wrap=tk.NONE, font=('Consolas', 10), state=tk.DISABLED, height=20)
+        self.hex_text.tag_configure('match', background='#c3dafe')
+        self.hex_scrollbar = ttk.Scrollbar(raw_frame, orient=tk.VERTICAL, command=self.on_hex_scroll)
+        self.hex_text.grid(row=2, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.hex_scrollbar.grid(row=2, column=1, sticky=(tk.N, tk.S))
+        
+        self.hex_text.bind('<Configure>', self.on_hex_resize)
+        self.hex_text.bind('<MouseWheel>', self.on_hex_wheel)
+        self.hex_text.bind('<Button-4>', self.on_hex_wheel)
+        self.hex_text.bind('<Button-5>', self.on_hex_wheel)
     
     def create_menu(self):
         """创建菜单栏"""
@@ -288,102 +398,81 @@ class EncodingConverterTkinter:
     
     def on_text_change(self, event=None):
         """文本变化处理"""
-        self.current_text = self.text_input.get('1.0', tk.END).strip()
+        text = self.text_input.get('1.0', tk.END).strip()
+        # 光标移动、点击等不改变文本的事件不打断正在进行的转换
+        if text == self.current_text:
+            return
+        self.current_text = text
         char_count = len(self.current_text)
         self.char_counter_label.config(text=f"{char_count} 字符")
         
         if self.current_text:
-            # 延迟转换以提高性能
-            self.root.after(500, self.convert_text)
+            # 防抖：连续输入时只保留最后一次延迟转换
+            self.cancel_conversion()
+            self.convert_after_id = self.root.after(DEBOUNCE_MS, self.convert_text)
         else:
             self.clear_results()
     
     def convert_text(self):
-        """转换文本编码"""
+        """转换文本：小范围编辑增量更新，其余情况交给后台线程"""
+        self.cancel_conversion()
         if not self.current_text or not self.selected_encodings:
             return
         
+        if set(self.conversion.encodings) == self.selected_encodings:
+            position, removed, added = text_change(self.conversion.text, self.current_text)
+            if removed + len(added) <= INCREMENTAL_LIMIT:
+                self.conversion.apply_change(position, removed, added)
+                self.update_ui(change=(position, removed, len(added)))
+                self.status_var.set("转换完成")
+                return
+        
+        self.job_counter += 1
+        self.current_job = ConversionJob(
+            self.job_counter, self.current_text, list(self.selected_encodings), self.result_queue
+        )
         self.status_var.set("正在转换...")
-        self.root.update()
-        
-        try:
-            results = self.perform_conversion(self.current_text)
-            self.conversion_results = results
-            self.update_ui()
-            self.status_var.set("转换完成")
-        except Exception as e:
-            self.status_var.set(f"转换失败: {str(e)}")
-            messagebox.showerror("错误", f"转换失败: {str(e)}")
-    
-    def perform_conversion(self, text):
-        """执行编码转换"""
-        results = {
-            'characters': [],
-            'overall': {},
-            'stats': {
-                'length': len(text),
-                'unique_chars': len(set(text))
-            }
-        }
-        
-        # 字符级转换
-        for i, char in enumerate(text):
-            char_info = {
-                'char': char,
-                'unicode': f'U+{ord(char):04X}',
-                'unicode_name': '',
-                'position': i,
-                'encodings': {}
-            }
-            
-            # 获取Unicode名称
+        self.current_job.start()
+        if self.poll_after_id is None:
+            self.poll_after_id = self.root.after(POLL_MS, self.poll_results)
+    
+    def cancel_conversion(self):
+        """取消尚未开始的延迟转换和正在进行的后台转换"""
+        if self.convert_after_id is not None:
+            self.root.after_cancel(self.convert_after_id)
+            self.convert_after_id = None
+        if self.current_job is not None:
+            self.current_job.cancel()
+            self.current_job = None
+    
+    def poll_results(self):
+        """在主线程中取出后台线程的消息，过期任务的消息直接丢弃"""
+        self.poll_after_id = None
+        while True:
             try:
-                char_info['unicode_name'] = unicodedata.name(char, 'UNKNOWN')
-            except:
-                char_info['unicode_name'] = 'UNKNOWN'
-            
-            # 各种编码转换
-            for encoding in self.selected_encodings:
-                try:
-                    encoded = char.encode(encoding)
-                    char_info['encodings'][encoding] = {
-                        'success': True,
-                        'hex': encoded.hex().upper(),
-                        'bytes': list(encoded),
-                        'base64': base64.b64encode(encoded).decode('ascii'),
-                        'length': len(encoded)
-                    }
-                except UnicodeEncodeError:
-                    char_info['encodings'][encoding] = {
-                        'success': False,
-                        'error': 'Cannot encode'
-                    }
-            
-            results['characters'].append(char_info)
+                job_id, kind, payload = self.result_queue.get_nowait()
+            except queue.Empty:
+                break
+            if self.current_job is None or job_id != self.current_job.job_id:
+                continue
+            if kind == 'progress':
+                self.status_var.set(f"正在转换... {payload}%")
+            elif kind == 'done':
+                self.current_job = None
+                self.conversion = payload
+                self.update_ui()
+                self.status_var.set("转换完成")
+            else:
+                self.current_job = None
+                self.status_var.set(f"转换失败: {payload}")
+                messagebox.showerror("错误", f"转换失败: {payload}")
         
-        # 整体编码
-        for encoding in self.selected_encodings:
-            try:
-                encoded = text.encode(encoding)
-                results['overall'][encoding] = {
-                    'success': True,
-                    'hex': encoded.hex().upper(),
-                    'bytes': list(encoded),
-                    'base64': base64.b64encode(encoded).decode('ascii'),
-                    'length': len(encoded)
-                }
-            except UnicodeEncodeError:
-                results['overall'][encoding] = {
-                    'success': False,
-                    'error': 'Cannot encode'
-                }
-        
-        return results
-    
-    def update_ui(self):
-        """更新界面显示"""
-        if not self.conversion_results:
-            return
+        if self.current_job is not None:
+            self.poll_after_id = self.root.after(POLL_MS, self.poll_results)
+    
+    def update_ui(self, change=None):
+        """更新界面显示；change 为 (position, removed, added) 时只增删改动的行"""
+        self.conversion_results = self.conversion.summary()
         
         # 更新统计信息
         stats = self.conversion_results['stats']
@@ -395,64 +484,221 @@ class EncodingConverterTkinter:
         if utf8_result and utf8_result.get('success'):
             self.stats_labels['byte_count'].config(text=str(utf8_result['length']))
         
-        # 更新表格和原始数据
+        # 更新表格：整体转换后回到开头，增量更新时保持当前位置
+        if change is None:
+            self.table_first = 0
         self.update_table_view()
-        self.update_raw_view()
+        
+        # 原始数据需要完整结果，只在可见时重新生成
+        self.raw_view_dirty = True
+        if self.result_notebook.index('current') == 1:
+            self.update_raw_view()
+    
+    def table_row(self, index):
+        """表格中第 index 个字符的一行数据"""
+        char_data = self.conversion.character(index)
+        char = char_data['char']
+        unicode_code = char_data['unicode']
+        name = char_data['unicode_name'][:30] + '...' if len(char_data['unicode_name']) > 30 else char_data['unicode_name']
+        
+        # 获取各种编码的十六进制表示
+        utf8_hex = char_data['encodings'].get('utf-8', {}).get('hex', 'N/A')
+        utf16_hex = char_data['encodings'].get('utf-16', {}).get('hex', 'N/A')
+        gbk_hex = char_data['encodings'].get('gbk', {}).get('hex', 'N/A')
+        ascii_hex = char_data['encodings'].get('ascii', {}).get('hex', 'N/A')
+        return (char, unicode_code, name, utf8_hex, utf16_hex, gbk_hex, ascii_hex)
     
     def update_table_view(self):
-        """更新表格视图"""
-        # 清空现有数据
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        if not self.conversion_results:
-            return
+        """只填充可见的行：表格中始终最多有 table_visible 个条目"""
+        total = len(self.conversion.text)
+        self.table_first = max(0, min(self.table_first, total - self.table_visible))
+        count = min(self.table_visible, total - self.table_first)
+        
+        items = self.tree.get_children()
+        if len(items) > count:
+            self.tree.delete(*items[count:])
+        for offset in range(count):
+            values = self.table_row(self.table_first + offset)
+            if offset < len(items):
+                self.tree.item(items[offset], values=values)
+            else:
+                self.tree.insert('', tk.END, values=values)
         
-        # 添加数据
-        for char_data in self.conversion_results['characters']:
-            char = char_data['char']
-            unicode_code = char_data['unicode']
-            name = char_data['unicode_name'][:30] + '...' if len(char_data['unicode_name']) > 30 else char_data['unicode_name']
-            
-            # 获取各种编码的十六进制表示
-            utf8_hex = char_data['encodings'].get('utf-8', {}).get('hex', 'N/A')
-            utf16_hex = char_data['encodings'].get('utf-16', {}).get('hex', 'N/A')
-            gbk_hex = char_data['encodings'].get('gbk', {}).get('hex', 'N/A')
-            ascii_hex = char_data['encodings'].get('ascii', {}).get('hex', 'N/A')
-            
-            self.tree.insert('', tk.END, values=(char, unicode_code, name, utf8_hex, utf16_hex, gbk_hex, ascii_hex))
+        if total:
+            self.table_scrollbar.set(self.table_first / total, (self.table_first + count) / total)
+        else:
+            self.table_scrollbar.set(0, 1)
+    
+    def scroll_table(self, rows):
+        """表格滚动 rows 行"""
+        self.table_first += rows
+        self.update_table_view()
+        return 'break'
+    
+    def on_table_scroll(self, action, amount, unit=None):
+        """滚动条回调：拖动（moveto）或按行/页滚动（scroll）"""
+        if action == 'moveto':
+            self.table_first = int(float(amount) * len(self.conversion.text))
+            self.update_table_view()
+        elif unit == 'pages':
+            self.scroll_table(int(amount) * self.table_visible)
+        else:
+            self.scroll_table(int(amount))
+    
+    def on_table_wheel(self, event):
+        """鼠标滚轮：Windows/macOS 使用 delta，Linux 使用 Button-4/5"""
+        if event.num == 4 or event.delta > 0:
+            return self.scroll_table(-3)
+        return self.scroll_table(3)
+    
+    def on_table_resize(self, event):
+        """表格高度变化时重新计算可见行数（减去表头高度）"""
+        visible = max(1, (event.height - TABLE_ROW_HEIGHT) // TABLE_ROW_HEIGHT)
+        if visible != self.table_visible:
+            self.table_visible = visible
+            self.update_table_view()
     
     def update_raw_view(self):
-        """更新原始数据视图"""
+        """更新原始数据视图：摘要信息 + 当前编码的十六进制查看器"""
         if not self.conversion_results:
             return
         
-        content = f"文本: \"{self.current_text}\"\n"
-        content += f"字符数: {self.conversion_results['stats']['length']}\n"
-        content += f"唯一字符: {self.conversion_results['stats']['unique_chars']}\n\n"
-        
-        content += "=== 整体编码结果 ===\n"
+        self.raw_view_dirty = False
+        stats = self.conversion_results['stats']
+        parts = [f"字符数: {stats['length']}", f"唯一字符: {stats['unique_chars']}"]
         for encoding, result in self.conversion_results['overall'].items():
+            size = f"{result['length']} 字节" if result.get('success') else "编码失败"
+            parts.append(f"{encoding.upper()}: {size}")
+        self.raw_summary.config(text="    ".join(parts))
+        
+        # 刷新编码列表，尽量保持当前选择
+        current = self.hex_encoding.get()
+        self.hex_encoding.config(values=self.conversion.encodings)
+        if current not in self.conversion.encodings:
+            self.hex_encoding.set(self.conversion.encodings[0] if self.conversion.encodings else '')
+        self.show_hex()
+    
+    def show_hex(self):
+        """在十六进制查看器中显示当前编码的整体字节"""
+        encoding = self.hex_encoding.get()
+        if encoding in self.conversion.encodings:
+            self.hex_data = self.conversion.encoded(encoding)
+            if not self.conversion.overall(encoding)['success']:
+                self.status_var.set(f"{encoding.upper()} 无法编码全部字符，已用替换字符显示")
+        else:
+            self.hex_data = b''
+        self.hex_highlight = None
+        self.render_hex()
+    
+    def render_hex(self):
+        """只格式化并显示可见的行"""
+        total = row_count(len(self.hex_data))
+        self.hex_first = max(0, min(self.hex_first, total - self.hex_visible))
+        rows = format_rows(self.hex_data, self.hex_first, self.hex_visible)
+        
+        self.hex_text.config(state=tk.NORMAL)
+        self.hex_text.delete('1.0', tk.END)
+        self.hex_text.insert('1.0', '\n'.join(rows))
+        if self.hex_highlight is not None:
+            start, length = self.hex_highlight
+            for line, row in enumerate(range(self.hex_first, self.hex_first + len(rows)), 1):
+                row_start = row * BYTES_PER_ROW
+                for index in range(max(start, row_start) - row_start, min(start + length, row_start + BYTES_PER_ROW) - row_start):
+                    self.hex_text.tag_add('match', f'{line}.{byte_column(index)}', f'{line}.{byte_column(index) + 2}')
+                    self.hex_text.tag_add('match', f'{line}.{ASCII_COLUMN + index}', f'{line}.{ASCII_COLUMN + index + 1}')
+        self.hex_text.config(state=tk.DISABLED)
+        
+        if total:
+            self.hex_scrollbar.set(self.hex_first / total, (self.hex_first + len(rows)) / total)
+        else:
+            self.hex_scrollbar.set(0, 1)
+    
+    def scroll_hex(self, rows):
+        """十六进制查看器滚动 rows 行"""
+        self.hex_first += rows
+        self.render_hex()
+        return 'break'
+    
+    def on_hex_scroll(self, action, amount, unit=None):
+        """滚动条回调：拖动（moveto）或按行/页滚动（scroll）"""
+        if action == 'moveto':
+            self.hex_first = int(float(amount) * row_count(len(self.hex_data)))
+            self.render_hex()
+        elif unit == 'pages':
+            self.scroll_hex(int(amount) * self.hex_visible)
+        else:
+            self.scroll_hex(int(amount))
+    
+    def on_hex_wheel(self, event):
+        """鼠标滚轮：Windows/macOS 使用 delta，Linux 使用 Button-4/5"""
+        if event.num == 4 or event.delta > 0:
+            return self.scroll_hex(-3)
+        return self.scroll_hex(3)
+    
+    def on_hex_resize(self, event):
+        """查看器高度变化时重新计算可见行数"""
+        line_height = self.hex_text.tk.call('font', 'metrics', self.hex_text.cget('font'), '-linespace')
+        visible = max(1, event.height // int(line_height))
+        if visible != self.hex_visible:
+            self.hex_visible = visible
+            self.render_hex()
+    
+    def show_hex_range(self, offset, length=1):
+        """滚动到 offset 所在的行（居中）并高亮 length 个字节"""
+        self.hex_highlight = (offset, length)
+        self.hex_first = offset // BYTES_PER_ROW - self.hex_visible // 2
+        self.render_hex()
+    
+    def jump_to_offset(self):
+        """跳转到指定字节偏移"""
+        try:
+            offset = parse_offset(self.offset_var.get())
+        except ValueError:
+            self.status_var.set("无效的偏移")
+            return
+        if offset >= len(self.hex_data):
+            self.status_var.set(f"偏移超出范围（共 {len(self.hex_data)} 字节）")
+            return
+        self.show_hex_range(offset)
+    
+    def find_next_bytes(self):
+        """从当前高亮位置之后查找字节序列"""
+        try:
+            pattern = parse_hex_bytes(self.find_var.get())
+        except ValueError:
+            self.status_var.set("请输入十六进制字节，如 E4 BD A0")
+            return
+        start = self.hex_highlight[0] + 1 if self.hex_highlight else 0
+        position = find_bytes(self.hex_data, pattern, start)
+        if position < 0:
+            self.status_var.set("未找到")
+            return
+        self.show_hex_range(position, len(pattern))
+        self.status_var.set(f"找到于偏移 0x{position:X} ({position})")
+    
+    def iter_report_lines(self):
+        """逐行生成完整的文本报告，用于复制与保存"""
+        results = self.conversion.results()
+        yield f"文本: \"{self.conversion.text}\"\n"
+        yield f"字符数: {results['stats']['length']}\n"
+        yield f"唯一字符: {results['stats']['unique_chars']}\n\n"
+        
+        yield "=== 整体编码结果 ===\n"
+        for encoding, result in results['overall'].items():
             if result.get('success'):
-                content += f"{encoding.upper()}: {result['hex']}\n"
+                yield f"{encoding.upper()}: {result['hex']}\n"
             else:
-                content += f"{encoding.upper()}: 编码失败\n"
+                yield f"{encoding.upper()}: 编码失败\n"
         
-        content += "\n=== 字符详情 ===\n"
-        for char_data in self.conversion_results['characters']:
-            content += f"\n字符: {char_data['char']}\n"
-            content += f"Unicode: {char_data['unicode']}\n"
-            content += f"名称: {char_data['unicode_name']}\n"
+        yield "\n=== 字符详情 ===\n"
+        for char_data in results['characters']:
+            yield f"\n字符: {char_data['char']}\n"
+            yield f"Unicode: {char_data['unicode']}\n"
+            yield f"名称: {char_data['unicode_name']}\n"
             
             for encoding, result in char_data['encodings'].items():
                 if result.get('success'):
-                    content += f"  {encoding.upper()}: {result['hex']}\n"
-        
-        # 更新文本
-        self.raw_text.config(state=tk.NORMAL)
-        self.raw_text.delete('1.0', tk.END)
-        self.raw_text.insert('1.0', content)
-        self.raw_text.config(state=tk.DISABLED)
+                    yield f"  {encoding.upper()}: {result['hex']}\n"
     
     def switch_view(self):
         """切换视图"""
@@ -461,24 +707,36 @@ class EncodingConverterTkinter:
         else:
             self.result_notebook.select(1)
     
+    def on_tab_changed(self, event=None):
+        """切换到原始数据页时再生成过期的内容"""
+        if self.result_notebook.index('current') == 1 and self.raw_view_dirty:
+            self.update_raw_view()
+    
     def clear_text(self):
         """清空文本"""
         self.text_input.delete('1.0', tk.END)
+        self.current_text = ""
         self.clear_results()
         self.char_counter_label.config(text="0 字符")
     
     def clear_results(self):
         """清空结果"""
+        self.cancel_conversion()
         self.conversion_results = None
+        self.conversion = IncrementalConversion()
+        self.raw_view_dirty = False
         
         # 清空表格
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.table_first = 0
+        self.update_table_view()
         
         # 清空原始数据
-        self.raw_text.config(state=tk.NORMAL)
-        self.raw_text.delete('1.0', tk.END)
-        self.raw_text.config(state=tk.DISABLED)
+        self.raw_summary.config(text="")
+        self.hex_encoding.config(values=[])
+        self.hex_encoding.set('')
+        self.hex_data = b''
+        self.hex_highlight = None
+        self.render_hex()
         
         # 重置统计
         for label in self.stats_labels.values():
@@ -500,7 +758,7 @@ class EncodingConverterTkinter:
             messagebox.showinfo("提示", "没有可复制的结果")
             return
         
-        content = self.raw_text.get('1.0', tk.END)
+        content = ''.join(self.iter_report_lines())
         self.root.clipboard_clear()
         self.root.clipboard_append(content)
         self.status_var.set("结果已复制到剪贴板")
@@ -517,23 +775,18 @@ class EncodingConverterTkinter:
         
         if file_path:
             try:
-                with open(file_path, 'rb') as f:
-                    raw_data = f.read()
-                
-                # 检测编码
-                detected = chardet.detect(raw_data)
-                encoding = detected['encoding'] or 'utf-8'
+                # 以 mmap 读取并检测编码（BOM / ASCII / UTF-8 快速判定，必要时调用chardet，拿不准时再试解码），
+                # 原始字节不读入内存
+                text, detected, _ = read_text(file_path)
+                encoding = detected['encoding']
                 confidence = detected.get('confidence', 0) * 100
                 
-                # 解码文本
-                text = raw_data.decode(encoding, errors='ignore')
-                
                 # 显示在输入框
                 self.text_input.delete('1.0', tk.END)
                 self.text_input.insert('1.0', text)
                 self.on_text_change()
                 
-                self.status_var.set(f"文件已加载 (编码: {encoding}, 置信度: {confidence:.0f}%)")
+                self.status_var.set(f"文件已加载 (编码: {encoding}, 置信度: {confidence:.0f}%, 判定: {detected['tier']})")
                 
             except Exception as e:
                 messagebox.showerror("错误", f"无法打开文件: {str(e)}")
@@ -580,12 +833,11 @@ class EncodingConverterTkinter:
                 if file_path.endswith('.json'):
                     # 保存为JSON
                     with open(file_path, 'w', encoding='utf-8') as f:
-                        json.dump(self.conversion_results, f, ensure_ascii=False, indent=2)
+                        json.dump(self.conversion.results(), f, ensure_ascii=False, indent=2)
                 else:
                     # 保存为文本
-                    content = self.raw_text.get('1.0', tk.END)
                     with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write(content)
+                        f.writelines(self.iter_report_lines())
                 
                 self.status_var.set(f"结果已保存到: {file_path}")
                 
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""字符编码转换器核心包"""
+
+from .cache import CharEncodingCache, ResultCache
+from .detect import detect_bytes
+from .engine import (
+    SUPPORTED_ENCODINGS,
+    ConversionCancelled,
+    filter_encodings,
+    encode_char,
+    char_name,
+    char_cache,
+    convert_columns,
+    convert_columnar,
+    encode_overall,
+    encode_spans,
+    perform_conversion,
+)
+from .incremental import IncrementalConversion, text_change
+from .repair import repair_text
+from .scoring import detect_scored, score_encodings
+from .transcode import read_text, transcode_file
+
+__all__ = [
+    'CharEncodingCache',
+    'ConversionCancelled',
+    'IncrementalConversion',
+    'ResultCache',
+    'SUPPORTED_ENCODINGS',
+    'detect_bytes',
+    'detect_scored',
+    'filter_encodings',
+    'encode_char',
+    'char_name',
+    'char_cache',
+    'convert_columns',
+    'convert_columnar',
+    'encode_overall',
+    'encode_spans',
+    'perform_conversion',
+    'read_text',
+    'repair_text',
+    'score_encodings',
+    'text_change',
+    'transcode_file',
+]
@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+"""批量文件转换：在进程池中并行检测并转换编码，任务状态落盘以便轮询"""
+
+import codecs
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path, PurePosixPath
+
+from .detect import detect_bytes
+from .stream import ERROR_HANDLERS, transcode_errors
+
+# 批量任务的工作目录
+BATCH_ROOT = Path(tempfile.gettempdir()) / 'encoding_converter_batch'
+# 最多保留的任务数，超过后删除最早的已结束任务
+MAX_JOBS = 100
+# 可以被清理的任务状态
+FINISHED_STATUSES = ('done', 'failed')
+# 没有状态文件的任务目录超过该秒数后视为残留，可以清理
+ORPHAN_SECONDS = 3600
+# 所属服务进程已退出、来不及完成的文件的错误信息
+LOST_ERROR = '任务所在的服务进程已退出，文件未完成转换'
+
+
+def convert_bytes(data, target_encoding, source_encoding=None, errors='strict'):
+    """把一段字节从源编码转换为目标编码，未指定源编码时自动检测
+
+    data 可以是 bytes，也可以是 mmap 等缓冲区。返回 (转换后的字节, 检测结果)。
+    解码一侧不支持的错误处理方式（如 xmlcharrefreplace）按 transcode_errors 换成 replace。
+    """
+    decode_errors, encode_errors = transcode_errors(errors)
+    if source_encoding:
+        detected = {'encoding': source_encoding, 'confidence': 1.0, 'language': '', 'tier': 'given'}
+    else:
+        detected = detect_bytes(data)
+    encoding = detected.get('encoding') or 'utf-8'
+    text = codecs.decode(data, encoding, decode_errors)
+    return text.encode(target_encoding, errors=encode_errors), detected
+
+
+def convert_file(src, dst, target_encoding, source_encoding=None, errors='strict'):
+    """转换单个文件（在工作进程中运行），返回文件级统计"""
+    start = time.perf_counter()
+    data = Path(src).read_bytes()
+    output, detected = convert_bytes(data, target_encoding, source_encoding, errors)
+    Path(dst).parent.mkdir(parents=True, exist_ok=True)
+    Path(dst).write_bytes(output)
+    seconds = time.perf_counter() - start
+    return {
+        'source_encoding': detected.get('encoding'),
+        'detection_tier': detected.get('tier'),
+        'confidence': detected.get('confidence', 0),
+        'input_bytes': len(data),
+        'output_bytes': len(output),
+        'seconds': round(seconds, 6),
+        'throughput_mb_s': round(len(data) / 1024 / 1024 / seconds, 3) if seconds else None
+    }
+
+
+def safe_member_name(name):
+    """规范化压缩包成员/上传文件名，拒绝绝对路径和 .. 穿越"""
+    parts = [part for part in PurePosixPath(name.replace('\\', '/')).parts
+             if part not in ('', '.', '/')]
+    if not parts or '..' in parts:
+        return None
+    return '/'.join(parts)
+
+
+def process_alive(pid):
+    """进程是否仍在运行；无法判断时（如 Windows）视为仍在运行"""
+    if not pid or os.name == 'nt':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class BatchJobManager:
+    """管理批量转换任务：提交到进程池，并把状态写入任务目录下的 status.json
+
+    状态保存在磁盘上，多个服务进程都可以查询同一个任务。任务由创建它的服务进程推进，
+    该进程退出（如 gunicorn 按 max_requests 回收）后仍为 running 的任务在查询时标记为 failed。
+    """
+
+    def __init__(self, root=BATCH_ROOT, max_workers=None, max_jobs=MAX_JOBS):
+        self.root = Path(root)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_jobs = max_jobs
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        """延迟创建进程池，避免导入模块时就启动工作进程"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def _submit(self, *args):
+        """提交到进程池；工作进程异常退出导致进程池损坏时换一个新的进程池重试一次"""
+        executor = self.executor
+        try:
+            return executor.submit(*args)
+        except BrokenProcessPool:
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False)
+            return self.executor.submit(*args)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def job_dir(self, job_id):
+        return self.root / job_id
+
+    def create_job(self, files, target_encoding, source_encoding=None, errors='strict'):
+        """创建任务并提交到进程池
+
+        files 为 (文件名, 字节或文件对象) 的可迭代对象；文件名为 .zip 时展开其中的文件。
+        """
+        if errors not in ERROR_HANDLERS:
+            raise ValueError(f'不支持的错误处理方式: {errors}')
+        codecs.lookup(target_encoding)
+        if source_encoding:
+            codecs.lookup(source_encoding)
+
+        self._prune()
+        job_id = uuid.uuid4().hex
+        job_dir = self.job_dir(job_id)
+        input_dir = job_dir / 'input'
+        input_dir.mkdir(parents=True)
+
+        names = {}
+        for filename, content in files:
+            for name, stream in self._expand(filename, content):
+                if name in names:
+                    continue
+                path = input_dir / name
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(path, 'wb') as out:
+                    shutil.copyfileobj(stream, out)
+                    names[name] = out.tell()
+
+        if not names:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise ValueError('没有可转换的文件')
+
+        status = {
+            'job_id': job_id,
+            'status': 'running',
+            'target_encoding': target_encoding,
+            'source_encoding': source_encoding,
+            'errors': errors,
+            'workers': self.max_workers,
+            'pid': os.getpid(),
+            'created_at': time.time(),
+            'finished_at': None,
+            'total': len(names),
+            'completed': 0,
+            'failed': 0,
+            'files': {name: {'name': name, 'status': 'pending'} for name in names}
+        }
+        self._write_status(job_id, status)
+
+        state = {'status': status, 'lock': threading.Lock()}
+        for name in names:
+            future = self._submit(
+                convert_file,
+                str(input_dir / name),
+                str(job_dir / 'output' / name),
+                target_encoding,
+                source_encoding,
+                errors
+            )
+            future.add_done_callback(
+                lambda f, name=name: self._on_file_done(job_id, name, f, state)
+            )
+        return job_id
+
+    def _expand(self, filename, content):
+        """把上传内容展开为 (文件名, 文件对象)，zip 压缩包的成员逐个打开，不整体读入内存"""
+        if isinstance(content, (bytes, bytearray)):
+            content = io.BytesIO(content)
+        if filename.lower().endswith('.zip'):
+            is_zip = zipfile.is_zipfile(content)
+            content.seek(0)
+            if is_zip:
+                with zipfile.ZipFile(content) as archive:
+                    for info in archive.infolist():
+                        name = safe_member_name(info.filename)
+                        if info.is_dir() or name is None:
+                            continue
+                        with archive.open(info) as member:
+                            yield name, member
+                return
+        name = safe_member_name(filename)
+        if name is not None:
+            yield name, content
+
+    def _on_file_done(self, job_id, name, future, state):
+        """某个文件转换结束后更新任务状态"""
+        with state['lock']:
+            status = state['status']
+            entry = status['files'][name]
+            try:
+                entry.update(future.result())
+                entry['status'] = 'done'
+                status['completed'] += 1
+            except CancelledError:
+                # 服务进程退出时关闭进程池，排队中的文件被取消
+                entry['status'] = 'error'
+                entry['error'] = LOST_ERROR
+                status['failed'] += 1
+            except Exception as e:
+                # 包括工作进程异常退出时的 BrokenProcessPool
+                entry['status'] = 'error'
+                entry['error'] = str(e) or type(e).__name__
+                status['failed'] += 1
+
+            if status['completed'] + status['failed'] == status['total']:
+                self._finish(status)
+            self._write_status(job_id, status)
+
+    def _finish(self, status):
+        """所有文件结束后设置任务状态：至少一个文件转换成功为 done，全部失败为 failed"""
+        status['status'] = 'done' if status['completed'] else 'failed'
+        status['finished_at'] = time.time()
+
+    def _check_owner(self, job_id, status):
+        """任务仍为 running 但所属服务进程已退出时，把未完成的文件记为失败并结束任务"""
+        if status['status'] != 'running' or process_alive(status.get('pid')):
+            return status
+        for entry in status['files'].values():
+            if entry['status'] == 'pending':
+                entry['status'] = 'error'
+                entry['error'] = LOST_ERROR
+                status['failed'] += 1
+        self._finish(status)
+        self._write_status(job_id, status)
+        return status
+
+    def _write_status(self, job_id, status):
+        """原子写入任务状态"""
+        path = self.job_dir(job_id) / 'status.json'
+        # 其他服务进程也可能把失联的任务标记为 failed，临时文件按进程区分
+        tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+        tmp.write_text(json.dumps(status, ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp, path)
+
+    def get_status(self, job_id):
+        """读取任务状态并补充汇总吞吐量，任务不存在时返回None"""
+        if not job_id.isalnum():
+            return None
+        path = self.job_dir(job_id) / 'status.json'
+        try:
+            status = json.loads(path.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return None
+
+        status = self._check_owner(job_id, status)
+        files = list(status['files'].values())
+        done = [f for f in files if f['status'] == 'done']
+        input_bytes = sum(f['input_bytes'] for f in done)
+        end = status['finished_at'] or time.time()
+        elapsed = end - status['created_at']
+        status['files'] = files
+        status['elapsed'] = round(elapsed, 3)
+        status['input_bytes'] = input_bytes
+        status['output_bytes'] = sum(f['output_bytes'] for f in done)
+        status['files_per_s'] = round(len(done) / elapsed, 3) if elapsed else None
+        status['throughput_mb_s'] = round(input_bytes / 1024 / 1024 / elapsed, 3) if elapsed else None
+        return status
+
+    def build_archive(self, job_id):
+        """把已转换的文件打包为 zip，返回压缩包路径
+
+        只在第一次下载时生成：先写临时文件再原子替换，并发下载不会读到写了一半的压缩包。
+        """
+        job_dir = self.job_dir(job_id)
+        output_dir = job_dir / 'output'
+        archive_path = job_dir / 'result.zip'
+        if archive_path.exists():
+            return archive_path
+        fd, tmp = tempfile.mkstemp(dir=str(job_dir), prefix='.result.', suffix='.zip')
+        try:
+            with os.fdopen(fd, 'wb') as f, zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED) as archive:
+                if output_dir.exists():
+                    for path in sorted(output_dir.rglob('*')):
+                        if path.is_file():
+                            archive.write(path, path.relative_to(output_dir).as_posix())
+            os.replace(tmp, archive_path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return archive_path
+
+    def _prune(self):
+        """任务数超过上限时删除最早的已结束任务目录
+
+        只删除 status.json 为 done 或 failed 的任务（所属服务进程已退出的 running 任务先标记为 failed），
+        进程池中仍在运行的任务不受影响；
+        没有状态文件的目录（创建中途失败）超过 ORPHAN_SECONDS 后也会删除。
+        """
+        if not self.root.exists():
+            return
+        jobs = sorted(
+            (p for p in self.root.iterdir() if p.is_dir()),
+            key=lambda p: p.stat().st_mtime
+        )
+        excess = len(jobs) - self.max_jobs + 1
+        now = time.time()
+        for path in jobs:
+            if excess <= 0:
+                break
+            try:
+                status = json.loads((path / 'status.json').read_text(encoding='utf-8'))
+                status = self._check_owner(path.name, status)['status']
+            except FileNotFoundError:
+                status = 'orphan' if now - path.stat().st_mtime > ORPHAN_SECONDS else None
+            except (OSError, ValueError, KeyError):
+                continue
+            if status in FINISHED_STATUSES or status == 'orphan':
+                shutil.rmtree(path, ignore_errors=True)
+                excess -= 1
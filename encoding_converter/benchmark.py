@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""转换引擎基准测试：对比原有逐字符循环与共享引擎
+
+用法: python -m encoding_converter.benchmark [--size 1048576] [--repeat 3]
+"""
+
+import argparse
+import base64
+import time
+import unicodedata
+
+from .engine import perform_conversion
+
+DEFAULT_ENCODINGS = ['utf-8', 'utf-16', 'gbk', 'ascii']
+
+# 中英文混合的样本，模拟常见输入中大量重复的字符
+SAMPLE = '字符编码转换器 Encoding Converter 你好，世界！Hello, world! 0123456789\n'
+
+
+def legacy_conversion(text, encodings):
+    """原桌面版 perform_conversion 的逐字符 × 逐编码循环，作为对照组"""
+    results = {'characters': [], 'overall': {}}
+    for i, char in enumerate(text):
+        char_info = {
+            'char': char,
+            'unicode': f'U+{ord(char):04X}',
+            'unicode_name': unicodedata.name(char, 'UNKNOWN'),
+            'position': i,
+            'encodings': {}
+        }
+        for encoding in encodings:
+            try:
+                encoded = char.encode(encoding)
+                char_info['encodings'][encoding] = {
+                    'success': True,
+                    'hex': encoded.hex().upper(),
+                    'bytes': list(encoded),
+                    'base64': base64.b64encode(encoded).decode('ascii'),
+                    'length': len(encoded)
+                }
+            except UnicodeEncodeError:
+                char_info['encodings'][encoding] = {
+                    'success': False,
+                    'error': 'Cannot encode'
+                }
+        results['characters'].append(char_info)
+
+    for encoding in encodings:
+        try:
+            encoded = text.encode(encoding)
+            results['overall'][encoding] = {
+                'success': True,
+                'hex': encoded.hex().upper(),
+                'bytes': list(encoded),
+                'base64': base64.b64encode(encoded).decode('ascii'),
+                'length': len(encoded)
+            }
+        except UnicodeEncodeError:
+            results['overall'][encoding] = {
+                'success': False,
+                'error': 'Cannot encode'
+            }
+    return results
+
+
+def make_text(size):
+    """生成约 size 字节（UTF-8）的测试文本"""
+    unit = len(SAMPLE.encode('utf-8'))
+    return SAMPLE * max(1, size // unit)
+
+
+def best_of(func, repeat):
+    """多次运行取最短耗时"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(size, repeat, encodings):
+    text = make_text(size)
+    print(f"📏 输入: {len(text)} 字符 / {len(text.encode('utf-8'))} 字节, 编码: {', '.join(encodings)}")
+
+    legacy = best_of(lambda: legacy_conversion(text, encodings), repeat)
+    engine = best_of(lambda: perform_conversion(text, encodings), repeat)
+
+    print(f"🐢 原有循环: {legacy:.3f}s")
+    print(f"⚡ 共享引擎: {engine:.3f}s")
+    print(f"🚀 加速比:   {legacy / engine:.2f}x")
+    return legacy, engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description='编码转换引擎基准测试')
+    parser.add_argument('--size', type=int, default=1024 * 1024, help='输入大小（UTF-8字节数）')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数')
+    parser.add_argument('--encodings', nargs='+', default=DEFAULT_ENCODINGS, help='参与测试的编码')
+    args = parser.parse_args()
+    run(args.size, args.repeat, args.encodings)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""构建码位 -> 字节查找表文件（运行时加载见 tables 模块）
+
+用法:
+    python -m encoding_converter.build_tables
+    python -m encoding_converter.build_tables -o /srv/tables.bin -e gbk -e big5
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+import unicodedata
+from pathlib import Path
+
+from .tables import (
+    ALIGN, ASTRAL_SIZE, BMP_SIZE, DEFAULT_TABLES_PATH, FORMAT_VERSION, MAGIC, TABLE_ENCODINGS,
+    CodepointTables, np, runtime_tag
+)
+
+
+def assigned_astral():
+    """增补平面中已分配的码位（不含未分配与私用区）"""
+    return [
+        cp for cp in range(BMP_SIZE, 0x110000)
+        if unicodedata.category(chr(cp)) not in ('Cn', 'Co')
+    ]
+
+
+def _encode(char, encoding):
+    try:
+        return char.encode(encoding)
+    except UnicodeEncodeError:
+        return None
+
+
+def build_table(encoding, astral):
+    """生成单个编码的查找表数组"""
+    lengths = np.zeros(BMP_SIZE, dtype=np.uint8)
+    offsets = np.zeros(BMP_SIZE, dtype=np.uint32)
+    chunks = []
+    position = 0
+    for cp in range(BMP_SIZE):
+        encoded = _encode(chr(cp), encoding)
+        if encoded:
+            lengths[cp] = len(encoded)
+            offsets[cp] = position
+            chunks.append(encoded)
+            position += len(encoded)
+
+    astral_codes, astral_lengths, astral_offsets = [], [], []
+    for cp in astral:
+        encoded = _encode(chr(cp), encoding)
+        if encoded:
+            astral_codes.append(cp)
+            astral_lengths.append(len(encoded))
+            astral_offsets.append(position)
+            chunks.append(encoded)
+            position += len(encoded)
+
+    return {
+        'bmp_lengths': lengths,
+        'bmp_offsets': offsets,
+        'astral_codes': np.array(astral_codes, dtype=np.uint32),
+        'astral_lengths': np.array(astral_lengths, dtype=np.uint8),
+        'astral_offsets': np.array(astral_offsets, dtype=np.uint32),
+        'data': np.frombuffer(b''.join(chunks), dtype=np.uint8)
+    }
+
+
+def build_tables(path=None, encodings=None):
+    """生成表文件：头部为 JSON 索引，各数组按 8 字节对齐依次存放"""
+    path = Path(path or DEFAULT_TABLES_PATH)
+    encodings = TABLE_ENCODINGS if encodings is None else encodings
+    unsupported = [enc for enc in encodings if enc not in TABLE_ENCODINGS]
+    if unsupported:
+        raise ValueError(f"不支持查表的编码: {', '.join(unsupported)}")
+
+    astral = assigned_astral()
+    assigned = np.zeros(ASTRAL_SIZE, dtype=bool)
+    assigned[np.array(astral, dtype=np.int64) - BMP_SIZE] = True
+
+    arrays = [('astral_assigned', np.packbits(assigned))]
+    for encoding in encodings:
+        for name, values in build_table(encoding, astral).items():
+            arrays.append((f'{encoding}/{name}', values))
+
+    index = {}
+    position = 0
+    for name, values in arrays:
+        index[name] = [position, values.dtype.str, len(values)]
+        position += -(-values.nbytes // ALIGN) * ALIGN
+    header = json.dumps({
+        'version': FORMAT_VERSION,
+        'runtime': runtime_tag(),
+        'encodings': list(encodings),
+        'arrays': index
+    }).encode('utf-8')
+    data_start = -(-(len(MAGIC) + 4 + len(header)) // ALIGN) * ALIGN
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC + struct.pack('<I', len(header)) + header)
+        f.write(b'\0' * (data_start - f.tell()))
+        for name, values in arrays:
+            f.write(values.tobytes())
+            f.write(b'\0' * (-values.nbytes % ALIGN))
+    os.replace(tmp, path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='预编译传统编码的码位 -> 字节查找表')
+    parser.add_argument('-o', '--output', default=None, help=f'输出文件（默认 {DEFAULT_TABLES_PATH}）')
+    parser.add_argument('-e', '--encoding', action='append', default=None,
+                        help='只生成指定编码的表，可重复（默认全部传统编码）')
+    args = parser.parse_args(argv)
+
+    # 镜像构建时执行：缺少 numpy 或表文件无法加载都以非零状态退出，而不是让服务在运行时静默回退
+    if np is None:
+        print("❌ 未安装 numpy，无法生成编码查找表（pip install -r requirements.txt）", file=sys.stderr)
+        return 1
+    try:
+        path = build_tables(args.output, args.encoding)
+        CodepointTables(path)
+    except ValueError as e:
+        parser.error(str(e))
+    except (OSError, KeyError) as e:
+        print(f"❌ 生成的编码查找表无法加载: {e}", file=sys.stderr)
+        return 1
+    print(f"✅ 编码查找表: {path} ({path.stat().st_size / 1024 / 1024:.1f} MB)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
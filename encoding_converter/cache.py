@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""缓存：按 (码位, 编码) 缓存的单字符编码结果，以及按字节数限制的响应结果缓存"""
+
+import threading
+from collections import OrderedDict
+
+# 默认缓存条目上限
+DEFAULT_CACHE_SIZE = 65536
+# 响应结果缓存默认占用上限
+DEFAULT_RESULT_CACHE_BYTES = 64 * 1024 * 1024
+
+_MISSING = object()
+
+
+class CharEncodingCache:
+    """有界 LRU 缓存：(codepoint, encoding) -> compute(char, encoding) 的结果
+
+    缓存值在多个请求/多次按键之间共享，调用方只能读取，不能修改。
+    """
+
+    def __init__(self, compute, maxsize=DEFAULT_CACHE_SIZE):
+        self._compute = compute
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, char, encoding):
+        """查询单个字符的编码结果，未命中时计算并写入缓存"""
+        key = (ord(char), encoding)
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is not _MISSING:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        value = self._compute(char, encoding)
+        with self._lock:
+            self._data[key] = value
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def clear(self):
+        """清空缓存与统计"""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """返回缓存统计信息"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0
+            }
+
+
+
+class ResultCache:
+    """按总字节数限制的 LRU 缓存：key -> (body, mimetype)
+
+    用于缓存已序列化的响应体，超过 max_bytes 时淘汰最久未使用的条目；
+    单个超过 max_bytes 的响应体不缓存。
+    """
+
+    def __init__(self, max_bytes=DEFAULT_RESULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """返回缓存的 (body, mimetype)，未命中返回 None"""
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, body, mimetype):
+        """写入响应体，必要时淘汰旧条目"""
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.size -= len(old[0])
+            self._data[key] = (body, mimetype)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, (evicted, _) = self._data.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        """清空缓存与统计"""
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """返回缓存统计信息"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._data),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0
+            }
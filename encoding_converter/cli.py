@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""命令行批量转换：递归转换目录树中的文本文件编码
+
+用法示例:
+    python -m encoding_converter ./docs --from gbk --to utf-8
+    python -m encoding_converter ./docs --to utf-8 --output ./docs_utf8 --workers 8
+"""
+
+import argparse
+import codecs
+import fnmatch
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from .detect import TIER_ASCII, TIER_BOM, TIER_UTF8, is_ascii, is_utf8, sample_windows, sniff_bom
+from .scoring import detect_scored
+from .stream import ERROR_HANDLERS
+from .transcode import mapped, transcode_file
+
+# 用于判断目标编码是否兼容 ASCII 的探测字节
+_ASCII_PROBE = bytes(range(0x20, 0x7f)) + b'\t\r\n'
+# 未指定 -p 时只处理这些常见文本文件，避免原地改写压缩包、图片等二进制文件
+TEXT_PATTERNS = (
+    '*.txt', '*.text', '*.md', '*.rst', '*.csv', '*.tsv', '*.log', '*.srt', '*.ass',
+    '*.ini', '*.cfg', '*.conf', '*.properties', '*.json', '*.xml', '*.yaml', '*.yml',
+    '*.html', '*.htm', '*.css', '*.js', '*.ts', '*.sql', '*.sh', '*.bat',
+    '*.py', '*.java', '*.c', '*.h', '*.cpp', '*.hpp', '*.cs', '*.go', '*.rs', '*.php'
+)
+# 自动检测时 chardet 的置信度低于该值则不转换，文件保持原样
+MIN_CONFIDENCE = 0.6
+# 多字节码元的 Unicode 编码
+_WIDE_ENCODINGS = ('utf-16', 'utf-32')
+
+
+def canonical(encoding):
+    """返回编码的规范名称，用于比较两个别名是否为同一编码"""
+    return codecs.lookup(encoding).name
+
+
+def ascii_compatible(encoding):
+    """目标编码对纯 ASCII 文本是否逐字节不变"""
+    try:
+        return _ASCII_PROBE.decode('ascii').encode(encoding) == _ASCII_PROBE
+    except UnicodeEncodeError:
+        return False
+
+
+def is_wide(encoding):
+    """UTF-16/32 的文本本身就含有 NUL 字节，ASCII 字符也不是单字节"""
+    return bool(encoding) and canonical(encoding).startswith(_WIDE_ENCODINGS)
+
+
+def looks_binary(data, source=None):
+    """采样窗口中出现 NUL 字节且没有 UTF-16/32 的 BOM 时视为二进制文件"""
+    if is_wide(source):
+        return False
+    if sniff_bom(bytes(data[:4])):
+        return False
+    return any(b'\0' in window for window in sample_windows(data))
+
+
+def already_target(data, target, source=None):
+    """快速判断文件是否无需转换，返回 (是否跳过, 检测结果)
+
+    二进制文件、检测不出编码或置信度低于 MIN_CONFIDENCE 的文件也跳过，检测结果带 reason 字段。
+    ASCII/UTF-8 的判断按块扫描，不会把整个文件解码到内存。
+    """
+    target_name = canonical(target)
+    if looks_binary(data, source):
+        return True, {'encoding': None, 'tier': None, 'reason': 'binary'}
+    if source:
+        if is_wide(source):
+            return canonical(source) == target_name, {'encoding': source, 'tier': 'given'}
+        if is_ascii(data) and ascii_compatible(target):
+            return True, {'encoding': 'ascii', 'tier': TIER_ASCII}
+        if target_name == 'utf-8' and is_utf8(data):
+            return True, {'encoding': 'utf-8', 'tier': TIER_UTF8}
+        return canonical(source) == target_name, {'encoding': source, 'tier': 'given'}
+
+    # 试解码只在 chardet 给出的范围内纠正（如 GB2312 -> GBK），是否可信仍看 chardet 本身的结果
+    detected = detect_scored(data)
+    if detected['tier'] == TIER_ASCII:
+        return ascii_compatible(target), detected
+    if detected['tier'] not in (TIER_BOM, TIER_UTF8):
+        guess = detected.get('chardet', detected)
+        if guess.get('encoding') is None:
+            return True, dict(detected, reason='undetected')
+        if guess.get('confidence', 0) < MIN_CONFIDENCE:
+            return True, dict(detected, reason='low_confidence')
+    return canonical(detected['encoding']) == target_name, detected
+
+
+def convert_path(src, dst, target, source=None, errors='strict', workers=1):
+    """转换单个文件，dst 与 src 相同时原地转换；返回文件级结果
+
+    转换由 transcode_file 完成：mmap 源文件、按字符边界分块，workers 大于 1 时多进程并行。
+    """
+    result = {'path': str(src), 'bytes': 0, 'status': 'converted'}
+    try:
+        with mapped(src) as data:
+            result['bytes'] = len(data)
+            skip, detected = already_target(data, target, source)
+        result['source_encoding'] = detected.get('encoding')
+        if skip:
+            result['status'] = 'skipped'
+            if detected.get('reason'):
+                result['reason'] = detected['reason']
+            if dst != src:
+                Path(dst).parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(src, dst)
+            return result
+
+        transcode_file(src, dst, target, detected.get('encoding'), errors, workers=workers)
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = str(e)
+    return result
+
+
+def _convert_task(task):
+    """进程池任务入口"""
+    return convert_path(*task)
+
+
+def iter_files(root, patterns, exclude=None):
+    """递归列出匹配的文件，exclude 目录（如镜像输出目录）会被跳过"""
+    root = Path(root)
+    if root.is_file():
+        yield root
+        return
+    exclude = exclude.resolve() if exclude else None
+    for dirpath, dirnames, filenames in os.walk(root):
+        if exclude is not None:
+            dirnames[:] = [d for d in dirnames if (Path(dirpath) / d).resolve() != exclude]
+        for name in sorted(filenames):
+            if any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+                yield Path(dirpath) / name
+
+
+def run(source_dir, target, source=None, output=None, workers=1, patterns=TEXT_PATTERNS,
+        errors='strict', verbose=False):
+    """转换整个目录树，返回汇总统计"""
+    canonical(target)
+    if source:
+        canonical(source)
+    if errors not in ERROR_HANDLERS:
+        raise ValueError(f'不支持的错误处理方式: {errors}')
+
+    root = Path(source_dir)
+    base = root.parent if root.is_file() else root
+    output = Path(output) if output else None
+
+    tasks = []
+    for path in iter_files(root, patterns, exclude=output):
+        dst = output / path.relative_to(base) if output else path
+        tasks.append((str(path), str(dst), target, source, errors))
+
+    start = time.perf_counter()
+    if workers > 1 and len(tasks) == 1:
+        # 只有一个文件时把进程数交给分块转码
+        results = [convert_path(*tasks[0], workers=workers)]
+    elif workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_convert_task, tasks, chunksize=16))
+    else:
+        results = [_convert_task(task) for task in tasks]
+    elapsed = time.perf_counter() - start
+
+    summary = {
+        'files': len(results),
+        'converted': sum(r['status'] == 'converted' for r in results),
+        'skipped': sum(r['status'] == 'skipped' for r in results),
+        'failed': sum(r['status'] == 'error' for r in results),
+        'bytes': sum(r['bytes'] for r in results),
+        'elapsed': elapsed,
+        'results': results
+    }
+    summary['files_per_s'] = summary['files'] / elapsed if elapsed else 0.0
+    summary['mb_per_s'] = summary['bytes'] / 1024 / 1024 / elapsed if elapsed else 0.0
+
+    for r in results:
+        if r['status'] == 'error':
+            print(f"❌ {r['path']}: {r['error']}", file=sys.stderr)
+        elif verbose:
+            print(f"{'✅' if r['status'] == 'converted' else '⏭️ '} {r['path']} "
+                  f"({r.get('reason') or r.get('source_encoding')})")
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m encoding_converter',
+        description='递归转换目录树中文本文件的编码'
+    )
+    parser.add_argument('path', help='要转换的文件或目录')
+    parser.add_argument('--to', dest='target', default='utf-8', help='目标编码（默认 utf-8）')
+    parser.add_argument('--from', dest='source', default=None, help='源编码（缺省时自动检测）')
+    parser.add_argument('-o', '--output', default=None, help='镜像输出目录（缺省时原地转换）')
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1, help='并行进程数')
+    parser.add_argument('-p', '--pattern', action='append', default=None,
+                        help="文件名匹配模式，可重复（默认只处理常见文本文件，'*' 表示所有文件）")
+    parser.add_argument('--errors', default='strict', choices=ERROR_HANDLERS, help='编码错误处理方式')
+    parser.add_argument('-v', '--verbose', action='store_true', help='输出每个文件的处理结果')
+    args = parser.parse_args(argv)
+
+    if not Path(args.path).exists():
+        parser.error(f'路径不存在: {args.path}')
+    try:
+        summary = run(
+            args.path,
+            args.target,
+            source=args.source,
+            output=args.output,
+            workers=max(1, args.workers),
+            patterns=args.pattern or TEXT_PATTERNS,
+            errors=args.errors,
+            verbose=args.verbose
+        )
+    except (LookupError, ValueError) as e:
+        parser.error(str(e))
+
+    print("=" * 60)
+    print(f"📁 文件: {summary['files']}  ✅ 转换: {summary['converted']}  "
+          f"⏭️  跳过: {summary['skipped']}  ❌ 失败: {summary['failed']}")
+    print(f"⏱️  耗时: {summary['elapsed']:.3f}s  "
+          f"🚀 {summary['files_per_s']:.1f} files/s  {summary['mb_per_s']:.2f} MB/s")
+    return 1 if summary['failed'] else 0
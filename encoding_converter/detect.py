@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+"""编码检测：先走 BOM / ASCII / UTF-8 快速判定，都不满足时才交给 chardet"""
+
+import codecs
+
+import chardet
+from chardet.universaldetector import UniversalDetector
+
+# 增量检测达到该置信度即提前停止
+DEFAULT_CONFIDENCE_THRESHOLD = 0.9
+# 增量检测时每次读取的字节数
+DEFAULT_DETECT_CHUNK = 64 * 1024
+# 增量检测最多读取的字节数，达到后以当前结果为准
+DEFAULT_DETECT_MAX_BYTES = 1024 * 1024
+# 交给 chardet 的采样字节数
+DEFAULT_SAMPLE_BYTES = 64 * 1024
+# 采样检测时每个窗口的字节数（开头、中间、末尾各一个）
+DEFAULT_WINDOW_BYTES = 16 * 1024
+# 采样检测返回的候选编码数量
+DEFAULT_TOP_N = 5
+# 只检查了样本时，快速层判定的置信度
+SAMPLED_CONFIDENCE = 0.99
+# 在中间/末尾窗口开头这么多字节内寻找换行作为窗口起点
+_ALIGN_SEARCH = 1024
+# 开头窗口中 NUL 字节的比例不低于这些值时，按 UTF-32 / UTF-16 的码元而不是换行对齐其余窗口
+_UTF32_NUL_RATIO = 0.6
+_UTF16_NUL_RATIO = 0.2
+
+# 判定层级
+TIER_BOM = 'bom'
+TIER_ASCII = 'ascii'
+TIER_UTF8 = 'utf-8'
+TIER_CHARDET = 'chardet'
+
+# UTF-32 的 BOM 以 UTF-16 LE 的 BOM 开头，必须先检查
+_BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+
+def _result(encoding, tier, confidence=1.0, language=''):
+    return {
+        'encoding': encoding,
+        'confidence': confidence,
+        'language': language,
+        'tier': tier
+    }
+
+
+def sniff_bom(head):
+    """根据开头的字节识别 BOM，没有 BOM 时返回None"""
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    return None
+
+
+def _iter_buffer(data, chunk_bytes=DEFAULT_DETECT_CHUNK):
+    """把 bytes/mmap/memoryview 按块切成 bytes，内存占用只与块大小有关"""
+    for start in range(0, len(data), chunk_bytes):
+        chunk = data[start:start + chunk_bytes]
+        yield chunk if isinstance(chunk, bytes) else bytes(chunk)
+
+
+def is_ascii(data):
+    """判断是否为纯 ASCII，同时支持 bytes 与 mmap/memoryview 等缓冲区"""
+    if isinstance(data, (bytes, bytearray)):
+        return data.isascii()
+    return all(chunk.isascii() for chunk in _iter_buffer(data))
+
+
+def is_utf8(data):
+    """严格校验是否为合法的 UTF-8，按块增量解码，不会生成整段文本"""
+    decoder = codecs.getincrementaldecoder('utf-8')('strict')
+    try:
+        for chunk in _iter_buffer(data):
+            decoder.decode(chunk)
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def detect_bytes(data, sample_bytes=DEFAULT_SAMPLE_BYTES):
+    """分层检测一段字节的编码
+
+    依次尝试 BOM、纯 ASCII、严格 UTF-8，均不满足时才对前 sample_bytes 字节调用 chardet。
+    返回值在 chardet 结果的基础上增加 tier 字段，表示由哪一层做出判定。
+    data 可以是 bytes，也可以是 mmap/memoryview 等缓冲区。
+    """
+    encoding = sniff_bom(bytes(data[:4]))
+    if encoding:
+        return _result(encoding, TIER_BOM)
+    if is_ascii(data):
+        return _result('ascii', TIER_ASCII)
+    if is_utf8(data):
+        return _result('utf-8', TIER_UTF8)
+
+    detected = chardet.detect(bytes(data[:sample_bytes]))
+    return _result(
+        detected.get('encoding'),
+        TIER_CHARDET,
+        detected.get('confidence', 0),
+        detected.get('language')
+    )
+
+
+def detect_stream(fileobj, threshold=DEFAULT_CONFIDENCE_THRESHOLD,
+                  chunk_bytes=DEFAULT_DETECT_CHUNK, max_bytes=DEFAULT_DETECT_MAX_BYTES):
+    """逐块把文件喂给 UniversalDetector，置信度超过阈值或读满 max_bytes 即停止
+
+    返回 chardet 的结果字典，并附加 bytes_examined（实际读取的字节数）。
+    调用结束后文件位置不确定，需要的话由调用方自行 seek。
+    """
+    detector = UniversalDetector()
+    examined = 0
+    while not detector.done:
+        if max_bytes is not None:
+            chunk_bytes = min(chunk_bytes, max_bytes - examined)
+            if chunk_bytes <= 0:
+                break
+        data = fileobj.read(chunk_bytes)
+        if not data:
+            break
+        examined += len(data)
+        detector.feed(data)
+        best = max((p.get_confidence() for p in detector.charset_probers), default=0.0)
+        if best >= threshold:
+            break
+
+    result = dict(detector.close())
+    result['bytes_examined'] = examined
+    return result
+
+
+def detect_file(fileobj, threshold=DEFAULT_CONFIDENCE_THRESHOLD,
+                chunk_bytes=DEFAULT_DETECT_CHUNK, max_bytes=DEFAULT_DETECT_MAX_BYTES):
+    """对可 seek 的文件做分层检测，快速层逐块扫描，不会一次读入整个文件
+
+    快速层都不满足时回到开头，交给 detect_stream 做增量 chardet 检测。
+    """
+    start = fileobj.tell()
+    head = fileobj.read(4)
+    encoding = sniff_bom(head)
+    if encoding:
+        result = _result(encoding, TIER_BOM)
+        result['bytes_examined'] = len(head)
+        return result
+
+    fileobj.seek(start)
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='strict')
+    ascii_only = True
+    examined = 0
+    try:
+        while True:
+            data = fileobj.read(chunk_bytes)
+            if not data:
+                decoder.decode(b'', final=True)
+                break
+            examined += len(data)
+            if ascii_only and data.isascii():
+                continue
+            ascii_only = False
+            decoder.decode(data)
+    except UnicodeDecodeError:
+        pass
+    else:
+        result = _result('ascii' if ascii_only else 'utf-8', TIER_ASCII if ascii_only else TIER_UTF8)
+        result['bytes_examined'] = examined
+        return result
+
+    fileobj.seek(start)
+    detected = detect_stream(fileobj, threshold, chunk_bytes, max_bytes)
+    result = _result(
+        detected.get('encoding'),
+        TIER_CHARDET,
+        detected.get('confidence', 0),
+        detected.get('language')
+    )
+    result['bytes_examined'] = examined + detected['bytes_examined']
+    return result
+
+
+def sample_ranges(size, window=DEFAULT_WINDOW_BYTES):
+    """开头、中间、末尾三个采样窗口的 (start, end)；数据不超过三个窗口时整体作为一个窗口"""
+    if size <= 3 * window:
+        return [(0, size)]
+    middle = (size - window) // 2
+    return [(0, window), (middle, middle + window), (size - window, size)]
+
+
+def code_unit(head):
+    """由开头的样本推断码元字节数：UTF-32 为 4，UTF-16 为 2，其余为 1
+
+    有 BOM 时按 BOM 判断；没有 BOM 时按 NUL 字节的比例判断（UTF-16/32 中的 ASCII 字符高位为 0）。
+    """
+    encoding = sniff_bom(head[:4])
+    if encoding in ('utf-16', 'utf-32'):
+        return 4 if encoding == 'utf-32' else 2
+    if not head:
+        return 1
+    ratio = head.count(0) / len(head)
+    if ratio >= _UTF32_NUL_RATIO:
+        return 4
+    return 2 if ratio >= _UTF16_NUL_RATIO else 1
+
+
+def _align_window(chunk, start, unit):
+    """中间/末尾窗口的对齐，避免从多字节字符中间切入
+
+    unit 为 1 时从第一个换行之后开始；UTF-16/32 的换行后面紧跟着高位字节，改为对齐到码元边界。
+    """
+    if unit > 1:
+        return chunk[-start % unit:]
+    newline = chunk.find(b'\n', 0, _ALIGN_SEARCH)
+    return chunk[newline + 1:] if newline >= 0 else chunk
+
+
+def _align_windows(chunks, ranges):
+    """按开头窗口推断的码元对齐其余窗口"""
+    unit = code_unit(chunks[0]) if chunks else 1
+    return [
+        chunk if i == 0 else _align_window(chunk, start, unit)
+        for i, (chunk, (start, _)) in enumerate(zip(chunks, ranges))
+    ]
+
+
+def sample_windows(data, window=DEFAULT_WINDOW_BYTES):
+    """从 bytes/mmap 等缓冲区取出采样窗口"""
+    ranges = sample_ranges(len(data), window)
+    return _align_windows([bytes(data[start:end]) for start, end in ranges], ranges)
+
+
+def _read_exact(fileobj, size):
+    """读取 size 个字节，流提前结束时返回已读到的部分"""
+    parts = []
+    while size > 0:
+        data = fileobj.read(min(size, DEFAULT_DETECT_CHUNK))
+        if not data:
+            break
+        parts.append(data)
+        size -= len(data)
+    return b''.join(parts)
+
+
+def read_windows(fileobj, size, window=DEFAULT_WINDOW_BYTES):
+    """从文件或请求流读取采样窗口；不可 seek 的流顺序读取并丢弃窗口之间的数据"""
+    seekable = fileobj.seekable() if hasattr(fileobj, 'seekable') else False
+    base = fileobj.tell() if seekable else 0
+    position = 0
+    ranges = sample_ranges(size, window)
+    chunks = []
+    for start, end in ranges:
+        if seekable:
+            fileobj.seek(base + start)
+        else:
+            _read_exact(fileobj, start - position)
+        chunk = _read_exact(fileobj, end - start)
+        position = start + len(chunk)
+        chunks.append(chunk)
+    return _align_windows(chunks, ranges)
+
+
+def _window_is_utf8(chunk, leading, final):
+    """窗口是否为合法 UTF-8；非开头窗口允许以续字节开头，非末尾窗口允许截断的字符"""
+    start = 0
+    if not leading:
+        while start < min(3, len(chunk)) and 0x80 <= chunk[start] < 0xC0:
+            start += 1
+    try:
+        codecs.getincrementaldecoder('utf-8')('strict').decode(chunk[start:], final)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def _candidate(encoding, confidence, language=''):
+    return {
+        'encoding': encoding,
+        'confidence': confidence,
+        'language': language
+    }
+
+
+def rank_windows(windows, top_n=DEFAULT_TOP_N, complete=False):
+    """对采样窗口做分层检测，返回 (tier, 按置信度排序的候选列表)
+
+    complete 表示窗口就是全部数据；否则快速层只看到了样本，置信度记为 SAMPLED_CONFIDENCE。
+    """
+    head = windows[0] if windows else b''
+    encoding = sniff_bom(head[:4])
+    if encoding:
+        return TIER_BOM, [_candidate(encoding, 1.0)]
+
+    confidence = 1.0 if complete else SAMPLED_CONFIDENCE
+    # 大量 NUL 的样本是没有 BOM 的 UTF-16/32，虽然字节都在 ASCII 范围内，也不走快速层
+    unit = code_unit(head)
+    wide = unit > 1
+    if not wide and all(chunk.isascii() for chunk in windows):
+        return TIER_ASCII, [_candidate('ascii', confidence)]
+    last = len(windows) - 1
+    if not wide and all(_window_is_utf8(chunk, i == 0, i == last) for i, chunk in enumerate(windows)):
+        return TIER_UTF8, [_candidate('utf-8', confidence)]
+
+    # detect_all 已按置信度排序，同一编码在不同语言下可能出现多次，只保留第一次
+    candidates = {}
+    if wide:
+        # 拼接时保持码元对齐：每个窗口截到整码元，不插入换行
+        sample = b''.join(chunk[:len(chunk) - len(chunk) % unit] for chunk in windows)
+    else:
+        sample = b'\n'.join(windows)
+    for item in chardet.detect_all(sample, ignore_threshold=True):
+        if item.get('encoding') and item['encoding'] not in candidates:
+            candidates[item['encoding']] = _candidate(
+                item['encoding'], round(item['confidence'], 4), item.get('language') or ''
+            )
+    return TIER_CHARDET, list(candidates.values())[:top_n]
+
+
+def _ranked_result(windows, size, top_n):
+    complete = len(windows) == 1
+    tier, candidates = rank_windows(windows, top_n, complete)
+    best = candidates[0] if candidates else _candidate(None, 0)
+    result = _result(best['encoding'], tier, best['confidence'], best['language'])
+    result['candidates'] = candidates
+    result['bytes_examined'] = sum(map(len, windows))
+    result['sampled'] = not complete
+    result['size'] = size
+    return result
+
+
+def detect_candidates(data, top_n=DEFAULT_TOP_N, window=DEFAULT_WINDOW_BYTES):
+    """只检查开头、中间、末尾三个窗口，返回最可能的编码与排序后的候选列表
+
+    耗时取决于窗口大小而不是数据长度；data 可以是 bytes 或 mmap 等缓冲区。
+    """
+    return _ranked_result(sample_windows(data, window), len(data), top_n)
+
+
+def detect_candidates_stream(fileobj, size, top_n=DEFAULT_TOP_N, window=DEFAULT_WINDOW_BYTES):
+    """与 detect_candidates 相同，数据来自已知长度的文件或请求流"""
+    return _ranked_result(read_windows(fileobj, size, window), size, top_n)
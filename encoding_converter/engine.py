@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""共享的编码转换引擎，供 Flask 后端与两个桌面版共同调用"""
+
+import base64
+import codecs
+import unicodedata
+from array import array
+from functools import lru_cache
+from itertools import accumulate
+
+from .cache import CharEncodingCache
+from .render import render_fields
+from .tables import table_spans
+
+# 支持的编码格式
+SUPPORTED_ENCODINGS = [
+    'utf-8', 'utf-16', 'utf-16le', 'utf-16be', 'utf-32', 'utf-32le', 'utf-32be',
+    'ascii', 'latin-1', 'cp1252', 'iso-8859-1', 'iso-8859-15',
+    'gbk', 'gb2312', 'gb18030', 'big5', 'big5hkscs',
+    'shift_jis', 'cp932', 'euc-jp', 'iso-2022-jp',
+    'euc-kr', 'cp949', 'iso-2022-kr',
+    'koi8-r', 'cp1251', 'iso-8859-5',
+    'cp437', 'cp850', 'cp866'
+]
+
+# 结果中可按需选择的字节表示字段
+BYTE_FIELDS = ('hex', 'base64', 'bytes')
+
+# 每处理多少个字符回调一次进度
+PROGRESS_STEP = 10000
+
+# 单字符编码结果中包含的 BOM 长度：在文本中间的字符不带 BOM
+SIGNATURE_BYTES = {'utf-16': 2, 'utf-32': 4}
+# 有状态编码：转义序列依赖上下文，单独编码的字符与文本中的字节不同
+STATEFUL_ENCODINGS = frozenset({'iso-2022-jp', 'iso-2022-kr'})
+
+
+class ConversionCancelled(Exception):
+    """转换被调用方取消（由进度回调抛出）"""
+
+
+def filter_encodings(encodings):
+    """过滤掉不支持的编码，保持原有顺序并去重"""
+    return [enc for enc in dict.fromkeys(encodings) if enc in SUPPORTED_ENCODINGS]
+
+
+def normalize_fields(fields):
+    """校验客户端请求的字段列表，None 表示全部字段"""
+    if fields is None:
+        return None
+    unknown = [field for field in fields if field not in BYTE_FIELDS]
+    if unknown:
+        raise ValueError(f"不支持的字段: {', '.join(map(str, unknown))}")
+    return frozenset(fields)
+
+
+def normalize_limits(limits=None, bytes_limit=None):
+    """合并各字段的长度上限（按原始字节数），bytes_limit 为 bytes 字段的旧参数"""
+    merged = {} if bytes_limit is None else {'bytes': bytes_limit}
+    for field, limit in (limits or {}).items():
+        if field not in BYTE_FIELDS:
+            raise ValueError(f'不支持的字段: {field}')
+        if limit is not None and (type(limit) is not int or limit < 0):
+            raise ValueError(f'无效的长度上限: {field}={limit}')
+        merged[field] = limit
+    return merged
+
+
+def select_fields(entry, fields):
+    """只保留请求的字节表示字段，success/length/error 始终保留"""
+    if fields is None:
+        return entry
+    return {key: value for key, value in entry.items() if key not in BYTE_FIELDS or key in fields}
+
+
+def encode_char(char, encoding):
+    """编码单个字符，无法编码时返回None"""
+    try:
+        return char.encode(encoding)
+    except (UnicodeEncodeError, LookupError):
+        return None
+
+
+@lru_cache(maxsize=65536)
+def char_name(char):
+    """获取字符的Unicode名称"""
+    return unicodedata.name(char, 'UNKNOWN')
+
+
+def encode_detail(char, encoding):
+    """编码单个字符，返回 (bytes 或 None, 结果明细)"""
+    encoded = encode_char(char, encoding)
+    if encoded is None:
+        return None, {
+            'success': False,
+            'error': 'Cannot encode'
+        }
+    return encoded, encode_entry(encoded)
+
+
+# 进程级共享缓存：后端各请求与桌面版各次按键共用
+char_cache = CharEncodingCache(encode_detail)
+
+
+def char_length(char, encoding):
+    """单个字符在文本中间时占用的字节数（不含 BOM），无法编码时为 0"""
+    encoded = char_cache.lookup(char, encoding)[0]
+    if encoded is None:
+        return 0
+    return len(encoded) - SIGNATURE_BYTES.get(encoding, 0)
+
+
+def encode_spans(text, encoding):
+    """整段文本只编码一次，并记录每个字符在结果中的字节范围
+
+    返回 {'data', 'offsets', 'failed'}：第 i 个字符的字节为
+    data[offsets[i]:offsets[i + 1]]，offsets 为 array('Q')；无法编码的字符
+    不产生字节（范围长度为 0），其位置记录在 failed 中。
+    无状态编码直接整体编码，偏移由每个唯一字符的长度累加得到；
+    有状态编码（iso-2022-*）用增量编码器逐字符编码，转义序列计入触发它的字符，
+    结尾切回 ASCII 的序列位于 offsets[-1] 之后。
+    构建了码位查找表（tables 模块）的传统编码直接查表，不再逐字符查询缓存。
+    """
+    if encoding in STATEFUL_ENCODINGS:
+        encoder = codecs.getincrementalencoder(encoding)(errors='ignore')
+        pieces = [encoder.encode(char) for char in text]
+        tail = encoder.encode('', final=True)
+        offsets = array('Q', accumulate(map(len, pieces), initial=0))
+        failed = [i for i, piece in enumerate(pieces) if not piece]
+        return {'data': b''.join(pieces) + tail, 'offsets': offsets, 'failed': failed}
+
+    spans = table_spans(text, encoding)
+    if spans is not None:
+        return spans
+
+    table = {char: char_length(char, encoding) for char in set(text)}
+    unencodable = {char for char, length in table.items() if not length}
+    signature = SIGNATURE_BYTES.get(encoding, 0) if text else 0
+    return {
+        'data': text.encode(encoding, errors='ignore' if unencodable else 'strict'),
+        'offsets': array('Q', accumulate(map(table.__getitem__, text), initial=signature)),
+        'failed': [i for i, char in enumerate(text) if char in unencodable] if unencodable else []
+    }
+
+
+def convert_columns(text, encodings, char_limit=None):
+    """批量转换：返回按编码分列的结果
+
+    同一字符在每种编码下只查询一次共享缓存，再按位置展开为列：
+    columns[encoding] 是与 chars 等长的列表，元素为 bytes（失败时为None）。
+    """
+    chars = text if char_limit is None else text[:char_limit]
+    encodings = filter_encodings(encodings)
+    unique_chars = dict.fromkeys(chars)
+
+    columns = {}
+    for encoding in encodings:
+        table = {char: char_cache.lookup(char, encoding)[0] for char in unique_chars}
+        columns[encoding] = [table[char] for char in chars]
+
+    return {
+        'chars': chars,
+        'encodings': encodings,
+        'columns': columns
+    }
+
+
+def encode_entry(encoded):
+    """把编码后的字节转换为前端使用的结果结构"""
+    result = {'success': True}
+    result.update(render_fields(encoded)[0])
+    result['length'] = len(encoded)
+    return result
+
+
+def encode_overall(text, encoding, bytes_limit=None, fields=None, limits=None):
+    """整体编码一段文本，只生成 fields 中请求的字节表示"""
+    try:
+        encoded = text.encode(encoding)
+    except (UnicodeEncodeError, LookupError):
+        return {
+            'success': False,
+            'error': 'Cannot encode entire text'
+        }
+    return overall_entry(encoded, bytes_limit, fields, limits)
+
+
+def overall_entry(encoded, bytes_limit=None, fields=None, limits=None):
+    """把整体编码后的字节转换为结果结构
+
+    limits 为各字段的长度上限（见 normalize_limits），被截断的字段列在 truncated 中。
+    """
+    rendered, truncated = render_fields(encoded, fields, normalize_limits(limits, bytes_limit))
+    result = {'success': True}
+    result.update(rendered)
+    if truncated:
+        result['truncated'] = truncated
+    result['length'] = len(encoded)
+    result['size_mb'] = round(len(encoded) / 1024 / 1024, 4)
+    return result
+
+
+def text_stats(text):
+    """文本的基础统计信息"""
+    return {
+        'length': len(text),
+        'byte_count_utf8': len(text.encode('utf-8')),
+        'unique_chars': len(set(text)),
+        'line_count': text.count('\n') + 1 if text else 0
+    }
+
+
+def perform_conversion(text, encodings, char_limit=None, bytes_limit=None, fields=None,
+                       progress=None, single_pass=False, limits=None):
+    """执行编码转换，返回与原有接口兼容的结果结构
+
+    char_limit 限制逐字符明细的数量，bytes_limit 限制整体结果中 bytes 列表的长度，
+    limits 按字段限制整体结果渲染的字节数（如 {'hex': 65536}），
+    fields 选择返回哪些字节表示（hex/base64/bytes，默认全部）。
+    progress(done, total) 每处理 PROGRESS_STEP 个字符回调一次，可抛出 ConversionCancelled 中止转换。
+    编码明细来自共享缓存（只读），重复字符不会重复计算 hex/base64。
+
+    single_pass 为 True 时每种编码只编码一次（见 encode_spans），逐字符字节取自整体结果：
+    utf-16/utf-32 的字符不再各带一个 BOM，iso-2022-* 的转义序列与整体编码一致。
+    """
+    limits = normalize_limits(limits, bytes_limit)
+    if single_pass:
+        return _single_pass_conversion(text, encodings, char_limit, limits, fields, progress)
+
+    chars = text if char_limit is None else text[:char_limit]
+    encodings = filter_encodings(encodings)
+    fields = normalize_fields(fields)
+
+    results = {
+        'characters': [],
+        'overall': {},
+        'stats': text_stats(text)
+    }
+
+    # 每个唯一字符只组装一次明细
+    details = {}
+    for char in dict.fromkeys(chars):
+        char_encodings = {
+            encoding: select_fields(char_cache.lookup(char, encoding)[1], fields)
+            for encoding in encodings
+        }
+        details[char] = (f'U+{ord(char):04X}', char_name(char), char_encodings)
+
+    total = len(chars)
+    characters = results['characters']
+    for i, char in enumerate(chars):
+        if progress is not None and i % PROGRESS_STEP == 0:
+            progress(i, total)
+        unicode_code, name, char_encodings = details[char]
+        characters.append({
+            'char': char,
+            'unicode': unicode_code,
+            'unicode_name': name,
+            'position': i,
+            'encodings': char_encodings
+        })
+
+    # 整体编码
+    for encoding in encodings:
+        results['overall'][encoding] = encode_overall(text, encoding, fields=fields, limits=limits)
+
+    if progress is not None:
+        progress(total, total)
+    return results
+
+
+def _single_pass_conversion(text, encodings, char_limit, limits, fields, progress):
+    """perform_conversion 的单次编码模式
+
+    无状态编码的字符在任何位置字节都相同，明细按唯一字符生成（去掉 BOM）；
+    只有有状态编码需要按位置从整体结果中切出每个字符的字节。
+    """
+    chars = text if char_limit is None else text[:char_limit]
+    encodings = filter_encodings(encodings)
+    fields = normalize_fields(fields)
+    failure = {'success': False, 'error': 'Cannot encode'}
+
+    results = {
+        'characters': [],
+        'overall': {},
+        'stats': text_stats(text)
+    }
+
+    stateful_columns = {}
+    for encoding in encodings:
+        if encoding in STATEFUL_ENCODINGS:
+            spans = encode_spans(text, encoding)
+            data, offsets = spans['data'], spans['offsets']
+            failed_at = spans['failed'][0] if spans['failed'] else None
+            # 相同字节的明细只生成一次
+            entries = {}
+            column = []
+            for i in range(len(chars)):
+                piece = data[offsets[i]:offsets[i + 1]]
+                entry = entries.get(piece)
+                if entry is None:
+                    entry = entries[piece] = select_fields(encode_entry(piece), fields) if piece else failure
+                column.append(entry)
+            stateful_columns[encoding] = column
+        else:
+            try:
+                data, failed_at = text.encode(encoding), None
+            except UnicodeEncodeError as e:
+                data, failed_at = None, e.start
+
+        if failed_at is None:
+            results['overall'][encoding] = overall_entry(data, fields=fields, limits=limits)
+        else:
+            results['overall'][encoding] = {
+                'success': False,
+                'error': 'Cannot encode entire text',
+                'position': failed_at
+            }
+
+    # 无状态编码：每个唯一字符只组装一次明细
+    details = {}
+    for char in dict.fromkeys(chars):
+        char_encodings = {}
+        for encoding in encodings:
+            if encoding in stateful_columns:
+                continue
+            encoded, entry = char_cache.lookup(char, encoding)
+            signature = SIGNATURE_BYTES.get(encoding)
+            if encoded is not None and signature:
+                entry = encode_entry(encoded[signature:])
+            char_encodings[encoding] = select_fields(entry, fields)
+        details[char] = (f'U+{ord(char):04X}', char_name(char), char_encodings)
+
+    total = len(chars)
+    characters = results['characters']
+    for i, char in enumerate(chars):
+        if progress is not None and i % PROGRESS_STEP == 0:
+            progress(i, total)
+        unicode_code, name, char_encodings = details[char]
+        if stateful_columns:
+            char_encodings = {
+                encoding: stateful_columns[encoding][i] if encoding in stateful_columns else char_encodings[encoding]
+                for encoding in encodings
+            }
+        characters.append({
+            'char': char,
+            'unicode': unicode_code,
+            'unicode_name': name,
+            'position': i,
+            'encodings': char_encodings
+        })
+
+    if progress is not None:
+        progress(total, total)
+    return results
+
+
+def convert_columnar(text, encodings, char_limit=None, binary=True):
+    """紧凑的列式结果：每种编码一个字节块加偏移数组
+
+    encodings[enc]['offsets'] 长度为字符数 + 1，第 i 个字符的字节为
+    data[offsets[i]:offsets[i + 1]]；无法编码的字符长度为 0，位置记录在 failed 中。
+    字节取自整体编码（encode_spans），不含 BOM，有状态编码的转义序列与整体一致。
+    binary 为 False 时字节块以 base64 字符串返回，便于 JSON 序列化。
+    """
+    chars = text if char_limit is None else text[:char_limit]
+    encodings = filter_encodings(encodings)
+
+    def blob(data):
+        return data if binary else base64.b64encode(data).decode('ascii')
+
+    # 每种编码只编码一次：逐字符字节块就是整体结果的前缀
+    columns = {}
+    overall = {}
+    for encoding in encodings:
+        spans = encode_spans(text, encoding)
+        data, offsets = spans['data'], spans['offsets']
+        start, end = offsets[0], offsets[len(chars)]
+        columns[encoding] = {
+            'offsets': [offset - start for offset in offsets[:len(chars) + 1]],
+            'data': blob(data[start:end]),
+            'failed': [i for i in spans['failed'] if i < len(chars)]
+        }
+        if spans['failed']:
+            overall[encoding] = {
+                'success': False,
+                'error': 'Cannot encode entire text'
+            }
+        else:
+            overall[encoding] = {
+                'success': True,
+                'length': len(data),
+                'data': blob(data)
+            }
+
+    unique_chars = ''.join(dict.fromkeys(chars))
+    return {
+        'format': 'columnar',
+        'chars': chars,
+        'unique_chars': unique_chars,
+        'unicode_names': [char_name(char) for char in unique_chars],
+        'encodings': columns,
+        'overall': overall,
+        'stats': text_stats(text)
+    }
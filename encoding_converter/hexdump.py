@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""十六进制查看器的共享逻辑：按行格式化、偏移解析与字节查找
+
+桌面版只渲染可见的行，这里的函数都只处理请求的那一段字节。
+"""
+
+# 每行显示的字节数
+BYTES_PER_ROW = 16
+
+# 行内各部分的起始列：偏移 8 位 + 2 个空格，前 8 个字节后多一个空格
+HEX_COLUMN = 10
+ASCII_COLUMN = HEX_COLUMN + BYTES_PER_ROW * 3 + 3
+
+# 可打印 ASCII 原样显示，其余字节显示为 '.'
+_PRINTABLE = bytes(b if 0x20 <= b < 0x7f else ord('.') for b in range(256))
+
+
+def row_count(size):
+    """size 个字节需要的行数"""
+    return (size + BYTES_PER_ROW - 1) // BYTES_PER_ROW
+
+
+def byte_column(index):
+    """一行中第 index 个字节的十六进制在行内的起始列"""
+    return HEX_COLUMN + index * 3 + (1 if index >= BYTES_PER_ROW // 2 else 0)
+
+
+def format_row(data, row):
+    """格式化第 row 行：偏移 / 十六进制 / ASCII，与 hexdump -C 相同"""
+    offset = row * BYTES_PER_ROW
+    chunk = bytes(data[offset:offset + BYTES_PER_ROW])
+    half = BYTES_PER_ROW // 2
+    left = chunk[:half].hex(' ').upper()
+    right = chunk[half:].hex(' ').upper()
+    ascii_part = chunk.translate(_PRINTABLE).decode('ascii')
+    return f'{offset:08X}  {left:<{half * 3 - 1}}  {right:<{half * 3 - 1}}  |{ascii_part}|'
+
+
+def format_rows(data, first_row, count):
+    """格式化从 first_row 开始的至多 count 行"""
+    last_row = min(first_row + count, row_count(len(data)))
+    return [format_row(data, row) for row in range(max(0, first_row), last_row)]
+
+
+def parse_offset(value):
+    """解析跳转偏移：0x 前缀或 h 后缀为十六进制，否则为十进制"""
+    value = value.strip().lower()
+    if value.startswith('0x'):
+        offset = int(value[2:], 16)
+    elif value.endswith('h'):
+        offset = int(value[:-1], 16)
+    else:
+        offset = int(value, 10)
+    if offset < 0:
+        raise ValueError(f'偏移不能为负数: {value}')
+    return offset
+
+
+def parse_hex_bytes(value):
+    """解析要查找的字节，如 'E4 BD A0'、'e4bda0'、'0xE4,0xBD'"""
+    cleaned = value.replace(',', ' ').replace('0x', ' ').replace('0X', ' ')
+    data = bytes.fromhex(''.join(cleaned.split()))
+    if not data:
+        raise ValueError('请输入要查找的字节')
+    return data
+
+
+def find_bytes(data, pattern, start=0):
+    """从 start 开始查找 pattern，到末尾仍未找到时从头继续，找不到返回 -1"""
+    position = data.find(pattern, start)
+    if position < 0 and start > 0:
+        position = data.find(pattern, 0, start + len(pattern) - 1)
+    return position
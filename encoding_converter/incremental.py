@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""增量转换：编辑后只重新计算改动区域的逐字符结果
+
+每种编码保存一个逐字符字节长度数组，整体编码长度与字节偏移由它累加得到，
+未改动的部分不会重新编码。
+"""
+
+from array import array
+from collections import Counter
+from itertools import accumulate
+
+from .engine import PROGRESS_STEP, SIGNATURE_BYTES, STATEFUL_ENCODINGS, char_cache, char_length
+from .engine import char_name, filter_encodings, normalize_fields, perform_conversion, select_fields
+from .tables import table_lengths
+
+# 比较新旧文本时每次比较的块大小
+DIFF_BLOCK = 4096
+
+
+def _common_prefix(a, b, limit):
+    """a、b 前 limit 个字符中相同前缀的长度"""
+    i = 0
+    while i < limit:
+        step = min(DIFF_BLOCK, limit - i)
+        if a[i:i + step] != b[i:i + step]:
+            break
+        i += step
+    while i < limit and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def _common_suffix(a, b, limit):
+    """a、b 末尾相同部分的长度，最多 limit 个字符"""
+    i = 0
+    len_a, len_b = len(a), len(b)
+    while i < limit:
+        step = min(DIFF_BLOCK, limit - i)
+        if a[len_a - i - step:len_a - i] != b[len_b - i - step:len_b - i]:
+            break
+        i += step
+    while i < limit and a[len_a - i - 1] == b[len_b - i - 1]:
+        i += 1
+    return i
+
+
+def text_change(old, new):
+    """比较新旧文本，返回 (position, removed, added)
+
+    表示从 position 起删除 removed 个字符，再插入字符串 added。
+    """
+    limit = min(len(old), len(new))
+    prefix = _common_prefix(old, new, limit)
+    suffix = _common_suffix(old, new, limit - prefix)
+    return prefix, len(old) - prefix - suffix, new[prefix:len(new) - suffix]
+
+
+def _lengths(text, encoding):
+    """一段文本的逐字符字节长度数组，有查找表时直接查表，否则每个唯一字符只查询一次缓存"""
+    lengths = table_lengths(text, encoding)
+    if lengths is not None:
+        return array('B', lengths.tobytes())
+    table = {char: char_length(char, encoding) for char in set(text)}
+    return array('B', map(table.__getitem__, text))
+
+
+class IncrementalConversion:
+    """可按编辑打补丁的转换状态
+
+    apply_change(position, removed, added) 只重新计算插入的字符，
+    统计信息、整体长度与字节偏移随之更新，无需重新编码整段文本。
+    """
+
+    def __init__(self, text='', encodings=(), progress=None):
+        self.encodings = filter_encodings(encodings)
+        self.reset(text, progress)
+
+    def reset(self, text, progress=None):
+        """从头计算整段文本；progress(done, total) 可抛出 ConversionCancelled 中止"""
+        self.text = text
+        self.char_counts = Counter(text)
+        self.line_breaks = text.count('\n')
+        self.utf8_bytes = len(text.encode('utf-8'))
+        self.lengths = {encoding: array('B') for encoding in self.encodings}
+
+        total = len(text)
+        for start in range(0, total, PROGRESS_STEP):
+            if progress is not None:
+                progress(start, total)
+            chunk = text[start:start + PROGRESS_STEP]
+            for encoding, lengths in self.lengths.items():
+                lengths.extend(_lengths(chunk, encoding))
+
+        self.totals = {encoding: sum(lengths) for encoding, lengths in self.lengths.items()}
+        self.failures = {encoding: lengths.count(0) for encoding, lengths in self.lengths.items()}
+        # offsets[i] 为第 i 个字符之前的字节数，按需从前往后延伸
+        self._offsets = {encoding: array('Q', [0]) for encoding in self.encodings}
+        self._stateful_lengths = {}
+        self._encoded = {}
+        if progress is not None:
+            progress(total, total)
+
+    def apply_change(self, position, removed, added):
+        """从 position 起删除 removed 个字符并插入 added，只重新计算 added 部分"""
+        if position < 0 or removed < 0 or position + removed > len(self.text):
+            raise ValueError(f'编辑范围越界: position={position}, removed={removed}')
+
+        removed_text = self.text[position:position + removed]
+        self.text = self.text[:position] + added + self.text[position + removed:]
+
+        self.char_counts.subtract(removed_text)
+        for char in set(removed_text):
+            if self.char_counts[char] <= 0:
+                del self.char_counts[char]
+        self.char_counts.update(added)
+        self.line_breaks += added.count('\n') - removed_text.count('\n')
+        self.utf8_bytes += len(added.encode('utf-8')) - len(removed_text.encode('utf-8'))
+
+        for encoding, lengths in self.lengths.items():
+            old = lengths[position:position + removed]
+            new = _lengths(added, encoding)
+            lengths[position:position + removed] = new
+            self.totals[encoding] += sum(new) - sum(old)
+            self.failures[encoding] += new.count(0) - old.count(0)
+            # 编辑位置之后的偏移全部失效
+            del self._offsets[encoding][position + 1:]
+        self._stateful_lengths.clear()
+        self._encoded.clear()
+
+    def update(self, text):
+        """与当前文本比较后打补丁，返回 (position, removed, added)"""
+        change = text_change(self.text, text)
+        self.apply_change(*change)
+        return change
+
+    def byte_offset(self, encoding, index):
+        """第 index 个字符在整体编码中的起始字节偏移（含 BOM）
+
+        有状态编码的偏移按单字符长度累加，不含上下文相关的转义序列。
+        """
+        offsets = self._offsets[encoding]
+        valid = len(offsets) - 1
+        if index > valid:
+            running = accumulate(self.lengths[encoding][valid:index], initial=offsets[-1])
+            next(running)
+            offsets.extend(running)
+        signature = SIGNATURE_BYTES.get(encoding, 0) if self.text else 0
+        return offsets[index] + signature
+
+    def byte_span(self, encoding, index):
+        """第 index 个字符的字节范围 (start, end)"""
+        start = self.byte_offset(encoding, index)
+        return start, start + self.lengths[encoding][index]
+
+    def overall(self, encoding):
+        """整体编码的长度信息，不生成字节"""
+        if self.failures[encoding]:
+            return {
+                'success': False,
+                'error': 'Cannot encode entire text',
+                'position': self.lengths[encoding].index(0)
+            }
+        if encoding in STATEFUL_ENCODINGS:
+            # 转义序列无法由逐字符长度推出，重新编码一次并缓存到下次编辑
+            if encoding not in self._stateful_lengths:
+                self._stateful_lengths[encoding] = len(self.text.encode(encoding))
+            length = self._stateful_lengths[encoding]
+        else:
+            length = self.totals[encoding] + (SIGNATURE_BYTES.get(encoding, 0) if self.text else 0)
+        return {
+            'success': True,
+            'length': length,
+            'size_mb': round(length / 1024 / 1024, 4)
+        }
+
+    def encoded(self, encoding):
+        """整体编码后的字节（无法编码的字符以替换字符代替），缓存到下次编辑"""
+        if encoding not in self._encoded:
+            self._encoded[encoding] = self.text.encode(encoding, errors='replace')
+        return self._encoded[encoding]
+
+    def stats(self):
+        """与 text_stats 相同的统计信息，由增量维护的计数得到"""
+        return {
+            'length': len(self.text),
+            'byte_count_utf8': self.utf8_bytes,
+            'unique_chars': len(self.char_counts),
+            'line_count': self.line_breaks + 1 if self.text else 0
+        }
+
+    def summary(self):
+        """不含字节数据的轻量结果：整体长度与统计信息"""
+        return {
+            'overall': {encoding: self.overall(encoding) for encoding in self.encodings},
+            'stats': self.stats()
+        }
+
+    def character(self, index, fields=None):
+        """第 index 个字符的明细，结构与 perform_conversion 的 characters 元素相同"""
+        char = self.text[index]
+        fields = normalize_fields(fields)
+        return {
+            'char': char,
+            'unicode': f'U+{ord(char):04X}',
+            'unicode_name': char_name(char),
+            'position': index,
+            'encodings': {
+                encoding: select_fields(char_cache.lookup(char, encoding)[1], fields)
+                for encoding in self.encodings
+            }
+        }
+
+    def results(self, char_limit=None, bytes_limit=None, fields=None, limits=None):
+        """完整结果（含字节数据），用于导出等需要全部明细的场合"""
+        return perform_conversion(self.text, self.encodings, char_limit, bytes_limit, fields,
+                                  limits=limits)
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""字节表示的渲染：hex/base64/bytes 整块生成，只渲染请求的字段，可分别限制长度
+
+长度上限按原始字节数计算，超出部分不渲染（不先生成完整结果再截断）。
+"""
+
+import base64
+
+try:
+    import numpy as np
+except ImportError:  # numpy 为可选依赖，缺失时用 bytes.hex 生成十六进制
+    np = None
+
+# 字段在结果中的顺序
+FIELD_ORDER = ('hex', 'bytes', 'base64')
+
+# 超过此长度时用 NumPy 查表生成十六进制，较短的数据直接用 bytes.hex
+VECTOR_MIN_BYTES = 64 * 1024
+
+# bytes 列表被截断时追加的标记
+TRUNCATED_MARK = '...'
+
+# 每个字节对应的两个大写十六进制字符，按 uint16 存放以便一次查表
+if np is not None:
+    _HEX_TABLE = np.array(
+        [int.from_bytes(b'%02X' % value, 'little') for value in range(256)], dtype='<u2'
+    )
+
+
+def render_hex(data, limit=None):
+    """大写十六进制字符串，最多渲染前 limit 个字节"""
+    if limit is not None:
+        data = data[:limit]
+    if np is not None and len(data) >= VECTOR_MIN_BYTES:
+        return _HEX_TABLE[np.frombuffer(data, dtype=np.uint8)].tobytes().decode('ascii')
+    return data.hex().upper()
+
+
+def render_base64(data, limit=None):
+    """base64 字符串；截断时按 3 字节对齐，保证前缀仍可解码"""
+    if limit is not None and len(data) > limit:
+        data = data[:limit - limit % 3]
+    return base64.b64encode(data).decode('ascii')
+
+
+def render_bytes(data, limit=None):
+    """字节值列表，截断时末尾追加 '...'"""
+    if limit is not None and len(data) > limit:
+        return list(data[:limit]) + [TRUNCATED_MARK]
+    return list(data)
+
+
+RENDERERS = {
+    'hex': render_hex,
+    'bytes': render_bytes,
+    'base64': render_base64
+}
+
+
+def render_fields(data, fields=None, limits=None):
+    """按请求渲染字节表示，返回 (字段字典, 被截断的字段列表)
+
+    fields 为 None 时渲染全部字段；limits 为 {字段: 最大字节数}，缺省或 None 表示不限制。
+    """
+    rendered = {}
+    truncated = []
+    for field in FIELD_ORDER:
+        if fields is not None and field not in fields:
+            continue
+        limit = limits.get(field) if limits else None
+        rendered[field] = RENDERERS[field](data, limit)
+        if limit is not None and len(data) > limit:
+            truncated.append(field)
+    return rendered, truncated
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""乱码修复：在支持的编码间搜索短的 编码 -> 解码 链，还原被错误解码的文本
+
+例如 GBK 字节被当作 latin-1 读出的 "ÄãºÃ"，按 latin-1 编码再按 gbk 解码即可还原为 "你好"；
+最常见的是 UTF-8 被当作 cp1252 读出的 "GrÃ¶ÃŸe cafÃ©"，按 cp1252 编码再按 utf-8 解码还原为 "Größe café"。
+搜索只在一段样本上进行：先用字符集和首个高位字节做廉价剪枝，
+每层只保留得分最高的几条链继续展开，最后把最佳链应用到全文。
+"""
+
+import codecs
+import re
+from functools import lru_cache
+
+from .engine import STATEFUL_ENCODINGS, SUPPORTED_ENCODINGS
+from .scoring import char_class, plausibility
+
+# 参与搜索的编码：去掉别名、UTF-16/32（乱码中几乎不会出现）与有状态编码
+REPAIR_ENCODINGS = list(dict.fromkeys(
+    codecs.lookup(enc).name for enc in SUPPORTED_ENCODINGS
+    if not enc.startswith(('utf-16', 'utf-32')) and enc not in STATEFUL_ENCODINGS
+))
+
+# 默认与最大的链长度
+DEFAULT_DEPTH = 2
+MAX_DEPTH = 3
+# 每层保留继续展开的链数
+BEAM_WIDTH = 4
+# 搜索所用样本的字符数
+SAMPLE_CHARS = 1024
+# 得分不低于该值的文本视为正常，不做搜索
+PLAUSIBLE_SCORE = 0.95
+# 样本中的非 ASCII 字母少于该数时不做搜索：太短的文本换一种读法往往同样通顺，
+# 只有标点符号（如弯引号、破折号）的文本也不会是乱码
+MIN_LETTERS = 4
+# 修复后的得分至少提高这么多（或达到满分）才采用
+MIN_IMPROVEMENT = 0.1
+# 修复链每多一步的扣分：多步链在大量组合中更容易碰巧得到高分
+STEP_PENALTY = 0.1
+# 返回的候选数量
+DEFAULT_CANDIDATES = 5
+# 每个紧贴 ASCII 字母的非拉丁字符的扣分
+GLUED_PENALTY = 0.5
+# 每对 UTF-8 误读特征字符（见 _MOJIBAKE）的扣分，按其占非 ASCII 字符的比例计
+MOJIBAKE_PENALTY = 1.0
+
+_HIGH_BYTE = re.compile(rb'[\x80-\xff]')
+_NON_ASCII = re.compile(r'[^\x00-\x7f]')
+_GLUED = re.compile(r'(?<=[A-Za-z])[^\x00-\x7f]|[^\x00-\x7f](?=[A-Za-z])')
+# char_class 中不属于字母的类别；可以与 ASCII 字母相连的还有拉丁字母
+_NON_LETTER = frozenset({'punct', 'space', 'symbol', 'other'})
+_LATIN_LIKE = _NON_LETTER | {'latin'}
+# UTF-8 双字节字符的首字节（0xC2~0xDF）按 latin-1/cp1252 读出后，紧跟着续字节（0x80~0xBF）读出的字符，
+# 如 "Ã©"、"Â£"：正常文本中几乎不会出现。拉丁字母的相邻扣分很轻，没有这一项时乱码原文也显得通顺
+_CONTINUATION = ''.join(sorted(set(
+    bytes(range(0x80, 0xC0)).decode('latin-1') + bytes(range(0x80, 0xC0)).decode('cp1252', 'ignore')
+)))
+_MOJIBAKE = re.compile('[\u00c2-\u00df][' + re.escape(_CONTINUATION) + ']')
+# 把 UTF-8 误读为单字节文本的编码，_MOJIBAKE 的特征字符对正是由它们产生
+_UTF8_MISREADS = ('iso8859-1', 'cp1252')
+# 同分时优先较常见的编码（REPAIR_ENCODINGS 中靠前的）
+_ENCODING_ORDER = {encoding: i for i, encoding in enumerate(REPAIR_ENCODINGS)}
+
+
+@lru_cache(maxsize=None)
+def lead_bytes(encoding):
+    """该编码中可以作为字符首字节的高位字节集合"""
+    allowed = set()
+    for value in range(0x80, 0x100):
+        decoder = codecs.getincrementaldecoder(encoding)('strict')
+        try:
+            decoder.decode(bytes([value]), False)
+        except UnicodeDecodeError:
+            continue
+        allowed.add(value)
+    return frozenset(allowed)
+
+
+def text_score(text):
+    """文本的可信度：unicodedata 可信度减去粘连惩罚，再乘以非替换字符比例
+
+    非拉丁字母紧贴 ASCII 字母（如 "Gr곢e"、"MЭnchen"）几乎只出现在把拉丁文本错解成其他文字时。
+    """
+    if not text:
+        return 1.0
+    non_ascii = len(_NON_ASCII.findall(text))
+    glued = sum(1 for char in _GLUED.findall(text) if char_class(char)[0] not in _LATIN_LIKE)
+    score = plausibility(text) - GLUED_PENALTY * glued / non_ascii if non_ascii else 1.0
+    return max(0.0, score) * (1 - text.count('\ufffd') / len(text))
+
+
+def misread_score(text):
+    """text_score 再减去 UTF-8 误读特征（"Ã¶"、"Â£" 等字符对）的惩罚，用于判断原文是否需要修复
+
+    拉丁字母的相邻扣分很轻，只看 text_score 时 UTF-8 被当作 cp1252 读出的原文也显得通顺。
+    搜索中仍用 text_score：多重乱码剥掉一层后的中间结果同样带有这些字符对，不能因此被剪掉。
+    """
+    pairs = len(_MOJIBAKE.findall(text))
+    if not pairs:
+        return text_score(text)
+    non_ascii = len(_NON_ASCII.findall(text))
+    return max(0.0, text_score(text) - MOJIBAKE_PENALTY * 2 * pairs / non_ascii)
+
+
+@lru_cache(maxsize=64)
+def _charset(text):
+    """文本中出现过的非 ASCII 字符"""
+    return ''.join(set(_NON_ASCII.findall(text)))
+
+
+@lru_cache(maxsize=4096)
+def repair_step(text, encode_as, decode_as):
+    """一步修复：按 encode_as 编码、再按 decode_as 解码，不适用时返回 None
+
+    结果按 (文本, 编码对) 缓存，同一段样本的重复搜索与多层展开都直接命中。
+    """
+    charset = _charset(text)
+    if not charset:
+        return None
+    # 廉价剪枝：先只编码出现过的非 ASCII 字符。错误解码得到的每个字符最多来自两个字节，
+    # 平均超过两个字节（如 gb18030 的四字节序列、中文的 UTF-8 编码）的不会是乱码的来源
+    try:
+        encoded = charset.encode(encode_as)
+    except UnicodeEncodeError:
+        return None
+    if len(encoded) > 2 * len(charset):
+        return None
+    data = text.encode(encode_as)
+    match = _HIGH_BYTE.search(data)
+    if match is None or data[match.start()] not in lead_bytes(decode_as):
+        return None
+    try:
+        repaired = data.decode(decode_as)
+    except UnicodeDecodeError:
+        return None
+    return None if repaired == text else repaired
+
+
+def apply_chain(text, chain):
+    """把修复链依次应用到文本，任一步不适用时返回 None"""
+    for encode_as, decode_as in chain:
+        try:
+            text = text.encode(encode_as).decode(decode_as)
+        except UnicodeError:
+            return None
+    return text
+
+
+def _rank(item):
+    """得分高者优先；同分时取字符数少者（乱码把多字节字符拆成了多个字符），再取短链，
+    最后取所用编码较常见的（如 cp1252 与 iso8859-15 都能还原时取 cp1252）"""
+    score, chain, repaired = item
+    return -score, len(repaired), len(chain), [_ENCODING_ORDER.get(enc, len(_ENCODING_ORDER))
+                                              for step in chain for enc in step]
+
+
+def search_repairs(text, max_depth=DEFAULT_DEPTH, encodings=None):
+    """在 text 上搜索修复链，返回 (原文得分, [(得分, 链, 修复结果)]，按得分从高到低)
+
+    得分已扣除链长惩罚。每层对当前保留的每条链尝试所有编码对，只有得分高于原文的前 BEAM_WIDTH 条
+    （另加最佳的 UTF-8 解码）继续展开。
+    """
+    encodings = REPAIR_ENCODINGS if encodings is None else encodings
+    base = text_score(text)
+    frontier = [((), text)]
+    seen = {text}
+    found = []
+    for depth in range(max_depth):
+        expanded = []
+        for chain, current in frontier:
+            for encode_as in encodings:
+                # UTF-8 严格解码自带校验，非 ASCII 字节几乎不会被错当成 UTF-8 解出，不作为编码一侧
+                if encode_as == 'utf-8':
+                    continue
+                for decode_as in encodings:
+                    if decode_as == encode_as:
+                        continue
+                    repaired = repair_step(current, encode_as, decode_as)
+                    if repaired is None or repaired in seen:
+                        continue
+                    seen.add(repaired)
+                    score = text_score(repaired) - STEP_PENALTY * depth
+                    expanded.append((score, chain + ((encode_as, decode_as),), repaired))
+        expanded.sort(key=_rank)
+        found.extend(expanded)
+        kept = expanded[:BEAM_WIDTH]
+        # UTF-8 能严格解码本身就是强证据，最佳的 UTF-8 展开总是保留（多重乱码常见于 UTF-8）
+        best_utf8 = next((item for item in expanded if item[1][-1][1] == 'utf-8'), None)
+        if best_utf8 is not None and best_utf8 not in kept:
+            kept.append(best_utf8)
+        frontier = [(chain, repaired) for score, chain, repaired in kept if score > base]
+        if not frontier:
+            break
+    found.sort(key=_rank)
+    return base, found
+
+
+def _undoes_misread(chain):
+    """修复链的每一步都是把按 latin-1/cp1252 误读的文本还原为 UTF-8"""
+    return all(encode_as in _UTF8_MISREADS and decode_as == 'utf-8' for encode_as, decode_as in chain)
+
+
+def _rescore(item):
+    """搜索得分换成按 misread_score 计：只剥掉一层、仍带 UTF-8 误读特征的中间结果不应被采用"""
+    score, chain, repaired = item
+    if _MOJIBAKE.search(repaired):
+        score += misread_score(repaired) - text_score(repaired)
+    return score, chain, repaired
+
+
+def _count_letters(text):
+    """非 ASCII 字母（任意文字）的个数"""
+    return sum(1 for char in _NON_ASCII.findall(text) if char_class(char)[0] not in _NON_LETTER)
+
+
+def _sample(text):
+    """从第一个非 ASCII 字符附近取 SAMPLE_CHARS 个字符作为搜索样本"""
+    if len(text) <= SAMPLE_CHARS:
+        return text
+    match = _NON_ASCII.search(text)
+    start = match.start() if match else 0
+    start = max(0, min(start - SAMPLE_CHARS // 8, len(text) - SAMPLE_CHARS))
+    return text[start:start + SAMPLE_CHARS]
+
+
+def repair_text(text, max_depth=DEFAULT_DEPTH, encodings=None, candidates=DEFAULT_CANDIDATES):
+    """修复乱码，返回最可信的结果
+
+    返回 {'text', 'changed', 'chain', 'score', 'original_score', 'candidates'}，
+    chain 为 [{'encode': ..., 'decode': ...}]；没有明显更好的结果时 changed 为 False、text 为原文。
+    """
+    if not 1 <= max_depth <= MAX_DEPTH:
+        raise ValueError(f'max_depth 必须在 1 到 {MAX_DEPTH} 之间')
+    unchanged = {
+        'text': text,
+        'changed': False,
+        'chain': [],
+        'score': None,
+        'original_score': None,
+        'candidates': []
+    }
+    sample = _sample(text)
+    if not _NON_ASCII.search(sample):
+        unchanged['score'] = unchanged['original_score'] = 1.0
+        return unchanged
+
+    original = misread_score(sample)
+    unchanged['score'] = unchanged['original_score'] = round(original, 4)
+    # 字母太少的文本只在带有 UTF-8 误读特征时修复
+    few_letters = _count_letters(sample) < MIN_LETTERS
+    if original >= PLAUSIBLE_SCORE or (few_letters and not _MOJIBAKE.search(sample)):
+        return unchanged
+
+    base, found = search_repairs(sample, max_depth, encodings)
+    found = sorted(map(_rescore, found), key=_rank)
+    listed = [
+        {
+            'chain': [{'encode': encode_as, 'decode': decode_as} for encode_as, decode_as in chain],
+            'score': round(score, 4),
+            'preview': repaired[:80]
+        }
+        for score, chain, repaired in found[:candidates]
+    ]
+    for score, chain, _ in found:
+        # UTF-8 误读特征的惩罚只对还原这种误读的链有意义；其他链仍与 text_score 的原文得分比较，
+        # 除此之外看起来正常的文本只接受还原误读的链，避免部分乱码的文本被换成另一种乱码
+        undoes = _undoes_misread(chain)
+        if not undoes and (few_letters or base >= PLAUSIBLE_SCORE):
+            continue
+        if score < min((original if undoes else base) + MIN_IMPROVEMENT, 1.0):
+            continue
+        repaired = apply_chain(text, chain)
+        if repaired is not None:
+            return {
+                'text': repaired,
+                'changed': True,
+                'chain': [{'encode': encode_as, 'decode': decode_as} for encode_as, decode_as in chain],
+                'score': round(score, 4),
+                'original_score': round(original, 4),
+                'candidates': listed
+            }
+    unchanged['candidates'] = listed
+    return unchanged
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""试解码评分：chardet 拿不准时，用所有支持的编码试解码样本并按可信度排序
+
+每个编码严格解码开头、中间、末尾三个采样窗口，遇到第一个硬错误即淘汰；
+留下的编码按替换字符比例和文字可信度（unicodedata 的类别与名称）打分。
+"""
+
+import codecs
+import unicodedata
+from functools import lru_cache
+
+from .detect import (
+    DEFAULT_TOP_N, DEFAULT_WINDOW_BYTES, TIER_CHARDET, detect_bytes, sample_windows
+)
+from .engine import SUPPORTED_ENCODINGS
+
+TIER_TRIAL = 'trial'
+
+# chardet 在这些编码之间经常拿不准，检测结果属于其中之一时总是做试解码
+AMBIGUOUS_ENCODINGS = frozenset(codecs.lookup(name).name for name in (
+    'gb2312', 'gbk', 'gb18030', 'big5', 'big5hkscs',
+    'shift_jis', 'cp932', 'euc-jp', 'euc-kr', 'cp949'
+))
+# 其他编码的置信度低于该值时也做试解码
+SECOND_OPINION_THRESHOLD = 0.9
+# 试解码的最佳得分比 chardet 结果的得分至少高出这么多才替换 chardet 的结果
+SCORE_MARGIN = 0.05
+# 每个编码最多对这么多个非 ASCII 字符打分
+SCORE_CHARS = 8192
+# 非开头窗口允许跳过的起始字节数（窗口可能从多字节字符中间开始）
+MAX_SKIP_BYTES = 3
+
+# 相邻字符文字不同但属于正常组合的情况（日文汉字与假名混排）
+_COMPATIBLE_SCRIPTS = frozenset({frozenset({'han', 'kana'})})
+# 常用汉字：在这些编码中落在一级字库的行内
+_COMMON_HAN = (('gb2312', 0xB0, 0xD7), ('big5', 0xA4, 0xC6), ('shift_jis', 0x88, 0x98))
+
+
+def _encodes_to(char, encoding):
+    try:
+        return char.encode(encoding)
+    except UnicodeEncodeError:
+        return None
+
+
+def _common_han(char):
+    for encoding, low, high in _COMMON_HAN:
+        encoded = _encodes_to(char, encoding)
+        if encoded and len(encoded) == 2 and low <= encoded[0] <= high:
+            return True
+    return False
+
+
+@lru_cache(maxsize=65536)
+def char_class(char):
+    """非 ASCII 字符的 (文字, 可疑程度 0~1, 大小写)，由 unicodedata 的类别与名称得出"""
+    category = unicodedata.category(char)
+    name = unicodedata.name(char, '')
+    case = 'upper' if category == 'Lu' else 'lower' if category == 'Ll' else None
+
+    if category in ('Cc', 'Cf', 'Cn', 'Co', 'Cs'):
+        return 'other', 1.0, None
+    if name.startswith('CJK UNIFIED IDEOGRAPH'):
+        if not 0x4E00 <= ord(char) <= 0x9FFF:
+            return 'han', 0.6, None
+        return 'han', 0.0 if _common_han(char) else 0.3, None
+    if name.startswith('CJK COMPATIBILITY IDEOGRAPH'):
+        return 'han', 0.6, None
+    if name.startswith('HALFWIDTH KATAKANA'):
+        return 'kana', 0.6, None
+    if name.startswith(('HIRAGANA', 'KATAKANA')):
+        return 'kana', 0.0, None
+    if name.startswith('HANGUL SYLLABLE'):
+        return 'hangul', 0.0 if _encodes_to(char, 'euc-kr') else 0.3, None
+    if name.startswith(('IDEOGRAPHIC', 'FULLWIDTH', 'CJK')) or 0x3000 <= ord(char) <= 0x303F:
+        return 'punct', 0.0, None
+    if category[0] == 'L':
+        return name.split(' ', 1)[0].lower() or 'letter', 0.0, case
+    if category[0] == 'P':
+        return 'punct', 0.1, None
+    if category[0] == 'Z':
+        return 'space', 0.1, None
+    # 符号与组合附加符号在乱码中远比正常文本常见
+    return 'symbol', 0.5, None
+
+
+def plausibility(text):
+    """文本作为自然语言的可信度 0~1，只看前 SCORE_CHARS 个非 ASCII 字符"""
+    suspicion = 0.0
+    counted = 0
+    previous = None
+    # 上一个非 ASCII 字符是汉字且其后只有一个空格
+    spaced_han = False
+    for char in text:
+        if char < '\x80':
+            spaced_han = char == ' ' and previous is not None and previous[0] == 'han'
+            previous = None
+            continue
+        script, weight, case = char_class(char)
+        suspicion += weight
+        if spaced_han and script == 'han':
+            # 中文和日文的汉字之间不用空格分词，按汉字解码的韩文才会这样
+            suspicion += 0.5
+        spaced_han = False
+        if previous is not None:
+            prev_script, _, prev_case = previous
+            if script != prev_script:
+                # 字母之间的文字切换：正常文本很少在词中切换文字
+                if (prev_script not in ('punct', 'space', 'symbol', 'other')
+                        and script not in ('punct', 'space', 'symbol', 'other')
+                        and frozenset({script, prev_script}) not in _COMPATIBLE_SCRIPTS):
+                    suspicion += 0.5
+            elif prev_case == 'lower' and case == 'upper':
+                # 词中的小写后紧跟大写
+                suspicion += 0.3
+            elif script == 'latin':
+                # 带变音符号的拉丁字母在正常文本中很少连续出现
+                suspicion += 0.3
+        previous = (script, weight, case)
+        counted += 1
+        if counted >= SCORE_CHARS:
+            break
+    if not counted:
+        return 1.0
+    return max(0.0, 1.0 - suspicion / counted)
+
+
+def decode_window(chunk, encoding, leading=True, final=True):
+    """严格解码一个窗口，硬错误时返回 None
+
+    非开头的窗口若在前几个字节就出错，视为从多字节字符中间切入，跳过一个字节重试；
+    非末尾的窗口允许以不完整的字符结束。
+    """
+    start = 0
+    while True:
+        decoder = codecs.getincrementaldecoder(encoding)('strict')
+        try:
+            return decoder.decode(chunk[start:], final)
+        except UnicodeDecodeError as e:
+            if leading or start >= MAX_SKIP_BYTES or e.start > MAX_SKIP_BYTES - start:
+                return None
+            start += 1
+        except UnicodeError:
+            # 如 utf-16 缺少 BOM
+            return None
+
+
+def score_encoding(encoding, windows, complete=False):
+    """试解码全部窗口并打分，任一窗口出现硬错误时返回 None"""
+    last = len(windows) - 1
+    texts = []
+    for i, chunk in enumerate(windows):
+        text = decode_window(chunk, encoding, leading=i == 0, final=complete or i == last)
+        if text is None:
+            return None
+        texts.append(text)
+
+    text = '\n'.join(texts)
+    replacement_rate = text.count('\ufffd') / len(text) if text else 0.0
+    plausible = plausibility(text)
+    return {
+        'encoding': encoding,
+        'score': round(plausible * (1 - replacement_rate), 4),
+        'plausibility': round(plausible, 4),
+        'replacement_rate': round(replacement_rate, 4)
+    }
+
+
+def score_encodings(data, encodings=None, window=DEFAULT_WINDOW_BYTES):
+    """用每种编码试解码采样窗口，返回按得分从高到低排列的存活编码
+
+    encodings 默认为 SUPPORTED_ENCODINGS，得分相同时保持列表中的先后顺序。
+    试解码只针对三个采样窗口，在当前线程中逐个进行：解码持有 GIL，放进线程池并不会并行。
+    """
+    encodings = SUPPORTED_ENCODINGS if encodings is None else encodings
+    windows = sample_windows(data, window)
+    complete = len(windows) == 1
+
+    scores = [score_encoding(encoding, windows, complete) for encoding in encodings]
+    survivors = [result for result in scores if result is not None]
+    survivors.sort(key=lambda result: -result['score'])
+    return survivors
+
+
+def _canonical(encoding):
+    try:
+        return codecs.lookup(encoding).name if encoding else None
+    except LookupError:
+        return None
+
+
+def detect_scored(data, top_n=DEFAULT_TOP_N, detected=None):
+    """detect_bytes 加上试解码的第二意见
+
+    只有 chardet 层的结果属于易混淆的东亚编码或置信度不足时才试解码；
+    试解码的最佳编码明显优于 chardet 的结果（或后者无法解码样本）时替换之，tier 为 trial，
+    chardet 原来的结果保留在 chardet 字段中。
+    结果中附加 scores（得分最高的 top_n 个编码）。
+    detected 为调用方已有的分层检测结果（如 detect_file 按块读文件得到的），传入时不再扫描整个 data。
+    """
+    if detected is None:
+        detected = detect_bytes(data)
+    if detected['tier'] != TIER_CHARDET:
+        return detected
+    name = _canonical(detected.get('encoding'))
+    if (name is not None and name not in AMBIGUOUS_ENCODINGS
+            and detected.get('confidence', 0) >= SECOND_OPINION_THRESHOLD):
+        return detected
+
+    scores = score_encodings(data)
+    if not scores:
+        return detected
+    best = scores[0]
+    current = next((result for result in scores if _canonical(result['encoding']) == name), None)
+    if current is None or best['score'] > current['score'] + SCORE_MARGIN:
+        result = {
+            'encoding': best['encoding'],
+            'confidence': best['score'],
+            'language': '',
+            'tier': TIER_TRIAL,
+            'chardet': {'encoding': detected.get('encoding'), 'confidence': detected.get('confidence', 0)}
+        }
+    else:
+        result = dict(detected)
+    result['scores'] = scores[:top_n]
+    return result
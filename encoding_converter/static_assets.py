@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""静态资源服务：预压缩变体、长期缓存与基于 stat 的条件请求
+
+构建时生成 .gz/.br 变体:
+    python -m encoding_converter.static_assets frontend-vue/dist frontend
+"""
+
+import argparse
+import gzip
+import mimetypes
+import os
+import re
+import sys
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+
+from flask import Response, abort, request, send_file
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，缺失时只生成 .gz
+    brotli = None
+
+# Vite 产物中带内容哈希的文件名，如 assets/index-4f1c2d3e.js
+HASHED_ASSET = re.compile(r'(^|/)assets/.+-[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$')
+
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'no-cache'
+
+# 值得预压缩的文件类型
+COMPRESSIBLE_SUFFIXES = ('.js', '.mjs', '.css', '.html', '.svg', '.json', '.txt', '.map', '.wasm')
+# 过小的文件压缩收益不大
+MIN_COMPRESS_SIZE = 1024
+
+# 按优先级排列的预压缩变体：(Content-Encoding, 文件后缀)
+_VARIANTS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _accepted_encodings():
+    """解析 Accept-Encoding，返回客户端接受的编码集合"""
+    return {value for value, quality in request.accept_encodings if quality > 0}
+
+
+def _etag_for(stat, suffix=''):
+    """由 mtime 和大小生成 ETag，无需读取文件内容"""
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}{suffix}"'
+
+
+def _not_modified(etag, stat):
+    """判断条件请求是否可以直接返回 304"""
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or etag in tags or f'W/{etag}' in tags
+
+    if_modified_since = request.headers.get('If-Modified-Since')
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(stat.st_mtime) <= since
+    return False
+
+
+def cache_control_for(filename, immutable_hashed=True):
+    """带哈希的构建产物可永久缓存，其余资源每次用 ETag 校验"""
+    if immutable_hashed and HASHED_ASSET.search(filename.replace('\\', '/')):
+        return IMMUTABLE_CACHE
+    return REVALIDATE_CACHE
+
+
+def send_static(directory, filename, immutable_hashed=True):
+    """发送静态文件，优先使用客户端接受的预压缩变体
+
+    文件不存在时抛出 404，交给各应用的 404 处理（SPA 回退）。
+    """
+    path = safe_join(str(directory), filename)
+    if path is None:
+        abort(404)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        abort(404)
+    if not os.path.isfile(path):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    served_path, served_stat, content_encoding = path, stat, None
+    accepted = _accepted_encodings()
+    for encoding, suffix in _VARIANTS:
+        if encoding not in accepted:
+            continue
+        try:
+            variant_stat = os.stat(path + suffix)
+        except OSError:
+            continue
+        # 变体比原文件旧说明是过期产物，忽略
+        if variant_stat.st_mtime_ns >= stat.st_mtime_ns:
+            served_path, served_stat, content_encoding = path + suffix, variant_stat, encoding
+            break
+
+    etag = _etag_for(stat, f'-{content_encoding}' if content_encoding else '')
+    headers = {
+        'ETag': etag,
+        'Last-Modified': formatdate(stat.st_mtime, usegmt=True),
+        'Cache-Control': cache_control_for(filename, immutable_hashed),
+        'Vary': 'Accept-Encoding'
+    }
+
+    if _not_modified(etag, stat):
+        return Response(status=304, headers=headers)
+
+    response = send_file(served_path, mimetype=mimetype, conditional=False, etag=False,
+                         download_name=os.path.basename(path))
+    response.headers.update(headers)
+    if content_encoding:
+        response.headers['Content-Encoding'] = content_encoding
+    response.content_length = served_stat.st_size
+    return response
+
+
+def compress_file(path, level=9):
+    """为单个文件生成 .gz（以及可用时的 .br）变体，返回生成的文件列表"""
+    path = Path(path)
+    data = path.read_bytes()
+    created = []
+
+    gz_path = path.with_name(path.name + '.gz')
+    # mtime=0 保证同一内容生成的压缩文件字节一致
+    gz_path.write_bytes(gzip.compress(data, compresslevel=level, mtime=0))
+    created.append(gz_path)
+
+    if brotli is not None:
+        br_path = path.with_name(path.name + '.br')
+        br_path.write_bytes(brotli.compress(data, quality=11))
+        created.append(br_path)
+    return created
+
+
+def compress_tree(root, min_size=MIN_COMPRESS_SIZE):
+    """递归为目录中可压缩的文件生成预压缩变体"""
+    created = []
+    for path in sorted(Path(root).rglob('*')):
+        if (path.is_file() and path.suffix.lower() in COMPRESSIBLE_SUFFIXES
+                and path.stat().st_size >= min_size):
+            created.extend(compress_file(path))
+    return created
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='为静态资源生成 .gz/.br 预压缩文件')
+    parser.add_argument('dirs', nargs='+', help='静态资源目录')
+    parser.add_argument('--min-size', type=int, default=MIN_COMPRESS_SIZE, help='最小压缩文件大小')
+    args = parser.parse_args(argv)
+
+    if brotli is None:
+        print("💡 未安装 brotli，只生成 .gz 文件（pip install brotli）")
+    for directory in args.dirs:
+        if not Path(directory).is_dir():
+            print(f"⚠️  跳过不存在的目录: {directory}")
+            continue
+        created = compress_tree(directory, args.min_size)
+        print(f"✅ {directory}: 生成 {len(created)} 个预压缩文件")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
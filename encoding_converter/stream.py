@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""分块流式编码：内存占用只与块大小有关，与输入总长度无关"""
+
+import base64
+import codecs
+import shutil
+import tempfile
+
+from .engine import filter_encodings
+
+# 允许的编码错误处理方式
+ERROR_HANDLERS = ('strict', 'replace', 'ignore', 'backslashreplace', 'xmlcharrefreplace')
+
+# 默认每块字符数
+DEFAULT_CHUNK_CHARS = 64 * 1024
+# 从字节流读取时每次读取的字节数
+DEFAULT_READ_BYTES = 64 * 1024
+# 暂存请求体时超过该大小即落盘
+SPOOL_MAX_MEMORY = 1024 * 1024
+
+# 解码一侧不支持 xmlcharrefreplace：无法解码的字节先替换为 U+FFFD，再交给编码一侧处理
+DECODE_ERRORS = {'xmlcharrefreplace': 'replace'}
+
+
+def iter_text_chunks(text, chunk_chars=DEFAULT_CHUNK_CHARS):
+    """把已在内存中的文本切成若干块"""
+    for start in range(0, len(text), chunk_chars):
+        yield text[start:start + chunk_chars]
+
+
+def spool_stream(stream, read_bytes=DEFAULT_READ_BYTES, max_memory=SPOOL_MAX_MEMORY):
+    """把请求体暂存到临时文件，返回 (已回到开头的文件, 总字节数)"""
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    shutil.copyfileobj(stream, spool, read_bytes)
+    size = spool.tell()
+    spool.seek(0)
+    return spool, size
+
+
+def iter_decoded_chunks(stream, encoding='utf-8', read_bytes=DEFAULT_READ_BYTES, errors='strict'):
+    """从字节流增量解码出文本块，多字节字符跨块时由解码器缓存"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+    while True:
+        data = stream.read(read_bytes)
+        if not data:
+            break
+        text = decoder.decode(data)
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def iter_stream_records(chunks, encodings):
+    """逐块编码，依次产出 start / chunk / end 三类记录
+
+    每种编码使用一个增量编码器，因此 utf-16 的 BOM 只出现在第一块，
+    iso-2022-jp 等有状态编码的转义序列也与整体编码一致。
+    每块的 base64 独立编码，客户端需逐块解码后再拼接字节。
+    某种编码一旦失败即停止输出该编码，并在 end 记录中标明。
+    """
+    encodings = filter_encodings(encodings)
+    encoders = {enc: codecs.getincrementalencoder(enc)() for enc in encodings}
+    totals = {enc: 0 for enc in encodings}
+    errors = {}
+    unique_chars = set()
+    char_count = 0
+    line_count = 0
+    index = 0
+
+    yield {
+        'type': 'start',
+        'encodings': encodings
+    }
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+        unique_chars.update(chunk)
+        line_count += chunk.count('\n')
+
+        record = {
+            'type': 'chunk',
+            'index': index,
+            'offset': char_count,
+            'length': len(chunk),
+            'encodings': {}
+        }
+        for encoding, encoder in encoders.items():
+            if encoding in errors:
+                continue
+            try:
+                encoded = encoder.encode(chunk)
+            except UnicodeEncodeError as e:
+                errors[encoding] = {
+                    'success': False,
+                    'error': 'Cannot encode entire text',
+                    'position': char_count + e.start
+                }
+                record['encodings'][encoding] = errors[encoding]
+                continue
+            totals[encoding] += len(encoded)
+            record['encodings'][encoding] = {
+                'success': True,
+                'hex': encoded.hex().upper(),
+                'base64': base64.b64encode(encoded).decode('ascii'),
+                'length': len(encoded)
+            }
+
+        char_count += len(chunk)
+        index += 1
+        yield record
+
+    overall = {}
+    for encoding, encoder in encoders.items():
+        if encoding in errors:
+            overall[encoding] = errors[encoding]
+            continue
+        # 冲刷有状态编码器（如 iso-2022-jp 需要切回 ASCII）
+        tail = encoder.encode('', final=True)
+        totals[encoding] += len(tail)
+        overall[encoding] = {
+            'success': True,
+            'tail_hex': tail.hex().upper(),
+            'tail_base64': base64.b64encode(tail).decode('ascii'),
+            'length': totals[encoding],
+            'size_mb': round(totals[encoding] / 1024 / 1024, 4)
+        }
+
+    yield {
+        'type': 'end',
+        'chunks': index,
+        'overall': overall,
+        'stats': {
+            'length': char_count,
+            'unique_chars': len(unique_chars),
+            'line_count': line_count + 1 if char_count else 0
+        }
+    }
+
+
+def transcode_errors(errors):
+    """校验错误处理方式，返回 (解码用, 编码用)"""
+    if errors not in ERROR_HANDLERS:
+        raise ValueError(f'不支持的错误处理方式: {errors}')
+    return DECODE_ERRORS.get(errors, errors), errors
+
+
+def iter_reads(stream, read_bytes=DEFAULT_READ_BYTES):
+    """逐块读取字节流直到结束
+
+    流支持 readinto 时复用同一块缓冲区，产出其 memoryview 切片（下一次读取前有效），不为每块复制输入；
+    只有 read 的流（如 gunicorn 交给 WSGI 的原始请求体）逐块产出 read 的结果。
+    """
+    if not hasattr(stream, 'readinto'):
+        while True:
+            data = stream.read(read_bytes)
+            if not data:
+                break
+            yield data
+        return
+    buffer = bytearray(read_bytes)
+    view = memoryview(buffer)
+    while True:
+        count = stream.readinto(buffer)
+        if not count:
+            break
+        yield view[:count]
+
+
+def iter_transcoded_chunks(stream, source_encoding, target_encoding, errors='strict',
+                           read_bytes=DEFAULT_READ_BYTES, first=b''):
+    """从字节流增量转码，逐块产出目标编码的字节
+
+    解码器与编码器各用一个增量实例，多字节字符跨块、utf-16 的 BOM、iso-2022-jp 的转义状态
+    都与整体转换一致。读取方式见 iter_reads。
+    first 为调用方已从流中读出的开头字节（如用于检测编码的样本）。
+    """
+    decode_errors, encode_errors = transcode_errors(errors)
+    decoder = codecs.getincrementaldecoder(source_encoding)(decode_errors)
+    encoder = codecs.getincrementalencoder(target_encoding)(encode_errors)
+    if first:
+        encoded = encoder.encode(decoder.decode(first))
+        if encoded:
+            yield encoded
+    for data in iter_reads(stream, read_bytes):
+        encoded = encoder.encode(decoder.decode(data))
+        if encoded:
+            yield encoded
+    tail = encoder.encode(decoder.decode(b'', final=True), final=True)
+    if tail:
+        yield tail
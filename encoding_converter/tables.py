@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""预编译的码位 -> 字节查找表，逐字符长度与偏移改为 NumPy 向量化查表
+
+每种表编码包含 BMP 全部码位的长度/偏移数组与已分配增补平面码位的稀疏表，
+全部写入一个文件，运行时以 mmap 只读打开，多个工作进程共享同一份页面。
+构建见 build_tables 模块:
+    python -m encoding_converter.build_tables
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import unicodedata
+from array import array
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:  # numpy 为可选依赖，缺失时回退到逐字符缓存查询
+    np = None
+
+MAGIC = b'ECTB'
+FORMAT_VERSION = 1
+# 表文件默认位置，可用环境变量 ENCODING_TABLES_PATH 指定
+DEFAULT_TABLES_PATH = Path(__file__).parent / 'data' / 'codepoint_tables.bin'
+
+BMP_SIZE = 0x10000
+ASTRAL_SIZE = 0x110000 - BMP_SIZE
+
+# 需要查表的传统编码（SUPPORTED_ENCODINGS 的子集）：UTF 系列由算法直接得出，
+# iso-2022-* 依赖上下文，big5hkscs 会把相邻字符组合编码，这些都不查表
+TABLE_ENCODINGS = [
+    'ascii', 'latin-1', 'cp1252', 'iso-8859-1', 'iso-8859-15',
+    'gbk', 'gb2312', 'gb18030', 'big5',
+    'shift_jis', 'cp932', 'euc-jp',
+    'euc-kr', 'cp949',
+    'koi8-r', 'cp1251', 'iso-8859-5',
+    'cp437', 'cp850', 'cp866'
+]
+
+# 表文件中各数组的对齐字节数
+ALIGN = 8
+
+
+def runtime_tag():
+    """编码表依赖 Python 自带的编解码器与 Unicode 数据库版本"""
+    return f'{sys.version_info[0]}.{sys.version_info[1]}/{unicodedata.unidata_version}'
+
+
+class CodepointTables:
+    """以 mmap 打开的查找表文件"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f'不是编码查找表文件: {path}')
+        header_length = struct.unpack_from('<I', self._mmap, len(MAGIC))[0]
+        start = len(MAGIC) + 4
+        header = json.loads(self._mmap[start:start + header_length])
+        if header['version'] != FORMAT_VERSION or header['runtime'] != runtime_tag():
+            raise ValueError(f'编码查找表版本不匹配，请重新构建: {path}')
+
+        self.path = str(path)
+        self.encodings = header['encodings']
+        data_start = -(-(start + header_length) // ALIGN) * ALIGN
+        self._arrays = {
+            name: np.frombuffer(self._mmap, dtype=dtype, count=count, offset=data_start + offset)
+            for name, (offset, dtype, count) in header['arrays'].items()
+        }
+        self._assigned = np.unpackbits(self._arrays['astral_assigned'], count=ASTRAL_SIZE).view(bool)
+
+    def array(self, encoding, name):
+        return self._arrays[f'{encoding}/{name}']
+
+    def lengths(self, text, encoding):
+        """逐字符字节长度（uint8 数组，无法编码为 0）与各字符在 data 中的起点
+
+        文本含有表中没有记录的码位（未分配的增补平面字符）时返回 None。
+        """
+        codepoints = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+        if not len(codepoints) or codepoints.max() < BMP_SIZE:
+            return (self.array(encoding, 'bmp_lengths')[codepoints],
+                    self.array(encoding, 'bmp_offsets')[codepoints])
+
+        astral = codepoints >= BMP_SIZE
+        lengths = np.zeros(len(codepoints), dtype=np.uint8)
+        starts = np.zeros(len(codepoints), dtype=np.uint32)
+        bmp = codepoints[~astral]
+        lengths[~astral] = self.array(encoding, 'bmp_lengths')[bmp]
+        starts[~astral] = self.array(encoding, 'bmp_offsets')[bmp]
+
+        wanted = codepoints[astral]
+        codes = self.array(encoding, 'astral_codes')
+        if not len(codes):
+            if not self._assigned[wanted - BMP_SIZE].all():
+                return None
+            return lengths, starts
+        index = np.minimum(np.searchsorted(codes, wanted), len(codes) - 1)
+        found = codes[index] == wanted
+        if not self._assigned[wanted[~found] - BMP_SIZE].all():
+            return None
+        lengths[astral] = np.where(found, self.array(encoding, 'astral_lengths')[index], 0)
+        starts[astral] = np.where(found, self.array(encoding, 'astral_offsets')[index], 0)
+        return lengths, starts
+
+    def spans(self, text, encoding):
+        """与 encode_spans 相同的结果，字节由查表拼出，不调用编解码器"""
+        found = self.lengths(text, encoding)
+        if found is None:
+            return None
+        lengths, starts = found
+        offsets = np.zeros(len(lengths) + 1, dtype=np.uint64)
+        np.cumsum(lengths, out=offsets[1:])
+        total = int(offsets[-1])
+        # 第 k 个输出字节取自 data[starts[i] + (k - offsets[i])]，i 为它所属的字符
+        gather = np.repeat(starts.astype(np.int64) - offsets[:-1].astype(np.int64), lengths)
+        gather += np.arange(total, dtype=np.int64)
+        return {
+            'data': self.array(encoding, 'data')[gather].tobytes(),
+            'offsets': array('Q', offsets.tobytes()),
+            'failed': np.flatnonzero(lengths == 0).tolist()
+        }
+
+
+_tables = None
+_tables_lock = threading.Lock()
+
+
+def get_tables():
+    """按需加载表文件，未安装 numpy、文件不存在或版本不匹配时返回 None"""
+    global _tables
+    if _tables is None:
+        with _tables_lock:
+            if _tables is None:
+                _tables = False
+                path = os.environ.get('ENCODING_TABLES_PATH') or DEFAULT_TABLES_PATH
+                if np is not None and os.path.isfile(path):
+                    try:
+                        _tables = CodepointTables(path)
+                    except (OSError, ValueError, KeyError) as e:
+                        print(f"⚠️  无法加载编码查找表 {path}: {e}", file=sys.stderr)
+    return _tables or None
+
+
+def table_lengths(text, encoding):
+    """查表得到逐字符字节长度（uint8 数组），无可用的表时返回 None"""
+    tables = get_tables()
+    if tables is None or encoding not in tables.encodings:
+        return None
+    found = tables.lengths(text, encoding)
+    return None if found is None else found[0]
+
+
+def table_spans(text, encoding):
+    """查表得到 encode_spans 的结果，无可用的表时返回 None"""
+    tables = get_tables()
+    if tables is None or encoding not in tables.encodings:
+        return None
+    return tables.spans(text, encoding)
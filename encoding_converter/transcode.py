@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+"""大文件转码：mmap 源文件，按源编码的字符边界切块，多进程并行转码并写入预先算好的偏移
+
+各块转码后写入各自的临时分段文件，全部成功后（strict 下的错误在写出输出文件之前就能发现）
+再按顺序拼接到输出文件，每块只转码一次。
+每个进程同时只持有一块的数据，内存占用只与块大小有关，与文件大小无关。
+"""
+
+import codecs
+import io
+import mmap
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+from .detect import detect_file
+from .scoring import detect_scored
+from .stream import iter_transcoded_chunks, transcode_errors
+
+# 每块的目标字节数（实际边界会向前对齐到字符边界）
+DEFAULT_CHUNK_BYTES = 16 * 1024 * 1024
+# 小于该大小的文件在当前进程中逐块转码，不启动进程池
+PARALLEL_MIN_BYTES = 32 * 1024 * 1024
+# 拼接分段文件时每次复制的字节数
+COPY_BYTES = 1024 * 1024
+# 双字节编码向前寻找单字节字符的最大距离，找不到时该处不切分（与下一块合并）
+ALIGN_SEARCH_BYTES = 64 * 1024
+
+# 首字节/尾字节成对出现的编码：尾字节最小为 0x40，小于它的字节一定是独立的单字节字符
+_DOUBLE_BYTE = {
+    'gbk': 0x40, 'gb2312': 0x40, 'big5': 0x40, 'big5hkscs': 0x40,
+    'shift_jis': 0x40, 'cp932': 0x40, 'euc_jp': 0x40, 'euc_kr': 0x40, 'cp949': 0x40,
+    # gb18030 的四字节序列中第二、四字节为 0x30~0x39
+    'gb18030': 0x30
+}
+# 依赖上下文的编码：无法从中间切开，也无法分块独立编码
+_STATEFUL = ('iso2022', 'hz', 'utf_7', 'utf-7')
+
+_BOM_CODECS = {
+    'utf-8-sig': ('utf-8', [(codecs.BOM_UTF8, 'utf-8')]),
+    'utf-16': ('utf-16-le' if sys.byteorder == 'little' else 'utf-16-be',
+               [(codecs.BOM_UTF16_LE, 'utf-16-le'), (codecs.BOM_UTF16_BE, 'utf-16-be')]),
+    'utf-32': ('utf-32-le' if sys.byteorder == 'little' else 'utf-32-be',
+               [(codecs.BOM_UTF32_LE, 'utf-32-le'), (codecs.BOM_UTF32_BE, 'utf-32-be')])
+}
+
+
+@contextmanager
+def mapped(source):
+    """以 mmap 方式打开文件路径或带 fileno 的文件对象，产出可切片的缓冲区
+
+    空文件产出 b''；没有 fileno 的文件对象（如 BytesIO）读出全部内容。
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f, mapped(f) as data:
+            yield data
+        return
+    try:
+        fileno = source.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        source.seek(0)
+        yield source.read()
+        return
+    if os.fstat(fileno).st_size == 0:
+        yield b''
+        return
+    data = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+    try:
+        yield data
+    finally:
+        data.close()
+
+
+def _release(data, begin, end):
+    """处理完 data[begin:end] 后把对应的映射页交还系统，文件内容仍在页缓存中，只是不再计入本进程"""
+    if isinstance(data, mmap.mmap) and hasattr(mmap, 'MADV_DONTNEED'):
+        begin -= begin % mmap.PAGESIZE
+        data.madvise(mmap.MADV_DONTNEED, begin, end - begin)
+
+
+def detect_source(source, data):
+    """检测文件的源编码，data 为 mapped(source) 产出的缓冲区
+
+    ASCII/UTF-8 快速层用 detect_file 按块读文件，不经过 mmap 也不整段解码；
+    试解码只采样 data 的开头、中间、末尾三个窗口，内存占用与文件大小无关。
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            detected = detect_file(f)
+    else:
+        source.seek(0)
+        detected = detect_file(source)
+    return detect_scored(data, detected=detected)
+
+
+def _canonical(encoding):
+    return codecs.lookup(encoding).name
+
+
+def is_stateful(encoding):
+    """编码是否依赖上下文（转义序列切换字符集）"""
+    return _canonical(encoding).startswith(_STATEFUL)
+
+
+@lru_cache(maxsize=None)
+def is_single_byte(encoding):
+    """每个字节独立解码为一个字符的编码"""
+    if is_stateful(encoding):
+        return False
+    table = bytes(range(256))
+    try:
+        whole = table.decode(encoding, 'replace')
+    except UnicodeError:
+        return False
+    return len(whole) == 256 and all(table[i:i + 1].decode(encoding, 'replace') == whole[i]
+                                     for i in range(256))
+
+
+def source_layout(data, encoding):
+    """源编码的分块方式，返回 (各块使用的编解码器, 正文起点)
+
+    带 BOM 的编码按 BOM 选定字节序并跳过 BOM，之后各块都用不带 BOM 的编解码器。
+    """
+    name = _canonical(encoding)
+    if name in _BOM_CODECS:
+        default, boms = _BOM_CODECS[name]
+        head = bytes(data[:4])
+        # utf-32 的 BOM 以 utf-16 的 BOM 开头，先匹配较长的
+        for bom, codec in sorted(boms, key=lambda item: -len(item[0])):
+            if head.startswith(bom):
+                return codec, len(bom)
+        return default, 0
+    return name, 0
+
+
+def target_layout(encoding):
+    """目标编码的分块方式，返回 (各块使用的编解码器, 输出开头的 BOM)"""
+    name = _canonical(encoding)
+    if name in _BOM_CODECS:
+        return _BOM_CODECS[name][0], ''.encode(name)
+    return name, b''
+
+
+_LOW_BYTES = {}
+
+
+def _low_byte_pattern(limit):
+    if limit not in _LOW_BYTES:
+        _LOW_BYTES[limit] = re.compile(b'[\\x00-' + bytes([limit - 1]) + b']')
+    return _LOW_BYTES[limit]
+
+
+def align_boundary(data, cut, codec, start=0):
+    """把切分点 cut 向前移到 codec 的字符边界，返回新的切分点；无法确定边界时返回 None
+
+    UTF-8 跳过续字节；UTF-16/32 按码元对齐且不切开代理对；
+    双字节编码退到最近的一个单字节字符（小于尾字节下限的字节）之后；单字节编码任意位置都可切分。
+    """
+    if codec == 'utf-8':
+        for back in range(4):
+            if cut - back <= start:
+                return None
+            if not 0x80 <= data[cut - back] <= 0xBF:
+                return cut - back
+        return cut
+    if codec in ('utf-16-le', 'utf-16-be'):
+        cut -= (cut - start) % 2
+        if cut + 1 >= len(data):
+            return cut
+        high = data[cut + 1] if codec == 'utf-16-le' else data[cut]
+        if 0xDC <= high <= 0xDF:
+            cut -= 2
+        return cut if cut > start else None
+    if codec in ('utf-32-le', 'utf-32-be'):
+        cut -= (cut - start) % 4
+        return cut if cut > start else None
+    if codec in _DOUBLE_BYTE:
+        low = max(start, cut - ALIGN_SEARCH_BYTES)
+        window = bytes(data[low:cut])[::-1]
+        match = _low_byte_pattern(_DOUBLE_BYTE[codec]).search(window)
+        if match is None:
+            return None
+        cut -= match.start()
+        return cut if cut > start else None
+    if is_single_byte(codec):
+        return cut
+    return None
+
+
+def splittable(codec):
+    """该源编解码器能否从中间切开"""
+    return (codec in ('utf-8', 'utf-16-le', 'utf-16-be', 'utf-32-le', 'utf-32-be')
+            or codec in _DOUBLE_BYTE or is_single_byte(codec))
+
+
+def split_chunks(data, codec, start=0, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """把 data[start:] 切成若干 (起点, 终点)，每个切分点都落在 codec 的字符边界上"""
+    size = len(data)
+    chunks = []
+    begin = start
+    cut = begin + chunk_bytes
+    while cut < size:
+        aligned = align_boundary(data, cut, codec, begin)
+        if aligned is None:
+            # 找不到边界时与下一块合并
+            cut += chunk_bytes
+            continue
+        chunks.append((begin, aligned))
+        begin = aligned
+        cut = begin + chunk_bytes
+    chunks.append((begin, size))
+    return chunks
+
+
+def transcode_range(data, begin, end, spec):
+    """转码 data[begin:end]，spec 为 (源编解码器, 目标编解码器, 解码错误处理, 编码错误处理)"""
+    source, target, decode_errors, encode_errors = spec
+    with memoryview(data) as view, view[begin:end] as chunk:
+        try:
+            text = str(chunk, source, decode_errors)
+        except UnicodeDecodeError as e:
+            raise ValueError(f'{source} 无法解码第 {begin + e.start} 字节: {e.reason}') from None
+    try:
+        return text.encode(target, encode_errors)
+    except UnicodeEncodeError as e:
+        raise ValueError(
+            f'{target} 无法编码字符 {e.object[e.start]!r}（源文件第 {begin}~{end} 字节之间）'
+        ) from None
+
+
+def _range_task(task):
+    """进程池任务：转码一块并写入自己的分段文件，返回输出长度"""
+    path, begin, end, spec, segment = task
+    with mapped(path) as data:
+        output = transcode_range(data, begin, end, spec)
+    with open(segment, 'wb') as f:
+        f.write(output)
+    return len(output)
+
+
+def _transcode_sequential(src, tmp, source_encoding, target_encoding, errors):
+    """无法切块的编码：用增量解码器/编码器从头到尾流式转码"""
+    written = 0
+    with open(src, 'rb') as f, open(tmp, 'wb') as out:
+        for encoded in iter_transcoded_chunks(f, source_encoding, target_encoding, errors):
+            out.write(encoded)
+            written += len(encoded)
+    return written
+
+
+def _transcode_chunks(data, src, tmp, chunks, spec, prefix, workers):
+    """按块转码：进程池并行写分段文件后按顺序拼接，或在当前进程中逐块顺序写出"""
+    if workers <= 1:
+        total = len(prefix)
+        with open(tmp, 'wb') as out:
+            out.write(prefix)
+            for begin, end in chunks:
+                output = transcode_range(data, begin, end, spec)
+                _release(data, begin, end)
+                out.write(output)
+                total += len(output)
+        return total
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(tmp), prefix='.segments.') as segments:
+        paths = [os.path.join(segments, f'{i}.part') for i in range(len(chunks))]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            lengths = list(executor.map(
+                _range_task, [(src, begin, end, spec, path) for (begin, end), path in zip(chunks, paths)]
+            ))
+        with open(tmp, 'wb') as out:
+            out.write(prefix)
+            for path in paths:
+                with open(path, 'rb') as segment:
+                    shutil.copyfileobj(segment, out, COPY_BYTES)
+                # 边拼接边删除，磁盘上同时只多出约一份输出
+                os.unlink(path)
+    return len(prefix) + sum(lengths)
+
+
+def transcode_file(src, dst, target_encoding, source_encoding=None, errors='strict',
+                   workers=None, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """把文件 src 从源编码转为目标编码写到 dst（可与 src 相同），返回统计信息
+
+    未指定源编码时用 detect_source 检测（按块读取，试解码只采样）。结果先写入 dst 同目录的临时文件再替换，
+    失败时不会留下半截文件。workers 默认为 CPU 数，小于 PARALLEL_MIN_BYTES 的文件只用当前进程。
+    """
+    decode_errors, encode_errors = transcode_errors(errors)
+    codecs.lookup(target_encoding)
+    if source_encoding:
+        codecs.lookup(source_encoding)
+    start = time.perf_counter()
+    src = Path(src)
+    dst = Path(dst)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=str(dst.parent), prefix=f'.{dst.name}.', suffix='.tmp')
+    os.close(fd)
+    try:
+        with mapped(src) as data:
+            size = len(data)
+            if not source_encoding:
+                source_encoding = detect_source(src, data).get('encoding') or 'utf-8'
+            source_codec, body_start = source_layout(data, source_encoding)
+            target_codec, prefix = target_layout(target_encoding)
+            chunks = None
+            if splittable(source_codec) and not is_stateful(target_encoding):
+                chunks = split_chunks(data, source_codec, body_start, chunk_bytes)
+                # 寻找边界时读到的页会连带映射周围的一大片，切分完即释放
+                _release(data, 0, size)
+                workers = 1 if size < PARALLEL_MIN_BYTES else min(workers or os.cpu_count() or 1, len(chunks))
+                spec = (source_codec, target_codec, decode_errors, encode_errors)
+                output_bytes = _transcode_chunks(data, str(src), tmp, chunks, spec, prefix, workers)
+        if chunks is None:
+            workers = 1
+            output_bytes = _transcode_sequential(src, tmp, source_encoding, target_encoding, errors)
+
+        shutil.copymode(dst if dst.exists() else src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+    seconds = time.perf_counter() - start
+    return {
+        'source_encoding': source_encoding,
+        'target_encoding': target_encoding,
+        'input_bytes': size,
+        'output_bytes': output_bytes,
+        'chunks': len(chunks) if chunks else 1,
+        'workers': workers,
+        'seconds': round(seconds, 6),
+        'throughput_mb_s': round(size / 1024 / 1024 / seconds, 3) if seconds else None
+    }
+
+
+def read_text(source, encoding=None, errors='ignore'):
+    """以 mmap 读取并解码整个文件（路径或文件对象），返回 (文本, 检测结果, 字节数)
+
+    不把原始字节读入内存，检测按块读取；未指定编码时用 detect_source 的结果。
+    """
+    with mapped(source) as data:
+        if encoding:
+            detected = {'encoding': encoding, 'confidence': 1.0, 'language': '', 'tier': 'given'}
+        else:
+            detected = detect_source(source, data)
+            encoding = detected.get('encoding') or 'utf-8'
+        try:
+            codecs.lookup(encoding)
+        except LookupError:
+            encoding = 'utf-8'
+        detected['encoding'] = encoding
+        with memoryview(data) as view:
+            text = str(view, encoding, errors)
+        return text, detected, len(data)
@@ -191,12 +191,9 @@ async function convertText() {
     showLoading(true);
     
     try {
-        const response = await fetchAPI('/convert', {
-            method: 'POST',
-            body: JSON.stringify({
-                text: appState.currentText,
-                encodings: Array.from(appState.selectedEncodings)
-            })
+        const response = await postConvert({
+            text: appState.currentText,
+            encodings: Array.from(appState.selectedEncodings)
         });
 
         // 检查响应是否成功
@@ -219,13 +216,12 @@ async function convertText() {
 }
 
 async function detectFileEncoding(file) {
-    const formData = new FormData();
-    formData.append('file', file);
-    
     try {
+        // 直接上传原始字节，服务端只采样开头、中间、末尾检测
         const response = await fetch(`${CONFIG.API_BASE_URL}/detect`, {
             method: 'POST',
-            body: formData
+            headers: { 'Content-Type': 'application/octet-stream' },
+            body: file
         });
         
         return await response.json();
@@ -0,0 +1,31 @@
+// /api/convert 请求（转换器、可视化页面共用），需在页面脚本之前加载
+// 请求地址取自页面脚本定义的 CONFIG.API_BASE_URL
+
+// ETag 记录：请求体 -> { etag, result }，相同请求带 If-None-Match，304 时复用上次结果
+const convertEtags = new Map();
+const CONVERT_ETAG_LIMIT = 20;
+
+async function postConvert(payload) {
+    const body = JSON.stringify(payload);
+    const cached = convertEtags.get(body);
+    const headers = { 'Content-Type': 'application/json' };
+    if (cached) {
+        headers['If-None-Match'] = cached.etag;
+    }
+
+    const response = await fetch(`${CONFIG.API_BASE_URL}/convert`, { method: 'POST', headers, body });
+    if (response.status === 304 && cached) {
+        return cached.result;
+    }
+
+    const result = await response.json();
+    const etag = response.headers.get('ETag');
+    if (response.ok && etag) {
+        convertEtags.delete(body);
+        convertEtags.set(body, { etag, result });
+        if (convertEtags.size > CONVERT_ETAG_LIMIT) {
+            convertEtags.delete(convertEtags.keys().next().value);
+        }
+    }
+    return result;
+}
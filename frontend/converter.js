@@ -226,18 +226,12 @@ async function convertText() {
     try {
         showLoading(true);
         
-        const response = await fetch(`${CONFIG.API_BASE_URL}/convert`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-                text: text,
-                encodings: Array.from(appState.selectedEncodings)
-            })
+        const result = await postConvert({
+            text: text,
+            encodings: Array.from(appState.selectedEncodings),
+            // 页面只用到十六进制和字节数组，不需要 base64
+            fields: ['hex', 'bytes']
         });
-
-        const result = await response.json();
         
         if (result.success) {
             appState.conversionResults = result.results;
@@ -118,17 +118,13 @@ async function analyzeText() {
         showLoading(true);
         
         // 调用后端API进行分析
-        const response = await fetch(`${CONFIG.API_BASE_URL}/convert`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                text: text,
-                encodings: encoding === 'all' ? 
-                    ['utf-8', 'utf-16', 'gbk', 'ascii'] : [encoding]
-            })
+        const result = await postConvert({
+            text: text,
+            encodings: encoding === 'all' ? 
+                ['utf-8', 'utf-16', 'gbk', 'ascii'] : [encoding],
+            // 可视化只用到十六进制和字节数组，不需要 base64
+            fields: ['hex', 'bytes']
         });
-
-        const result = await response.json();
         if (result.success) {
             analysisData = processAnalysisData(result.results, text);
             updateVisualizations();